@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Compare chatmix.analytics with Python loops, over Message objects in
+memory and over the same corpus exported as JSONL and Parquet.
+
+Run from the repository root:
+
+    python benchmarks/bench_analytics.py [conversations]
+"""
+
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chatmix.analytics import analyze_conversations, analyze_export
+from chatmix.export import export_conversations
+from chatmix.parsers.models import Conversation, Message, Role
+
+WORDS = 'request response cache parser message token stream buffer record host'.split()
+
+
+def corpus(conversations: int):
+    rng = random.Random(0)
+    for c in range(conversations):
+        messages = []
+        for t in range(rng.randint(2, 20)):
+            content = ' '.join(rng.choices(WORDS, k=rng.randint(5, 400)))
+            if t % 4 == 3:
+                content += '\n```python\nprint("hello")\n```'
+            # No markup, as from embedded JSON, so fences in the content count
+            messages.append(Message(role=Role.USER if t % 2 == 0 else Role.ASSISTANT, content=content, raw_html=''))
+        yield Conversation(messages=messages, url=f'https://claude.ai/share/{c:032d}')
+
+
+def python_loop(conversations):
+    """The per-object loop the analytics module replaces."""
+    rows = (
+        (index, message.role.value, message.content)
+        for index, conversation in enumerate(conversations)
+        for message in conversation.messages
+    )
+    return summarize(rows)
+
+
+def python_jsonl_loop(path):
+    with open(path, encoding='utf-8') as f:
+        rows = ((row['conversation_id'], row['role'], row['content']) for row in map(json.loads, f))
+        return summarize(rows)
+
+
+def summarize(rows):
+    chars, tokens, turns = [], [], []
+    roles = {}
+    code = 0
+    previous = None
+    for conversation, role, content in rows:
+        if conversation != previous:
+            turns.append(0)
+            previous = conversation
+        turns[-1] += 1
+        length = len(content)
+        chars.append(length)
+        tokens.append(math.ceil(length / 4))
+        roles[role] = roles.get(role, 0) + 1
+        code += content.count('```') // 2
+    quantiles = {}
+    for name, values in (('chars', chars), ('tokens', tokens), ('turns', turns)):
+        values.sort()
+        quantiles[name] = [values[int(q * (len(values) - 1))] for q in (0.5, 0.9, 0.99)]
+    return len(chars), sum(tokens), code, quantiles
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    data = list(corpus(count))
+
+    start = time.perf_counter()
+    messages, tokens, code, _ = python_loop(data)
+    looped = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stats = analyze_conversations(data)
+    vectorized = time.perf_counter() - start
+    assert (stats.messages, stats.message_tokens.total, stats.code_blocks) == (messages, tokens, code)
+
+    print(f'{messages} messages in {count} conversations')
+    print(f'{"in memory, python loop":<32} {looped:8.2f}s')
+    print(f'{"analyze_conversations":<32} {vectorized:8.2f}s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        jsonl = os.path.join(directory, 'conversations.jsonl')
+        dataset = os.path.join(directory, 'dataset')
+        export_conversations(data, jsonl)
+        export_conversations(data, dataset)
+        del data
+
+        start = time.perf_counter()
+        assert python_jsonl_loop(jsonl)[:3] == (messages, tokens, code)
+        print(f'{"JSONL, python loop":<32} {time.perf_counter() - start:8.2f}s')
+        for name, path in (('analyze_export(JSONL)', jsonl), ('analyze_export(Parquet)', dataset)):
+            start = time.perf_counter()
+            assert analyze_export(path).to_dict() == stats.to_dict()
+            print(f'{name:<32} {time.perf_counter() - start:8.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark ClaudeParser extraction on deeply nested synthetic pages.
+
+Run from the repository root:
+
+    python benchmarks/bench_claude_parser.py
+
+Time per node should stay roughly flat as nesting depth doubles; a
+quadratic extraction shows up as time per node doubling with depth.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chatmix.parsers import ClaudeParser
+from chatmix.parsers.backends import make_soup
+from chatmix.parsers.claude.parser import STRATEGIES
+from corpus import claude_page
+
+
+def nested_page(depth: int, turns: int = 4, classed: bool = True) -> str:
+    """Build a page whose message text sits ``depth`` divs deep."""
+    return claude_page(turns=turns, depth=depth, code_blocks=0, classed=classed)
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    # html.parser has no nesting limit, unlike lxml
+    parser = ClaudeParser(backend='html.parser')
+    for classed, strategy in ((True, 'class-selectors'), (False, 'heuristic')):
+        print(f'\n{strategy} strategy')
+        print(f"{'depth':>6} {'nodes':>8} {'extract ms':>11} {'us/node':>8}")
+        for depth in (50, 100, 200, 400, 800):
+            soup = make_soup(nested_page(depth, classed=classed), 'html.parser')
+            nodes = len(soup.find_all(True))
+            extract = parser._strategy(strategy)
+            elapsed = best_of(lambda: extract(soup))
+            print(f'{depth:>6} {nodes:>8} {elapsed * 1000:>11.2f} {elapsed / nodes * 1e6:>8.2f}')
+
+    print(f'\nstrategies: {", ".join(STRATEGIES)}')
+
+
+if __name__ == '__main__':
+    main()
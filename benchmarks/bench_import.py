@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Measure how long importing chatmix takes in a fresh interpreter.
+
+Run from the repository root:
+
+    python benchmarks/bench_import.py [runs]
+
+Package imports are lazy, so ``import chatmix`` and light names like
+``Role`` should not pay for requests and bs4. The eager row imports every
+module the package used to load up front, for comparison.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CASES = (
+    ('interpreter only', 'pass'),
+    ('import chatmix', 'import chatmix'),
+    ('chatmix.parsers.Role', 'from chatmix.parsers import Role'),
+    ('chatmix.parsers.ClaudeParser', 'from chatmix.parsers import ClaudeParser'),
+    ('eager (all parser modules)', 'import chatmix.parsers.parser, chatmix.parsers.claude.parser, '
+                                   'chatmix.parsers.batch, chatmix.parsers.cache, chatmix.parsers.memo'),
+)
+
+
+def best_of(code: str, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    best_of('pass', 2)  # warm the OS file cache
+    timings = [(name, best_of(code, runs)) for name, code in CASES]
+    baseline = timings[0][1]
+    print(f"{'case':<32} {'ms':>8} {'over interpreter':>17}")
+    for name, elapsed in timings:
+        print(f'{name:<32} {elapsed * 1000:>8.1f} {(elapsed - baseline) * 1000:>17.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compare InvertedIndex queries with a linear scan over message content.
+
+Run from the repository root:
+
+    python benchmarks/bench_index.py [conversations] [turns]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chatmix.index import InvertedIndex, parse_query, tokenize
+from chatmix.parsers.models import Conversation, Message, Role
+
+# A Zipf-like vocabulary, so queries range from common to rare words
+VOCABULARY = [f'w{n}' for n in range(20_000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+QUERIES = ('w3', 'w3 w10', 'w500 w7', '"w0 w1"', 'w5000')
+
+
+def corpus(conversations: int, turns: int):
+    rng = random.Random(0)
+    for c in range(conversations):
+        messages = [
+            Message(
+                role=Role.USER if t % 2 == 0 else Role.ASSISTANT,
+                content=' '.join(rng.choices(VOCABULARY, WEIGHTS, k=rng.randint(10, 200))),
+            )
+            for t in range(turns)
+        ]
+        yield Conversation(messages=messages, url=f'https://claude.ai/share/{c:016d}')
+
+
+def scan(conversations, query: str) -> int:
+    parsed = parse_query(query)
+    hits = 0
+    for conversation in conversations:
+        for message in conversation.messages:
+            tokens = tokenize(message.content)
+            words = set(tokens)
+            if not all(term in words for term in parsed.terms):
+                continue
+            if all(
+                any(tuple(tokens[i:i + len(phrase)]) == phrase for i in range(len(tokens)))
+                for phrase in parsed.phrases
+            ):
+                hits += 1
+    return hits
+
+
+def main():
+    conversations = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    data = list(corpus(conversations, turns))
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        index = InvertedIndex(os.path.join(directory, 'index'))
+        index.add(data)
+        print(f'indexed {conversations * turns} messages in {time.perf_counter() - start:.2f}s')
+
+        print(f"{'query':<12} {'hits':>8} {'scan ms':>10} {'index ms':>10}")
+        for query in QUERIES:
+            start = time.perf_counter()
+            expected = scan(data, query)
+            scanned = time.perf_counter() - start
+            start = time.perf_counter()
+            found = len(index.search(query))
+            searched = time.perf_counter() - start
+            assert found == expected, (query, found, expected)
+            print(f'{query:<12} {found:>8} {scanned * 1000:>10.1f} {searched * 1000:>10.2f}')
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
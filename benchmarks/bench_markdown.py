@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark html_to_markdown against the multi-pass converter it replaced.
+
+Run from the repository root:
+
+    python benchmarks/bench_markdown.py
+
+The legacy converter rewrote the tree with one ``find_all`` and
+``replace_with`` round per element kind; the current one renders in a
+single walk. Parsing is excluded so only the conversion is timed.
+"""
+
+import copy
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chatmix.parsers.backends import make_soup
+from chatmix.parsers.utils import _soup_to_markdown
+
+
+def message_html(sections: int) -> str:
+    """Build an assistant reply with ``sections`` headed sections of mixed content."""
+    parts = []
+    for n in range(sections):
+        parts.append(
+            f'<h2>Section {n}</h2>'
+            f'<p>Run <code>step {n}</code> and read <a href="https://example.com/{n}">the guide</a>.</p>'
+            '<ul><li>First point</li><li>Second point<ul><li>Nested detail</li></ul></li></ul>'
+            f'<pre><code class="language-python">def step_{n}():\n    return {n}\n</code></pre>'
+            '<table><thead><tr><th>Key</th><th>Value</th></tr></thead>'
+            f'<tbody><tr><td>id</td><td>{n}</td></tr></tbody></table>'
+        )
+    return '<div>' + ''.join(parts) + '</div>'
+
+
+def legacy_markdown(soup) -> str:
+    """The converter as it was before the single-pass rewrite."""
+    for level in range(1, 7):
+        for heading in soup.find_all(f'h{level}'):
+            heading.replace_with(f"{'#' * level} {heading.get_text()}\n\n")
+    for ul in soup.find_all('ul'):
+        ul.replace_with('\n'.join(f'- {li.get_text()}' for li in ul.find_all('li')) + '\n\n')
+    for ol in soup.find_all('ol'):
+        ol.replace_with('\n'.join(f'{i + 1}. {li.get_text()}' for i, li in enumerate(ol.find_all('li'))) + '\n\n')
+    for pre in soup.find_all('pre'):
+        code = pre.find('code')
+        if code:
+            language = next((c[len('language-'):] for c in code.get('class', []) if c.startswith('language-')), '')
+            pre.replace_with(f'```{language}\n{code.get_text()}\n```\n\n')
+    for code in soup.find_all('code'):
+        if code.parent.name != 'pre':
+            code.replace_with(f'`{code.get_text()}`')
+    for a in soup.find_all('a'):
+        a.replace_with(f"[{a.get_text()}]({a.get('href', '')})")
+    for img in soup.find_all('img'):
+        img.replace_with(f"![{img.get('alt', '')}]({img.get('src', '')})")
+    for p in soup.find_all('p'):
+        p.replace_with(f'{p.get_text()}\n\n')
+    return re.sub(r'\n{3,}', '\n\n', soup.get_text()).strip()
+
+
+def best_of(func, setup, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'sections':>8} {'nodes':>7} {'legacy ms':>10} {'single ms':>10} {'speedup':>8}")
+    for sections in (10, 40, 160, 640):
+        soup = make_soup(message_html(sections))
+        nodes = len(soup.find_all(True))
+        # The legacy converter mutates its input, so each run gets a fresh copy
+        legacy = best_of(legacy_markdown, lambda: copy.copy(soup))
+        single = best_of(_soup_to_markdown, lambda: soup)
+        print(f'{sections:>8} {nodes:>7} {legacy * 1000:>10.2f} {single * 1000:>10.2f} {legacy / single:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compare the memory taken by parsed conversations before and after the
+slotted models, with and without raw HTML.
+
+Run from the repository root:
+
+    python benchmarks/bench_models_memory.py [conversations] [turns]
+"""
+
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chatmix.parsers import ClaudeParser, Conversation, Message, Role
+from corpus import claude_page
+
+
+@dataclass
+class PlainMessage:
+    """The original, unslotted message model."""
+    role: Role
+    content: str
+    raw_html: Optional[str] = None
+
+
+@dataclass
+class PlainConversation:
+    messages: List[PlainMessage]
+    url: str
+    title: Optional[str] = None
+
+
+def fresh(text: str) -> str:
+    """Copy a string, so each corpus owns its text like a fresh parse would."""
+    return (text + '.')[:-1]
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    corpus = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del corpus
+    return current
+
+
+def main():
+    conversations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    pages = [claude_page(turns=turns, seed=i) for i in range(conversations)]
+    parser = ClaudeParser(backend='html.parser')
+    parsed = [parser.parse_from_html(page, f'https://claude.ai/share/{i}') for i, page in enumerate(pages)]
+    total = conversations * turns
+
+    def plain():
+        return [
+            PlainConversation(
+                messages=[PlainMessage(m.role, fresh(m.content), fresh(m.raw_html)) for m in c.messages],
+                url=c.url, title=c.title,
+            )
+            for c in parsed
+        ]
+
+    def slotted():
+        return [
+            Conversation(
+                messages=[Message(m.role, fresh(m.content), fresh(m.raw_html)) for m in c.messages],
+                url=c.url, title=c.title,
+            )
+            for c in parsed
+        ]
+
+    def dropped():
+        return [
+            Conversation(
+                messages=[Message(m.role, fresh(m.content)) for m in c.messages],
+                url=c.url, title=c.title,
+            )
+            for c in parsed
+        ]
+
+    print(f'{conversations} conversations, {total} messages')
+    print(f"{'model':<32} {'MiB':>8} {'bytes/message':>14}")
+    for name, build in (
+        ('plain dataclasses + raw_html', plain),
+        ('slotted + raw_html', slotted),
+        ('slotted, keep_raw_html=False', dropped),
+    ):
+        used = measure(build)
+        print(f'{name:<32} {used / 2**20:>8.2f} {used / total:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
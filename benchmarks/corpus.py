@@ -0,0 +1,184 @@
+"""
+Generate synthetic Claude and ChatGPT share pages for benchmarks.
+
+Pages are deterministic for a given seed and shaped like the real ones
+closely enough to exercise the same code paths: role-marked message
+containers wrapped in extra divs, prose, lists, code blocks and tables,
+and optionally the embedded JSON payload the parsers try first.
+
+    from benchmarks.corpus import claude_page, chatgpt_page
+
+    html = claude_page(turns=40, depth=6, code_blocks=2, tables=1, size=512 * 1024)
+"""
+
+import json
+import random
+from typing import List, Optional
+
+WORDS = (
+    'request response cache parser message token stream buffer record host '
+    'value index query worker thread latency table column schema batch page '
+    'render field layout window signal socket header payload session branch'
+).split()
+
+LANGUAGES = ('python', 'javascript', 'bash', 'sql', 'rust')
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def _code_block(rng: random.Random, lines: int = 8) -> str:
+    language = rng.choice(LANGUAGES)
+    body = '\n'.join(
+        f'{"    " * (n % 3)}{rng.choice(WORDS)}_{n} = {rng.choice(WORDS)}({n})' for n in range(lines)
+    )
+    return f'<pre><code class="language-{language}">{body}\n</code></pre>'
+
+
+def _table(rng: random.Random, rows: int = 5, columns: int = 3) -> str:
+    header = ''.join(f'<th>{rng.choice(WORDS).title()}</th>' for _ in range(columns))
+    body = ''.join(
+        '<tr>' + ''.join(f'<td>{rng.choice(WORDS)} {rng.randint(0, 999)}</td>' for _ in range(columns)) + '</tr>'
+        for _ in range(rows)
+    )
+    return f'<table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def reply_body(rng: random.Random, code_blocks: int = 1, tables: int = 0, paragraphs: int = 3) -> str:
+    """Build the inner HTML of an assistant reply."""
+    parts = [f'<h3>{_sentence(rng, 3)[:-1]}</h3>']
+    for _ in range(paragraphs):
+        parts.append(
+            f'<p>{_sentence(rng, 12)} Use <code>{rng.choice(WORDS)}()</code> or see '
+            f'<a href="https://example.com/{rng.choice(WORDS)}">{rng.choice(WORDS)}</a>.</p>'
+        )
+    parts.append(
+        '<ul>' + ''.join(f'<li>{_sentence(rng, 6)}</li>' for _ in range(3))
+        + f'<li>{_sentence(rng, 4)}<ol><li>{_sentence(rng, 5)}</li><li>{_sentence(rng, 5)}</li></ol></li></ul>'
+    )
+    parts.extend(_code_block(rng) for _ in range(code_blocks))
+    parts.extend(_table(rng) for _ in range(tables))
+    return ''.join(parts)
+
+
+def _message_texts(rng: random.Random, turns: int, code_blocks: int, tables: int, paragraphs: int) -> List[str]:
+    texts = []
+    for turn in range(turns):
+        if turn % 2 == 0:
+            texts.append(f'<p>{_sentence(rng, 20)}</p>')
+        else:
+            texts.append(reply_body(rng, code_blocks, tables, paragraphs))
+    return texts
+
+
+def _pad(parts: List[str], size: Optional[int], close: str) -> str:
+    # Grow the page to ``size`` bytes with page chrome outside any message
+    html = ''.join(parts) + close
+    if size is not None and len(html) < size:
+        filler = '<div class="sidebar-item"><span>Recent conversation</span></div>'
+        count = (size - len(html)) // len(filler) + 1
+        html = ''.join(parts) + f'<nav>{filler * count}</nav>' + close
+    return html
+
+
+def claude_page(
+    turns: int = 10,
+    depth: int = 2,
+    code_blocks: int = 1,
+    tables: int = 0,
+    size: Optional[int] = None,
+    paragraphs: int = 3,
+    classed: bool = True,
+    embedded: bool = False,
+    seed: int = 0,
+) -> str:
+    """
+    Build a Claude share page.
+
+    Args:
+        turns: The number of messages, alternating user and assistant.
+        depth: Extra wrapper divs around each message's content.
+        code_blocks: Code blocks per assistant reply.
+        tables: Tables per assistant reply.
+        size: Pad the page with sidebar markup to at least this many bytes.
+        paragraphs: Paragraphs per assistant reply.
+        classed: Mark messages with font-*-message classes; without them the
+            parser falls back to its structural strategies.
+        embedded: Include a ``chat_messages`` JSON payload.
+        seed: The random seed.
+    """
+    rng = random.Random(seed)
+    texts = _message_texts(rng, turns, code_blocks, tables, paragraphs)
+    parts = ['<!DOCTYPE html><html><head><title>Shared conversation</title>']
+    if embedded:
+        payload = {'chat_messages': [
+            {'sender': 'human' if i % 2 == 0 else 'assistant', 'text': text}
+            for i, text in enumerate(texts)
+        ], 'name': 'Synthetic conversation'}
+        parts.append(
+            '<script id="__NEXT_DATA__" type="application/json">'
+            + json.dumps({'props': {'pageProps': {'chat': payload}}}).replace('</', '<\\/')
+            + '</script>'
+        )
+    parts.append('</head><body><header>Synthetic conversation</header><main>')
+    for turn, text in enumerate(texts):
+        role = 'user' if turn % 2 == 0 else 'claude'
+        css = f' class="font-{role}-message"' if classed else ''
+        parts.append(f'<div{css}>' + '<div>' * depth + text + '</div>' * depth + '</div>')
+    parts.append('</main>')
+    return _pad(parts, size, '</body></html>')
+
+
+def chatgpt_page(
+    turns: int = 10,
+    depth: int = 2,
+    code_blocks: int = 1,
+    tables: int = 0,
+    size: Optional[int] = None,
+    paragraphs: int = 3,
+    embedded: bool = False,
+    seed: int = 0,
+) -> str:
+    """
+    Build a ChatGPT share page.
+
+    Takes the same arguments as ``claude_page``; messages are marked with
+    ``data-message-author-role`` and the embedded payload is a
+    ``linear_conversation`` list.
+    """
+    rng = random.Random(seed)
+    texts = _message_texts(rng, turns, code_blocks, tables, paragraphs)
+    parts = ['<!DOCTYPE html><html><head><title>Shared conversation</title>']
+    if embedded:
+        nodes = [
+            {'message': {
+                'author': {'role': 'user' if i % 2 == 0 else 'assistant'},
+                'content': {'content_type': 'text', 'parts': [text]},
+            }}
+            for i, text in enumerate(texts)
+        ]
+        payload = {'title': 'Synthetic conversation', 'linear_conversation': nodes}
+        parts.append(
+            '<script id="__NEXT_DATA__" type="application/json">'
+            + json.dumps({'props': {'pageProps': {'serverResponse': {'data': payload}}}}).replace('</', '<\\/')
+            + '</script>'
+        )
+    parts.append('</head><body><main>')
+    for turn, text in enumerate(texts):
+        role = 'user' if turn % 2 == 0 else 'assistant'
+        parts.append(
+            f'<article><div data-message-author-role="{role}">'
+            + '<div>' * depth + text + '</div>' * depth + '</div></article>'
+        )
+    parts.append('</main>')
+    return _pad(parts, size, '</body></html>')
+
+
+def generate(platform: str, **params) -> str:
+    """Build a page for ``platform`` ('claude' or 'chatgpt')."""
+    if platform == 'claude':
+        return claude_page(**params)
+    if platform == 'chatgpt':
+        return chatgpt_page(**params)
+    raise ValueError(f'Unknown platform: {platform!r}')
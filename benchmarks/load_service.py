@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Load-test the parse service against a slow stand-in origin.
+
+Clients request links with Zipf-like popularity, as when many jobs hit the
+same popular conversations, and the run reports throughput, latency
+percentiles and how many requests were served by coalescing onto a fetch
+already in flight. Run from the repository root:
+
+    python benchmarks/load_service.py [clients] [requests per client] [links]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.corpus import claude_page
+from chatmix.client import ServiceClient
+from chatmix.service import ParseService
+
+# Seconds the origin takes to answer, like a real share page over the internet
+ORIGIN_DELAY = 0.15
+
+
+def start_origin(links: int) -> ThreadingHTTPServer:
+    pages = {f'/share/{n}': claude_page(seed=n, turns=20).encode('utf-8') for n in range(links)}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(ORIGIN_DELAY)
+            body = pages.get(self.path)
+            self.send_response(200 if body else 404)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body or b'')))
+            self.end_headers()
+            self.wfile.write(body or b'')
+
+        def log_message(self, *args):
+            pass
+
+    origin = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    origin.daemon_threads = True
+    threading.Thread(target=origin.serve_forever, daemon=True).start()
+    return origin
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    links = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    origin = start_origin(links)
+    base = f'http://127.0.0.1:{origin.server_address[1]}'
+    weights = [1 / (rank + 1) for rank in range(links)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        address = os.path.join(directory, 'chatmix.sock')
+        service = ParseService(fetch_workers=clients)
+        loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+        loop_thread.start()
+        server = asyncio.run_coroutine_threadsafe(service.start(address), loop).result()
+
+        latencies = []
+
+        def client(seed: int) -> None:
+            rng = random.Random(seed)
+            with ServiceClient(address) as connection:
+                for link in rng.choices(range(links), weights, k=per_client):
+                    start = time.perf_counter()
+                    connection.parse_from_url(f'{base}/share/{link}', parser='claude')
+                    latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        with ServiceClient(address) as connection:
+            stats = connection.stats()
+
+        async def shutdown():
+            server.close()
+            await server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+        loop.close()
+        service.close()
+    origin.shutdown()
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    print(f'{len(latencies)} requests from {clients} clients in {elapsed:.2f}s '
+          f'({len(latencies) / elapsed:.0f} req/s)')
+    print(f'latency ms: p50 {percentile(0.5):.0f}  p90 {percentile(0.9):.0f}  p99 {percentile(0.99):.0f}')
+    print(f"origin fetches: {stats['fetches']}  coalesced: {stats['coalesced']}  errors: {stats['errors']}")
+
+
+if __name__ == '__main__':
+    main()
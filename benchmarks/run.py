@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Time parsing and extraction on synthetic pages and compare with baselines.
+
+Run from the repository root:
+
+    python benchmarks/run.py                       # print timings
+    python benchmarks/run.py --save local          # write baselines/local.json
+    python benchmarks/run.py --compare local       # compare with it
+
+Each benchmark reports the best time per call over several rounds and the
+peak memory traced during one call. ``--compare`` exits with status 1 when
+any benchmark is slower than the baseline by more than ``--threshold``.
+Baselines are only comparable on the machine and backend that wrote them.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chatmix.parsers import ChatGPTParser, ClaudeParser, utils
+from chatmix.parsers.backends import resolve_backend
+from corpus import generate, reply_body
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# name -> (platform, generator parameters)
+PAGES = {
+    'claude-small': ('claude', {'turns': 6}),
+    'claude-large': ('claude', {'turns': 80, 'code_blocks': 2, 'tables': 1}),
+    'claude-deep': ('claude', {'turns': 10, 'depth': 60}),
+    'claude-unclassed': ('claude', {'turns': 10, 'classed': False}),
+    'claude-padded': ('claude', {'turns': 10, 'size': 2 * 1024 * 1024}),
+    'claude-embedded': ('claude', {'turns': 80, 'embedded': True}),
+    'chatgpt-small': ('chatgpt', {'turns': 6}),
+    'chatgpt-large': ('chatgpt', {'turns': 80, 'code_blocks': 2, 'tables': 1}),
+    'chatgpt-embedded': ('chatgpt', {'turns': 80, 'embedded': True}),
+}
+
+# Pages also parsed with lazy=True, where only the messages are located
+LAZY_PAGES = ('claude-large', 'chatgpt-large')
+
+# name -> number of assistant replies in the fragment
+FRAGMENTS = {
+    'reply-small': 1,
+    'reply-large': 40,
+}
+
+EXTRACTORS = {
+    'extract_code_blocks': utils.extract_code_blocks,
+    'extract_lists': utils.extract_lists,
+    'extract_tables': utils.extract_tables,
+    'extract_headings': utils.extract_headings,
+    'extract_all': utils.extract_all,
+    'html_to_markdown': utils.html_to_markdown,
+}
+
+PARSERS = {'claude': ClaudeParser, 'chatgpt': ChatGPTParser}
+
+
+def benchmarks(backend: str) -> List[Tuple[str, Callable[[], object]]]:
+    """List every benchmark as a (name, zero-argument callable) pair."""
+    cases = []
+    for name, (platform_name, params) in PAGES.items():
+        html = generate(platform_name, **params)
+        parser = PARSERS[platform_name](backend=backend)
+        url = f'https://example.com/share/{name}'
+        cases.append((f'parse/{name}', lambda p=parser, h=html, u=url: p.parse_from_html(h, u)))
+        if name in LAZY_PAGES:
+            lazy = PARSERS[platform_name](backend=backend, lazy=True)
+            cases.append((f'parse-lazy/{name}', lambda p=lazy, h=html, u=url: p.parse_from_html(h, u)))
+
+    for name, replies in FRAGMENTS.items():
+        rng = random.Random(0)
+        html = ''.join(reply_body(rng, code_blocks=2, tables=1) for _ in range(replies))
+        for extractor_name, extractor in EXTRACTORS.items():
+            cases.append((
+                f'{extractor_name}/{name}',
+                lambda f=extractor, h=html: f(h, backend=backend),
+            ))
+    return cases
+
+
+def time_call(func: Callable[[], object], rounds: int, min_time: float = 0.2) -> float:
+    """Return the best seconds per call, calibrating loops like ``timeit``."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / rounds or loops >= 1 << 20:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def peak_memory(func: Callable[[], object]) -> int:
+    """Return the peak bytes traced while making one call."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(backend: str, only: str, rounds: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, func in benchmarks(backend):
+        if only and only not in name:
+            continue
+        func()  # warm up caches and lazy imports
+        seconds = time_call(func, rounds)
+        peak = peak_memory(func)
+        results[name] = {'seconds': seconds, 'peak_bytes': peak}
+        print(f'{name:<42} {seconds * 1000:>10.3f} ms {peak / 2**20:>9.2f} MiB', flush=True)
+    return results
+
+
+def baseline_path(name: str) -> str:
+    return name if name.endswith('.json') else os.path.join(BASELINE_DIR, f'{name}.json')
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> bool:
+    """Print the change from a baseline; return False if anything regressed."""
+    ok = True
+    print(f"\n{'benchmark':<42} {'base ms':>10} {'now ms':>10} {'time':>7} {'memory':>7}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f'{name:<42} {"-":>10} {current["seconds"] * 1000:>10.3f}    new')
+            continue
+        time_ratio = current['seconds'] / base['seconds']
+        memory_ratio = current['peak_bytes'] / max(base['peak_bytes'], 1)
+        regressed = time_ratio > threshold or memory_ratio > threshold
+        ok = ok and not regressed
+        print(
+            f'{name:<42} {base["seconds"] * 1000:>10.3f} {current["seconds"] * 1000:>10.3f} '
+            f'{time_ratio:>6.2f}x {memory_ratio:>6.2f}x{"  REGRESSED" if regressed else ""}'
+        )
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backend', default=None, help='HTML backend, see backends.resolve_backend')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--rounds', type=int, default=5, help='timing rounds per benchmark')
+    parser.add_argument('--save', metavar='NAME', help='write results to baselines/NAME.json')
+    parser.add_argument('--compare', metavar='NAME', help='compare with baselines/NAME.json')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown or memory growth ratio that counts as a regression')
+    args = parser.parse_args(argv)
+
+    backend = resolve_backend(args.backend)
+    print(f'backend: {backend}, python {platform.python_version()}\n')
+    results = run(backend, args.filter, args.rounds)
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path(args.save), 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'backend': backend,
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                },
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if args.compare:
+        with open(baseline_path(args.compare), encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta']['backend'] != backend:
+            print(f"warning: baseline was recorded with the {baseline['meta']['backend']} backend")
+        if not compare(results, baseline['results'], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
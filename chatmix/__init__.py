@@ -0,0 +1,3 @@
+from .parsers.registry import parse
+
+__all__ = ['parse']
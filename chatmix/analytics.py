@@ -0,0 +1,503 @@
+"""
+Corpus statistics for dataset curation, computed in vectorized chunks.
+
+Message lengths, token estimates, role balance, code-block density and
+turn counts are computed with Arrow and NumPy kernels over chunks of
+messages, and folded into streaming summaries. Memory is bounded by the
+chunk size, so corpora larger than RAM can be analyzed straight from an
+export:
+
+    from chatmix.analytics import analyze_conversations, analyze_export
+
+    stats = analyze_export('dataset/')            # or conversations.jsonl
+    stats.message_tokens.quantiles((0.5, 0.99))
+    stats.turns.histogram()
+
+Requires numpy and pyarrow.
+"""
+
+import glob
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .export import CODE_FENCE, PRE_TAG
+from .parsers.models import Conversation, Role
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - exercised without the analytics dependencies
+    np = pa = pc = None
+
+
+# A rough English average; see ``CorpusAnalyzer`` to change it
+CHARS_PER_TOKEN = 4.0
+
+# Values below 2 ** LINEAR_BITS get a histogram bucket each
+LINEAR_BITS = 6
+LINEAR_LIMIT = 1 << LINEAR_BITS
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _require() -> None:
+    if np is None:
+        raise ImportError('Corpus analytics requires numpy and pyarrow: pip install numpy pyarrow')
+
+
+class Distribution:
+    """
+    A streaming summary of non-negative integers.
+
+    The count, sum, mean, standard deviation, minimum and maximum are
+    exact. Quantiles and histograms come from log-scaled buckets: values
+    below 64 get a bucket each, so small counts like turns are exact, and
+    larger values share buckets 1/``precision`` of an octave wide, so with
+    the default precision a quantile is within about 2% of the true value.
+    Summaries of separate chunks or processes combine with ``merge``.
+
+    Args:
+        precision: Buckets per doubling above the exact range.
+    """
+
+    def __init__(self, precision: int = 32):
+        _require()
+        self.precision = precision
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+        self._sum_squares = 0.0
+        self._counts = np.zeros(LINEAR_LIMIT, dtype=np.int64)
+
+    def _bucket(self, values: 'np.ndarray') -> 'np.ndarray':
+        buckets = values.copy()
+        large = values >= LINEAR_LIMIT
+        if large.any():
+            octaves = np.log2(values[large].astype(np.float64)) - LINEAR_BITS
+            buckets[large] = LINEAR_LIMIT + np.floor(octaves * self.precision).astype(np.int64)
+        return buckets
+
+    def _lower_edges(self, buckets: 'np.ndarray') -> 'np.ndarray':
+        buckets = np.asarray(buckets, dtype=np.float64)
+        octaves = (buckets - LINEAR_LIMIT) / self.precision + LINEAR_BITS
+        return np.where(buckets < LINEAR_LIMIT, buckets, np.ceil(np.exp2(octaves)))
+
+    def update(self, values: Any) -> None:
+        """Add an array of values."""
+        values = np.asarray(values, dtype=np.int64)
+        if not values.size:
+            return
+        if values.min() < 0:
+            raise ValueError('Distribution values must not be negative')
+        counts = np.bincount(self._bucket(values))
+        if len(counts) > len(self._counts):
+            counts[:len(self._counts)] += self._counts
+            self._counts = counts
+        else:
+            self._counts[:len(counts)] += counts
+        self.count += int(values.size)
+        self.total += int(values.sum())
+        self._sum_squares += float(np.dot(values, values.astype(np.float64)))
+        low, high = int(values.min()), int(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def merge(self, other: 'Distribution') -> None:
+        """Fold in another summary with the same precision."""
+        if other.precision != self.precision:
+            raise ValueError('Only distributions with the same precision can be merged')
+        if not other.count:
+            return
+        size = max(len(self._counts), len(other._counts))
+        counts = np.zeros(size, dtype=np.int64)
+        counts[:len(self._counts)] += self._counts
+        counts[:len(other._counts)] += other._counts
+        self._counts = counts
+        self.count += other.count
+        self.total += other.total
+        self._sum_squares += other._sum_squares
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        if not self.count:
+            return math.nan
+        variance = self._sum_squares / self.count - self.mean ** 2
+        return math.sqrt(max(variance, 0.0))
+
+    def quantiles(self, qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[float, float]:
+        """
+        Estimate quantiles from the buckets.
+
+        Returns:
+            A mapping from each q in [0, 1] to its value; NaN when empty.
+        """
+        if not self.count:
+            return {q: math.nan for q in qs}
+        cumulative = np.cumsum(self._counts)
+        result = {}
+        for q in qs:
+            if not 0 <= q <= 1:
+                raise ValueError(f'Quantiles must be between 0 and 1, got {q}')
+            bucket = int(np.searchsorted(cumulative, q * (self.count - 1), side='right'))
+            low, high = self._lower_edges([bucket, bucket + 1])
+            # The middle of a log bucket, clamped to what was actually seen
+            value = low if bucket < LINEAR_LIMIT else math.sqrt(low * max(high - 1, low))
+            result[q] = float(min(max(value, self.min), self.max))
+        return result
+
+    def histogram(self, bins: Optional[Sequence[float]] = None) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        Return ``(counts, edges)`` like ``numpy.histogram``.
+
+        Args:
+            bins: Bin edges to count into. Defaults to the internal buckets
+                from the minimum to the maximum value; other edges are
+                filled by bucket, so they are as precise as the buckets.
+        """
+        occupied = np.flatnonzero(self._counts)
+        if bins is None:
+            if not occupied.size:
+                return np.zeros(0, dtype=np.int64), np.zeros(1)
+            buckets = np.arange(occupied[0], occupied[-1] + 2)
+            return self._counts[occupied[0]:occupied[-1] + 1].copy(), self._lower_edges(buckets)
+        counts, edges = np.histogram(self._lower_edges(occupied), bins=bins, weights=self._counts[occupied])
+        return counts.astype(np.int64), edges
+
+    def to_dict(self, qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        """Return a JSON-serializable summary."""
+        summary: Dict[str, Any] = {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean if self.count else None,
+            'std': self.std if self.count else None,
+            'min': self.min,
+            'max': self.max,
+        }
+        for q, value in self.quantiles(qs).items():
+            summary[f'p{q * 100:g}'] = value if self.count else None
+        return summary
+
+    def __repr__(self) -> str:
+        return f'Distribution(count={self.count}, mean={self.mean:.1f}, min={self.min}, max={self.max})'
+
+
+@dataclass
+class CorpusStats:
+    """Statistics over a corpus; see ``CorpusAnalyzer``."""
+    conversations: int = 0
+    messages: int = 0
+    role_messages: Dict[Role, int] = field(default_factory=dict)
+    role_tokens: Dict[Role, int] = field(default_factory=dict)
+    code_blocks: int = 0
+    messages_with_code: int = 0
+    # Messages whose code blocks could be counted, see ``count_code_blocks``
+    code_messages: int = 0
+    # Per message
+    message_chars: Distribution = field(default_factory=Distribution)
+    message_tokens: Distribution = field(default_factory=Distribution)
+    # Per conversation
+    turns: Distribution = field(default_factory=Distribution)
+    conversation_tokens: Distribution = field(default_factory=Distribution)
+
+    @property
+    def role_balance(self) -> Dict[Role, float]:
+        """Each role's share of the messages."""
+        return {role: count / self.messages for role, count in self.role_messages.items()} if self.messages else {}
+
+    @property
+    def code_density(self) -> float:
+        """
+        The share of messages with at least one code block, among those
+        whose code blocks could be counted; NaN when none could.
+        """
+        return self.messages_with_code / self.code_messages if self.code_messages else math.nan
+
+    def merge(self, other: 'CorpusStats') -> None:
+        """Fold in statistics over another part of the corpus."""
+        self.conversations += other.conversations
+        self.messages += other.messages
+        for mine, theirs in ((self.role_messages, other.role_messages), (self.role_tokens, other.role_tokens)):
+            for role, count in theirs.items():
+                mine[role] = mine.get(role, 0) + count
+        self.code_blocks += other.code_blocks
+        self.messages_with_code += other.messages_with_code
+        self.code_messages += other.code_messages
+        for name in ('message_chars', 'message_tokens', 'turns', 'conversation_tokens'):
+            getattr(self, name).merge(getattr(other, name))
+
+    def to_dict(self, qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        """Return a JSON-serializable summary."""
+        return {
+            'conversations': self.conversations,
+            'messages': self.messages,
+            'role_messages': {role.value: count for role, count in self.role_messages.items()},
+            'role_tokens': {role.value: count for role, count in self.role_tokens.items()},
+            'role_balance': {role.value: share for role, share in self.role_balance.items()},
+            'code_blocks': self.code_blocks,
+            'messages_with_code': self.messages_with_code,
+            'code_messages': self.code_messages,
+            'code_density': self.code_density if self.code_messages else None,
+            'message_chars': self.message_chars.to_dict(qs),
+            'message_tokens': self.message_tokens.to_dict(qs),
+            'turns': self.turns.to_dict(qs),
+            'conversation_tokens': self.conversation_tokens.to_dict(qs),
+        }
+
+
+class CorpusAnalyzer:
+    """
+    Accumulate CorpusStats over chunks of messages.
+
+    Each chunk is a set of columns with one row per message, as in
+    ``chatmix.export``. A conversation's rows must be contiguous, as the
+    exporters write them, but may span chunks; its turn count is its
+    number of rows.
+
+    Tokens are estimated as ``ceil(characters / chars_per_token)``. Code
+    blocks are taken from a ``code_blocks`` column, as exported, or
+    counted as ``chatmix.export.count_code_blocks`` does from the raw
+    HTML. Messages whose raw HTML was not kept, and chunks with neither
+    column, are left out of the code statistics; ``code_messages`` says
+    how many messages were counted.
+
+    Args:
+        chars_per_token: Characters per token for the estimate.
+        precision: Histogram buckets per doubling, see ``Distribution``.
+    """
+
+    def __init__(self, chars_per_token: float = CHARS_PER_TOKEN, precision: int = 32):
+        _require()
+        self.chars_per_token = chars_per_token
+        self.stats = CorpusStats(**{
+            name: Distribution(precision)
+            for name in ('message_chars', 'message_tokens', 'turns', 'conversation_tokens')
+        })
+        # The last conversation of the previous chunk: (key, turns, tokens)
+        self._open: Optional[Tuple[Any, int, int]] = None
+
+    def add_chunk(
+        self,
+        content: Any,
+        role: Any,
+        conversation: Any,
+        raw_html: Any = None,
+        code_blocks: Any = None,
+    ) -> None:
+        """
+        Add a chunk of messages.
+
+        Args:
+            content: Message texts, as an Arrow array or a sequence.
+            role: Role values ('user', 'assistant') per message.
+            conversation: A key per message telling conversations apart,
+                e.g. the conversation ID.
+            raw_html: Optional source markup per message, may hold nulls
+                where it was not kept.
+            code_blocks: Optional code block counts per message, may hold
+                nulls where they are unknown. Used instead of raw_html.
+        """
+        content = pc.fill_null(_array(content, pa.large_string()), '')
+        count = len(content)
+        if not count:
+            return
+        stats = self.stats
+
+        chars = pc.utf8_length(content).to_numpy(zero_copy_only=False).astype(np.int64)
+        tokens = np.ceil(chars / self.chars_per_token).astype(np.int64)
+        stats.messages += count
+        stats.message_chars.update(chars)
+        stats.message_tokens.update(tokens)
+
+        if code_blocks is not None:
+            counts = _array(code_blocks, pa.int32())
+            known = counts.is_valid().to_numpy(zero_copy_only=False)
+            blocks = pc.fill_null(counts, 0).to_numpy(zero_copy_only=False).astype(np.int64)
+        elif raw_html is not None:
+            markup = _array(raw_html, pa.large_string())
+            known = markup.is_valid().to_numpy(zero_copy_only=False)
+            # The regex kernel finds a literal much faster than count_substring
+            fences = pc.count_substring_regex(content, CODE_FENCE).to_numpy(zero_copy_only=False) // 2
+            markup = pc.fill_null(markup, '')
+            pre = pc.count_substring_regex(markup, PRE_TAG).to_numpy(zero_copy_only=False)
+            # Fences count only for messages without markup, as in count_code_blocks
+            bare = pc.equal(markup, '').to_numpy(zero_copy_only=False)
+            blocks = np.where(known, np.where(bare, fences, pre), 0)
+        else:
+            known = blocks = np.zeros(0, dtype=np.int64)
+        stats.code_messages += int(np.count_nonzero(known))
+        stats.code_blocks += int(blocks.sum())
+        stats.messages_with_code += int(np.count_nonzero(blocks))
+
+        roles = _array(role, pa.string())
+        if pa.types.is_dictionary(roles.type):
+            roles = roles.dictionary_decode()
+        encoded = roles.dictionary_encode()
+        indices = encoded.indices.to_numpy(zero_copy_only=False)
+        values = [Role(value) for value in encoded.dictionary.to_pylist()]
+        role_counts = np.bincount(indices, minlength=len(values))
+        role_tokens = np.bincount(indices, weights=tokens, minlength=len(values))
+        for index, value in enumerate(values):
+            stats.role_messages[value] = stats.role_messages.get(value, 0) + int(role_counts[index])
+            stats.role_tokens[value] = stats.role_tokens.get(value, 0) + int(role_tokens[index])
+
+        self._add_conversations(_array(conversation), tokens)
+
+    def _add_conversations(self, keys: Any, tokens: 'np.ndarray') -> None:
+        # Runs of equal keys are conversations
+        changed = pc.not_equal(keys[1:], keys[:-1]).to_numpy(zero_copy_only=False)
+        starts = np.flatnonzero(np.concatenate(([True], changed)))
+        turns = np.diff(np.append(starts, len(keys)))
+        conversation_tokens = np.add.reduceat(tokens, starts)
+
+        if self._open is not None:
+            key, open_turns, open_tokens = self._open
+            if keys[0].as_py() == key:
+                turns[0] += open_turns
+                conversation_tokens[0] += open_tokens
+            else:
+                self._close(np.array([open_turns]), np.array([open_tokens]))
+        # The last conversation may continue in the next chunk
+        self._open = (keys[-1].as_py(), int(turns[-1]), int(conversation_tokens[-1]))
+        self._close(turns[:-1], conversation_tokens[:-1])
+
+    def _close(self, turns: 'np.ndarray', tokens: 'np.ndarray') -> None:
+        self.stats.conversations += len(turns)
+        self.stats.turns.update(turns)
+        self.stats.conversation_tokens.update(tokens)
+
+    def add_batch(self, batch: Any) -> None:
+        """Add an Arrow record batch or table with the export columns."""
+        names = batch.schema.names
+        self.add_chunk(
+            batch.column(names.index('content')),
+            batch.column(names.index('role')),
+            batch.column(names.index('conversation_id')),
+            batch.column(names.index('raw_html')) if 'raw_html' in names else None,
+            batch.column(names.index('code_blocks')) if 'code_blocks' in names else None,
+        )
+
+    def finish(self) -> CorpusStats:
+        """Close the last conversation and return the statistics."""
+        if self._open is not None:
+            _, turns, tokens = self._open
+            self._close(np.array([turns]), np.array([tokens]))
+            self._open = None
+        return self.stats
+
+
+def _array(values: Any, arrow_type: Any = None) -> Any:
+    if isinstance(values, pa.ChunkedArray):
+        return values.combine_chunks()
+    if isinstance(values, pa.Array):
+        return values
+    return pa.array(values, type=arrow_type)
+
+
+def analyze_conversations(
+    conversations: Iterable[Conversation],
+    chunk_messages: int = 64 * 1024,
+    **analyzer_kwargs: Any,
+) -> CorpusStats:
+    """
+    Compute statistics over parsed conversations, consumed lazily.
+
+    Messages are gathered into columns ``chunk_messages`` at a time, which
+    bounds memory for any number of conversations. Code blocks are counted
+    from the raw HTML, so messages parsed with ``keep_raw_html=False`` are
+    left out of the code statistics. Conversations without messages are
+    not counted, as in an export.
+
+    Args:
+        conversations: The conversations to analyze.
+        chunk_messages: Messages per vectorized chunk.
+        **analyzer_kwargs: CorpusAnalyzer options.
+    """
+    analyzer = CorpusAnalyzer(**analyzer_kwargs)
+    content: List[str] = []
+    roles: List[str] = []
+    raw_html: List[Optional[str]] = []
+    # Conversation ordinals and their message counts, expanded per chunk
+    ordinals: List[int] = []
+    sizes: List[int] = []
+
+    def flush() -> None:
+        analyzer.add_chunk(
+            pa.array(content, type=pa.large_string()),
+            pa.array(roles, type=pa.string()),
+            pa.array(np.repeat(np.array(ordinals, dtype=np.int64), sizes)),
+            pa.array(raw_html, type=pa.large_string()),
+        )
+        for values in (content, roles, raw_html, ordinals, sizes):
+            values.clear()
+
+    for ordinal, conversation in enumerate(conversations):
+        messages = conversation.messages
+        if not messages:
+            continue
+        content.extend([message.content for message in messages])
+        roles.extend([message.role.value for message in messages])
+        raw_html.extend([message.raw_html for message in messages])
+        ordinals.append(ordinal)
+        sizes.append(len(messages))
+        if len(content) >= chunk_messages:
+            flush()
+    if content:
+        flush()
+    return analyzer.finish()
+
+
+def _export_batches(path: str, chunk_messages: int, block_size: int) -> Iterator[Any]:
+    columns = ['conversation_id', 'role', 'content', 'code_blocks']
+    if path.endswith(('.jsonl', '.ndjson')):
+        import pyarrow.json as pa_json
+        # Exports written before code_blocks was a column read it as null
+        schema = pa.schema([
+            ('conversation_id', pa.string()),
+            ('role', pa.string()),
+            ('content', pa.large_string()),
+            ('code_blocks', pa.int32()),
+        ])
+        reader = pa_json.open_json(
+            path,
+            read_options=pa_json.ReadOptions(block_size=block_size),
+            parse_options=pa_json.ParseOptions(explicit_schema=schema, unexpected_field_behavior='ignore'),
+        )
+        yield from reader
+        return
+
+    import pyarrow.parquet as pq
+    parts = sorted(glob.glob(os.path.join(path, '*.parquet'))) if os.path.isdir(path) else [path]
+    for part in parts:
+        parquet = pq.ParquetFile(part)
+        present = [name for name in columns if name in parquet.schema_arrow.names]
+        yield from parquet.iter_batches(batch_size=chunk_messages, columns=present)
+
+
+def analyze_export(
+    path: str,
+    chunk_messages: int = 64 * 1024,
+    block_size: int = 16 * 1024 * 1024,
+    **analyzer_kwargs: Any,
+) -> CorpusStats:
+    """
+    Compute statistics over a ``chatmix.export`` output, streaming it from disk.
+
+    Args:
+        path: A ``.jsonl`` file, a Parquet dataset directory or a Parquet file.
+        chunk_messages: Rows per Parquet batch.
+        block_size: Bytes per JSONL block; must hold the longest line.
+        **analyzer_kwargs: CorpusAnalyzer options.
+    """
+    analyzer = CorpusAnalyzer(**analyzer_kwargs)
+    for batch in _export_batches(path, chunk_messages, block_size):
+        analyzer.add_batch(batch)
+    return analyzer.finish()
@@ -0,0 +1,308 @@
+"""
+Bulk ingestion and the parse service from the command line.
+
+    python -m chatmix ingest links.txt -o conversations.jsonl
+    cat links.txt | python -m chatmix ingest - -o dataset/ --format parquet
+    python -m chatmix ingest saved_pages/ crawl.warc.gz -o conversations.jsonl
+    python -m chatmix serve --socket /tmp/chatmix.sock
+
+Ingest progress is checkpointed next to the output, so rerunning a crashed
+or interrupted command resumes where it stopped instead of starting over.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+
+CHECKPOINT_VERSION = 1
+
+
+def _iter_urls(sources: List[str]) -> Iterator[str]:
+    for source in sources:
+        stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def _is_saved(path: str) -> bool:
+    from chatmix.parsers.offline import ARCHIVE_SUFFIXES, PAGE_SUFFIXES
+    return os.path.isdir(path) or path.endswith(PAGE_SUFFIXES + ARCHIVE_SUFFIXES)
+
+
+class _Output:
+    """The output writer plus the state needed to roll it back to a checkpoint."""
+
+    def __init__(self, path: str, fmt: str, state: Optional[Dict[str, Any]]):
+        from chatmix.export import JSONLWriter, ParquetWriter
+        self.path = path
+        self.format = fmt
+        if fmt == 'jsonl':
+            if state is None:
+                self.writer = JSONLWriter(path)
+            else:
+                # Drop rows written after the last checkpoint
+                with open(path, 'ab') as f:
+                    f.truncate(state['offset'])
+                self.writer = JSONLWriter(path, append=True)
+            self.parts: List[str] = []
+        else:
+            # Drop parts that were not sealed by the last checkpoint
+            self.parts = list(state['parts']) if state else []
+            os.makedirs(path, exist_ok=True)
+            for name in os.listdir(path):
+                if name.startswith('part-') and name not in self.parts:
+                    os.remove(os.path.join(path, name))
+            self.writer = ParquetWriter(path, append=True)
+
+    def write(self, conversation: Any) -> None:
+        self.writer.write(conversation)
+
+    def commit(self) -> Dict[str, Any]:
+        """Make everything written so far durable and return its state."""
+        from chatmix.export import ParquetWriter
+        if self.format == 'jsonl':
+            return {'offset': self.writer.sync()}
+        # Parquet files are only readable once closed, so each checkpoint
+        # seals the current part and starts the next
+        self.writer.close()
+        if self.writer.rows_written:
+            self.parts.append(os.path.basename(self.writer.path))
+        else:
+            os.remove(self.writer.path)
+        self.writer = ParquetWriter(self.path, append=True)
+        return {'parts': list(self.parts)}
+
+    def close(self) -> None:
+        self.writer.close()
+        if self.format == 'parquet' and not self.writer.rows_written:
+            os.remove(self.writer.path)
+
+
+class _Stats:
+    def __init__(self, done: int = 0, ok: int = 0, errors: int = 0, messages: int = 0):
+        self.done = done
+        self.ok = ok
+        self.errors = errors
+        self.messages = messages
+        self.started = time.monotonic()
+        self.start_done = done
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = (self.done - self.start_done) / elapsed
+        error_rate = self.errors / self.done * 100 if self.done else 0.0
+        return (
+            f'{self.done} done, {self.ok} ok, {self.errors} errors ({error_rate:.1f}%), '
+            f'{self.messages} messages, {rate:.1f}/s'
+        )
+
+
+def _load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    # Write then rename, so a crash never leaves a half-written checkpoint
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _results(args: argparse.Namespace, skip: int) -> Iterator[Any]:
+    """Yield a BatchResult per input, in input order, after the first ``skip``."""
+    from chatmix.parsers.batch import HostRateLimiter, parse_many
+    from chatmix.parsers.registry import ParserRouter
+
+    parser_kwargs = {'backend': args.backend, 'keep_raw_html': not args.no_raw_html}
+    parser = None if args.parser == 'auto' else args.parser
+
+    if args.offline:
+        from chatmix.parsers.offline import parse_saved_pages
+        yield from parse_saved_pages(
+            args.inputs, parser,
+            parse_workers=args.concurrency,
+            start=skip,
+            parser_kwargs=parser_kwargs,
+        )
+        return
+
+    router = ParserRouter(**parser_kwargs)
+    if parser is not None:
+        router = router.parser(parser)
+    urls = itertools.islice(_iter_urls(args.inputs), skip, None)
+    for result in parse_many(
+        router, urls,
+        concurrency=args.concurrency or 16,
+        ordered=True,
+        retries=args.retries,
+        rate_limiter=HostRateLimiter(args.rate) if args.rate else None,
+    ):
+        result.index += skip
+        yield result
+
+
+def ingest(args: argparse.Namespace) -> int:
+    fmt = args.format or ('jsonl' if args.output.endswith(('.jsonl', '.ndjson')) else 'parquet')
+    checkpoint_path = args.checkpoint or f'{args.output.rstrip(os.sep)}.checkpoint'
+    errors_path = args.errors or f'{args.output.rstrip(os.sep)}.errors.jsonl'
+    inputs = [os.path.abspath(p) if p != '-' else p for p in args.inputs]
+
+    checkpoint = None if args.restart else _load_checkpoint(checkpoint_path)
+    if checkpoint is not None:
+        if checkpoint.get('inputs') != inputs or checkpoint.get('format') != fmt:
+            print(f'{checkpoint_path} belongs to a different run; pass --restart to discard it', file=sys.stderr)
+            return 2
+        if checkpoint.get('complete'):
+            print(f'Already complete: {_Stats(**checkpoint["stats"]).line()}', file=sys.stderr)
+            return 0
+        print(f"Resuming after {checkpoint['stats']['done']} inputs", file=sys.stderr)
+
+    stats = _Stats(**checkpoint['stats']) if checkpoint else _Stats()
+    output = _Output(args.output, fmt, checkpoint['output'] if checkpoint else None)
+    errors = open(errors_path, 'ab' if checkpoint else 'wb')
+    errors.truncate(checkpoint['errors_offset'] if checkpoint else 0)
+
+    def commit(complete: bool = False) -> None:
+        errors.flush()
+        os.fsync(errors.fileno())
+        _save_checkpoint(checkpoint_path, {
+            'version': CHECKPOINT_VERSION,
+            'inputs': inputs,
+            'format': fmt,
+            'stats': {'done': stats.done, 'ok': stats.ok, 'errors': stats.errors, 'messages': stats.messages},
+            'output': output.commit(),
+            'errors_offset': errors.tell(),
+            'complete': complete,
+        })
+
+    last_report = time.monotonic()
+    since_commit = 0
+    try:
+        for result in _results(args, stats.done):
+            if result.ok:
+                output.write(result.conversation)
+                stats.ok += 1
+                stats.messages += len(result.conversation.messages)
+            else:
+                stats.errors += 1
+                record = {'index': result.index, 'url': result.url, 'error': repr(result.error), 'attempts': result.attempts}
+                errors.write((json.dumps(record) + '\n').encode('utf-8'))
+            stats.done += 1
+            since_commit += 1
+            if since_commit >= args.checkpoint_every:
+                commit()
+                since_commit = 0
+            if args.progress and time.monotonic() - last_report >= args.progress:
+                print(stats.line(), file=sys.stderr, flush=True)
+                last_report = time.monotonic()
+        commit(complete=True)
+    except KeyboardInterrupt:
+        commit()
+        print(f'Interrupted; rerun the same command to resume. {stats.line()}', file=sys.stderr)
+        return 130
+    finally:
+        output.close()
+        errors.close()
+
+    print(stats.line(), file=sys.stderr)
+    return 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    import asyncio
+    from chatmix.service import serve as run_service
+
+    address = args.socket or (args.host, args.port)
+    where = args.socket or f'{args.host}:{args.port}'
+    print(f'Serving on {where}', file=sys.stderr, flush=True)
+    try:
+        asyncio.run(run_service(
+            address,
+            workers=args.workers,
+            fetch_workers=args.fetch_workers,
+            backend=args.backend,
+            keep_raw_html=not args.no_raw_html,
+        ))
+    except KeyboardInterrupt:
+        pass
+    except FileExistsError as error:
+        print(error, file=sys.stderr)
+        return 2
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='chatmix', description='Parse ChatGPT and Claude share links.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser(
+        'ingest',
+        help='fetch and parse many share links into JSONL or Parquet',
+        description='Fetch and parse share links listed in files (or - for stdin), or parse saved '
+                    'HTML pages and WARC archives, writing one row per message.',
+    )
+    ingest_parser.add_argument('inputs', nargs='+', help='files of URLs, - for stdin, or saved pages, directories and WARC archives')
+    ingest_parser.add_argument('-o', '--output', required=True, help='a .jsonl file or a Parquet dataset directory')
+    ingest_parser.add_argument('--format', choices=('jsonl', 'parquet'), help='defaults to the output extension')
+    ingest_parser.add_argument('--parser', default='auto', help='auto, or a registered parser name')
+    ingest_parser.add_argument('-j', '--concurrency', type=int, default=None,
+                               help='requests in flight at once (16), or parser processes for saved pages (one per CPU)')
+    ingest_parser.add_argument('--retries', type=int, default=2, help='retries for transient failures')
+    ingest_parser.add_argument('--rate', type=float, default=None, help='maximum requests per second per host')
+    ingest_parser.add_argument('--backend', default=None, help='HTML backend: html.parser (default), lxml, html5lib or auto')
+    ingest_parser.add_argument('--no-raw-html', action='store_true', help='do not keep message markup')
+    ingest_parser.add_argument('--checkpoint', help='checkpoint file, defaults to OUTPUT.checkpoint')
+    ingest_parser.add_argument('--checkpoint-every', type=int, default=1000, help='inputs between checkpoints')
+    ingest_parser.add_argument('--errors', help='where failed inputs are logged, defaults to OUTPUT.errors.jsonl')
+    ingest_parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint')
+    ingest_parser.add_argument('--progress', type=float, default=5.0, help='seconds between progress lines, 0 for none')
+    ingest_parser.set_defaults(func=ingest)
+
+    serve_parser = commands.add_parser(
+        'serve',
+        help='run a parse service that keeps parsers warm and coalesces requests',
+        description='Serve parse requests as JSON lines on a Unix socket or TCP port; see chatmix.client.',
+    )
+    where = serve_parser.add_mutually_exclusive_group()
+    where.add_argument('--socket', help='a Unix socket path to listen on')
+    where.add_argument('--port', type=int, default=8765, help='a TCP port to listen on')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='the TCP host to listen on')
+    serve_parser.add_argument('--workers', type=int, default=None, help='parser processes, 0 to parse on threads')
+    serve_parser.add_argument('--fetch-workers', type=int, default=16, help='concurrent fetches')
+    serve_parser.add_argument('--backend', default=None, help='HTML backend: html.parser (default), lxml, html5lib or auto')
+    serve_parser.add_argument('--no-raw-html', action='store_true', help='do not keep message markup')
+    serve_parser.set_defaults(func=serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'ingest':
+        saved = [path for path in args.inputs if _is_saved(path)]
+        if saved and len(saved) != len(args.inputs):
+            parser.error('inputs must be all URL lists or all saved pages and archives')
+        args.offline = bool(saved)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
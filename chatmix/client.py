@@ -0,0 +1,107 @@
+import itertools
+import json
+import socket
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+from .parsers.models import Conversation
+
+
+Address = Union[str, Tuple[str, int]]
+
+
+class ServiceError(Exception):
+    """An error the parse service reported for a request."""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(f'{kind}: {message}')
+        self.kind = kind
+        self.message = message
+
+
+class ServiceClient:
+    """
+    A client for a running ``chatmix serve``.
+
+    The client only imports the standard library and the data models, so
+    short-lived jobs can parse share links without importing parsers,
+    requests or bs4. One connection is opened lazily and reused; the client
+    may be shared between threads, which take turns on it.
+
+    Args:
+        address: The service's Unix socket path, or a (host, port) pair.
+        timeout: Seconds to wait for a response.
+    """
+
+    def __init__(self, address: Address, timeout: Optional[float] = 120.0):
+        self.address = address
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._file: Any = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address)
+        else:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket = sock
+        self._file = sock.makefile('rwb')
+
+    def request(self, method: str, **params: Any) -> Any:
+        """
+        Send a request and wait for its result.
+
+        Raises:
+            ServiceError: If the service could not fulfil the request.
+            ConnectionError: If the connection to the service was lost.
+        """
+        with self._lock:
+            if self._socket is None:
+                self._connect()
+            request_id = next(self._ids)
+            try:
+                self._file.write(json.dumps({'id': request_id, 'method': method, **params}).encode('utf-8') + b'\n')
+                self._file.flush()
+                line = self._file.readline()
+            except BaseException:
+                # The connection's state is unknown, so start over next time
+                self.close()
+                raise
+            if not line:
+                self.close()
+                raise ConnectionError('The parse service closed the connection')
+        response: Dict[str, Any] = json.loads(line)
+        error = response.get('error')
+        if error is not None:
+            raise ServiceError(error.get('type', 'Error'), error.get('message', ''))
+        return response['result']
+
+    def parse_from_url(self, url: str, parser: Optional[str] = None) -> Conversation:
+        """Fetch and parse a share link on the service."""
+        return Conversation.from_dict(self.request('parse', url=url, parser=parser))
+
+    def parse_from_html(self, html: str, url: Optional[str] = None, parser: Optional[str] = None) -> Conversation:
+        """Parse a page on the service."""
+        return Conversation.from_dict(self.request('parse', html=html, url=url, parser=parser))
+
+    def stats(self) -> Dict[str, int]:
+        """Return the service's counters."""
+        return self.request('stats')
+
+    def close(self) -> None:
+        if self._socket is not None:
+            try:
+                self._file.close()
+                self._socket.close()
+            finally:
+                self._socket = self._file = None
+
+    def __enter__(self) -> 'ServiceClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,330 @@
+import re
+import sqlite3
+import unicodedata
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Iterable, List, NamedTuple, Optional
+from .parsers.cache import SQLiteStore
+from .parsers.models import Conversation, Message, Role
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    id INTEGER PRIMARY KEY,
+    hash BLOB NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    simhash INTEGER,
+    -- The first stored body this one is a near-duplicate of, if any
+    cluster INTEGER
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS turns (
+    conversation INTEGER NOT NULL,
+    turn_index INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content INTEGER NOT NULL,
+    raw_html INTEGER,
+    PRIMARY KEY (conversation, turn_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS turns_content ON turns (content);
+CREATE TABLE IF NOT EXISTS simhash_bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    body INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS simhash_bands_lookup ON simhash_bands (band, value);
+CREATE TABLE IF NOT EXISTS normalized_bodies (
+    -- The hash of a content body's normalized text
+    hash BLOB NOT NULL,
+    body INTEGER NOT NULL,
+    PRIMARY KEY (hash, body)
+) WITHOUT ROWID;
+"""
+
+# SimHash fingerprints are split into this many bands for lookup. Two
+# fingerprints within MAX_DISTANCE bits agree exactly on at least one band.
+BANDS = 4
+MAX_DISTANCE = BANDS - 1
+
+_BAND_BITS = 64 // BANDS
+_WORD = re.compile(r'\w+')
+# Texts with fewer shingles than this are too short for SimHash to be meaningful
+_MIN_SHINGLES = 4
+
+
+def normalize_text(text: str) -> str:
+    """Normalize Unicode and collapse whitespace, so trivial variants hash alike."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def simhash(text: str, shingle: int = 2) -> Optional[int]:
+    """
+    Compute a 64-bit SimHash of a text's word shingles.
+
+    Returns:
+        The fingerprint, or None if the text is too short to have one.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = [' '.join(words[i:i + shingle]) for i in range(max(len(words) - shingle + 1, 0))]
+    if len(shingles) < _MIN_SHINGLES:
+        return None
+    weights = [0] * 64
+    for feature in shingles:
+        value = int.from_bytes(blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def _signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class MessageRef(NamedTuple):
+    """A stored turn: its role and the IDs of its bodies."""
+    role: Role
+    content: int
+    raw_html: Optional[int]
+    # The body this message's content is a whitespace variant or
+    # near-duplicate of, if any
+    cluster: Optional[int]
+
+
+@dataclass
+class DedupStats:
+    conversations: int
+    messages: int
+    bodies: int
+    # The size of the stored bodies, and of every reference to them
+    stored_bytes: int
+    referenced_bytes: int
+
+    @property
+    def ratio(self) -> float:
+        """How many times smaller the bodies are than the text they stand for."""
+        return self.referenced_bytes / self.stored_bytes if self.stored_bytes else 1.0
+
+
+class DedupStore(SQLiteStore):
+    """
+    A content-addressed store of conversations.
+
+    Message content and raw HTML are stored once per distinct body, keyed
+    by a hash; conversations are lists of turns referencing bodies by ID.
+    Bodies are kept exactly, so ``get`` returns what was added. With
+    ``normalize``, content that only differs from an earlier body in
+    whitespace or Unicode form is linked to it as its cluster, the way
+    near-duplicates are.
+
+    Like ``ResponseCache``, the store is a SQLite database in WAL mode that
+    several threads and processes can share.
+
+    Args:
+        path: The database file, created if missing.
+        normalize: Cluster content that is equal after normalizing
+            whitespace and Unicode.
+        near_duplicates: Also fingerprint content with SimHash and link
+            each new body to an earlier one within ``max_distance`` bits.
+        max_distance: The largest SimHash distance, in bits, counted as a
+            near-duplicate. At most ``MAX_DISTANCE``.
+    """
+    schema = _SCHEMA
+
+    def __init__(self, path: str, normalize: bool = True, near_duplicates: bool = False,
+                 max_distance: int = MAX_DISTANCE):
+        if not 0 <= max_distance <= MAX_DISTANCE:
+            raise ValueError(f'max_distance must be between 0 and {MAX_DISTANCE}')
+        self.normalize = normalize
+        self.near_duplicates = near_duplicates
+        self.max_distance = max_distance
+        super().__init__(path)
+
+    def _body_id(self, connection: sqlite3.Connection, kind: bytes, text: str,
+                 normalized: Optional[str] = None) -> int:
+        key = self._hash(kind, text)
+        row = connection.execute('SELECT id FROM bodies WHERE hash = ?', (key,)).fetchone()
+        if row is not None:
+            return row[0]
+
+        cluster = fingerprint = None
+        normalized_key = None if normalized is None else self._hash(b'normalized', normalized)
+        if normalized_key is not None:
+            row = connection.execute(
+                'SELECT b.id, b.cluster FROM normalized_bodies n JOIN bodies b ON b.id = n.body '
+                'WHERE n.hash = ? ORDER BY n.body LIMIT 1',
+                (normalized_key,)
+            ).fetchone()
+            if row is not None:
+                cluster = row[1] or row[0]
+        if cluster is None:
+            fingerprint = simhash(text) if self.near_duplicates and kind == b'content' else None
+            cluster = None if fingerprint is None else self._nearest(connection, fingerprint)
+        body_id = connection.execute(
+            'INSERT INTO bodies (hash, text, size, simhash, cluster) VALUES (?, ?, ?, ?, ?)',
+            (key, text, len(text.encode('utf-8', errors='surrogatepass')),
+             None if fingerprint is None else _signed(fingerprint), cluster)
+        ).lastrowid
+        if normalized_key is not None:
+            connection.execute(
+                'INSERT INTO normalized_bodies (hash, body) VALUES (?, ?)', (normalized_key, body_id)
+            )
+        if fingerprint is not None:
+            mask = (1 << _BAND_BITS) - 1
+            connection.executemany(
+                'INSERT INTO simhash_bands (band, value, body) VALUES (?, ?, ?)',
+                [(band, fingerprint >> (band * _BAND_BITS) & mask, body_id) for band in range(BANDS)]
+            )
+        return body_id
+
+    @staticmethod
+    def _hash(kind: bytes, text: str) -> bytes:
+        digest = blake2b(kind, digest_size=16)
+        digest.update(text.encode('utf-8', errors='surrogatepass'))
+        return digest.digest()
+
+    def _nearest(self, connection: sqlite3.Connection, fingerprint: int) -> Optional[int]:
+        mask = (1 << _BAND_BITS) - 1
+        best = None
+        for band in range(BANDS):
+            rows = connection.execute(
+                'SELECT b.id, b.simhash, b.cluster FROM simhash_bands s JOIN bodies b ON b.id = s.body '
+                'WHERE s.band = ? AND s.value = ?',
+                (band, fingerprint >> (band * _BAND_BITS) & mask)
+            )
+            for body_id, other, cluster in rows:
+                distance = bin((other & (1 << 64) - 1) ^ fingerprint).count('1')
+                if distance <= self.max_distance:
+                    candidate = (distance, cluster or body_id)
+                    if best is None or candidate < best:
+                        best = candidate
+        return None if best is None else best[1]
+
+    def _add(self, connection: sqlite3.Connection, conversation: Conversation) -> int:
+        row = connection.execute('SELECT id FROM conversations WHERE url = ?', (conversation.url,)).fetchone()
+        if row is None:
+            conversation_id = connection.execute(
+                'INSERT INTO conversations (url, title) VALUES (?, ?)', (conversation.url, conversation.title)
+            ).lastrowid
+        else:
+            conversation_id = row[0]
+            connection.execute('UPDATE conversations SET title = ? WHERE id = ?', (conversation.title, conversation_id))
+            connection.execute('DELETE FROM turns WHERE conversation = ?', (conversation_id,))
+
+        turns = []
+        for index, message in enumerate(conversation.messages):
+            normalized = normalize_text(message.content) if self.normalize else None
+            content = self._body_id(connection, b'content', message.content, normalized)
+            raw_html = None
+            if message.raw_html is not None:
+                raw_html = self._body_id(connection, b'raw_html', message.raw_html)
+            turns.append((conversation_id, index, message.role.value, content, raw_html))
+        connection.executemany(
+            'INSERT INTO turns (conversation, turn_index, role, content, raw_html) VALUES (?, ?, ?, ?, ?)', turns
+        )
+        return conversation_id
+
+    def add(self, conversation: Conversation) -> int:
+        """
+        Store a conversation, replacing any stored under the same URL.
+
+        Returns:
+            The conversation's ID in the store.
+        """
+        return self.add_many([conversation])[0]
+
+    def add_many(self, conversations: Iterable[Conversation]) -> List[int]:
+        """Store many conversations in one transaction and return their IDs."""
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            ids = [self._add(connection, conversation) for conversation in conversations]
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return ids
+
+    def references(self, url: str) -> Optional[List[MessageRef]]:
+        """Return a stored conversation's turns as body references, or None if it is missing."""
+        connection = self._connect()
+        if connection.execute('SELECT 1 FROM conversations WHERE url = ?', (url,)).fetchone() is None:
+            return None
+        rows = connection.execute(
+            'SELECT t.role, t.content, t.raw_html, b.cluster FROM turns t '
+            'JOIN conversations c ON c.id = t.conversation JOIN bodies b ON b.id = t.content '
+            'WHERE c.url = ? ORDER BY t.turn_index', (url,)
+        )
+        return [MessageRef(Role(role), content, raw_html, cluster) for role, content, raw_html, cluster in rows]
+
+    def body(self, body_id: int) -> str:
+        """Return a stored body by ID."""
+        row = self._connect().execute('SELECT text FROM bodies WHERE id = ?', (body_id,)).fetchone()
+        if row is None:
+            raise KeyError(body_id)
+        return row[0]
+
+    def get(self, url: str) -> Optional[Conversation]:
+        """Rebuild a stored conversation, or return None if it is missing."""
+        connection = self._connect()
+        row = connection.execute('SELECT id, title FROM conversations WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        conversation_id, title = row
+        rows = connection.execute(
+            'SELECT t.role, c.text, h.text FROM turns t JOIN bodies c ON c.id = t.content '
+            'LEFT JOIN bodies h ON h.id = t.raw_html WHERE t.conversation = ? ORDER BY t.turn_index',
+            (conversation_id,)
+        )
+        messages = [Message(role=Role(role), content=content, raw_html=raw_html) for role, content, raw_html in rows]
+        return Conversation(messages=messages, url=url, title=title)
+
+    def urls(self) -> List[str]:
+        """Return the URLs of every stored conversation."""
+        return [url for url, in self._connect().execute('SELECT url FROM conversations ORDER BY id')]
+
+    def stats(self) -> DedupStats:
+        """Count what is stored and how much deduplication saved."""
+        connection = self._connect()
+        conversations = connection.execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
+        bodies, stored = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM bodies').fetchone()
+        messages, referenced = connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(c.size + COALESCE(h.size, 0)), 0) FROM turns t '
+            'JOIN bodies c ON c.id = t.content LEFT JOIN bodies h ON h.id = t.raw_html'
+        ).fetchone()
+        return DedupStats(conversations, messages, bodies, stored, referenced)
+
+    def vacuum(self) -> int:
+        """
+        Drop bodies no turn references any more, e.g. after conversations
+        were replaced.
+
+        Returns:
+            The number of bodies removed.
+        """
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            removed = connection.execute(
+                'DELETE FROM bodies WHERE id NOT IN (SELECT content FROM turns) '
+                'AND id NOT IN (SELECT raw_html FROM turns WHERE raw_html IS NOT NULL)'
+            ).rowcount
+            connection.execute('DELETE FROM simhash_bands WHERE body NOT IN (SELECT id FROM bodies)')
+            connection.execute('DELETE FROM normalized_bodies WHERE body NOT IN (SELECT id FROM bodies)')
+            # A cluster whose first body was removed is led by its earliest survivor
+            heads = connection.execute(
+                'SELECT cluster, MIN(id) FROM bodies WHERE cluster NOT IN (SELECT id FROM bodies) GROUP BY cluster'
+            ).fetchall()
+            connection.executemany(
+                'UPDATE bodies SET cluster = NULLIF(?, id) WHERE cluster = ?', [(head, old) for old, head in heads]
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return removed
@@ -0,0 +1,260 @@
+import glob
+import json
+import os
+import re
+from hashlib import blake2b
+from typing import IO, Any, Dict, Iterable, List, Optional, Union
+from urllib.parse import urlsplit
+from .parsers.models import Conversation, Message
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+# One row per message; the column order of both output formats.
+COLUMNS = ('conversation_id', 'turn_index', 'role', 'content', 'code_blocks')
+
+# Fenced code in Markdown content, and code blocks in raw HTML
+CODE_FENCE = '```'
+PRE_TAG = r'<pre[\s>]'
+_PRE_TAG = re.compile(PRE_TAG)
+
+
+def conversation_id(conversation: Conversation) -> str:
+    """
+    Derive a stable ID for a conversation from its share URL.
+
+    Share links end in the conversation's UUID, which is used as is. Other
+    URLs fall back to a hash of the URL.
+    """
+    segment = urlsplit(conversation.url).path.rstrip('/').rsplit('/', 1)[-1]
+    if len(segment) >= 16 and all(c.isalnum() or c == '-' for c in segment):
+        return segment
+    return blake2b(conversation.url.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def count_code_blocks(message: Message) -> Optional[int]:
+    """
+    Count a message's code blocks, so they survive export.
+
+    Parsed content is plain text, so code blocks are counted as <pre>
+    elements in the raw HTML. Messages without markup (``raw_html`` is
+    empty, e.g. from embedded JSON) carry their source text, whose fenced
+    blocks are counted instead.
+
+    Returns:
+        The count, or None if the raw HTML was not kept and the content's
+        code blocks cannot be told apart from the rest of the text.
+    """
+    if message.raw_html is None:
+        return None
+    if message.raw_html == '':
+        return message.content.count(CODE_FENCE) // 2
+    return len(_PRE_TAG.findall(message.raw_html))
+
+
+def conversation_rows(conversation: Conversation) -> List[Dict[str, Any]]:
+    """Flatten a conversation into one row per message."""
+    cid = conversation_id(conversation)
+    return [
+        {
+            'conversation_id': cid,
+            'turn_index': index,
+            'role': message.role.value,
+            'content': message.content,
+            'code_blocks': count_code_blocks(message),
+        }
+        for index, message in enumerate(conversation.messages)
+    ]
+
+
+class JSONLWriter:
+    """
+    Write conversations as JSON Lines, one message per line.
+
+    Args:
+        path: The output file, or an open text file.
+        append: Add to an existing file instead of replacing it.
+    """
+
+    def __init__(self, path: Union[str, IO[str]], append: bool = False):
+        if isinstance(path, str):
+            self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+            self._owns_file = True
+        else:
+            self._file = path
+            self._owns_file = False
+        self.rows_written = 0
+
+    def write(self, conversation: Conversation) -> None:
+        """Write every message of a conversation."""
+        lines = []
+        for row in conversation_rows(conversation):
+            if orjson is not None:
+                lines.append(orjson.dumps(row).decode('utf-8'))
+            else:
+                lines.append(json.dumps(row, ensure_ascii=False))
+        if lines:
+            self._file.write('\n'.join(lines) + '\n')
+            self.rows_written += len(lines)
+
+    def write_many(self, conversations: Iterable[Conversation]) -> None:
+        for conversation in conversations:
+            self.write(conversation)
+
+    def sync(self) -> int:
+        """Flush everything written to disk and return the file offset."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self) -> 'JSONLWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError('Parquet export requires pyarrow: pip install pyarrow') from exc
+    return pyarrow
+
+
+class ParquetWriter:
+    """
+    Write conversations to a Parquet dataset directory.
+
+    Rows are buffered column by column and flushed as a row group every
+    ``row_group_size`` rows. Parquet files cannot be extended in place, so
+    each writer creates a new ``part-NNNNN.parquet`` file; with
+    ``append=True`` existing parts are kept and the new one is added after
+    them, otherwise they are removed first. Requires pyarrow.
+
+    Args:
+        path: The dataset directory, created if missing.
+        append: Keep existing part files in the directory.
+        row_group_size: The number of rows per row group.
+        compression: The Parquet compression codec.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        append: bool = False,
+        row_group_size: int = 64 * 1024,
+        compression: str = 'zstd',
+    ):
+        pa = _require_pyarrow()
+        os.makedirs(path, exist_ok=True)
+        parts = sorted(glob.glob(os.path.join(path, 'part-*.parquet')))
+        if not append:
+            for part in parts:
+                os.remove(part)
+            parts = []
+        number = int(os.path.basename(parts[-1])[5:-8]) + 1 if parts else 0
+
+        self.path = os.path.join(path, f'part-{number:05d}.parquet')
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([
+            ('conversation_id', pa.string()),
+            ('turn_index', pa.int32()),
+            ('role', pa.dictionary(pa.int8(), pa.string())),
+            ('content', pa.large_string()),
+            ('code_blocks', pa.int32()),
+        ])
+        self._pa = pa
+        self._writer = pa.parquet.ParquetWriter(self.path, self.schema, compression=compression)
+        self._columns: Dict[str, list] = {name: [] for name in COLUMNS}
+        self.rows_written = 0
+
+    def write(self, conversation: Conversation) -> None:
+        """Buffer every message of a conversation, flushing full row groups."""
+        cid = conversation_id(conversation)
+        columns = self._columns
+        for index, message in enumerate(conversation.messages):
+            columns['conversation_id'].append(cid)
+            columns['turn_index'].append(index)
+            columns['role'].append(message.role.value)
+            columns['content'].append(message.content)
+            columns['code_blocks'].append(count_code_blocks(message))
+        if len(columns['turn_index']) >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, conversations: Iterable[Conversation]) -> None:
+        for conversation in conversations:
+            self.write(conversation)
+
+    def flush(self) -> None:
+        """Write buffered rows out as one row group."""
+        columns = self._columns
+        count = len(columns['turn_index'])
+        if not count:
+            return
+        pa = self._pa
+        batch = pa.record_batch([
+            pa.array(columns['conversation_id'], type=pa.string()),
+            pa.array(columns['turn_index'], type=pa.int32()),
+            pa.array(columns['role'], type=pa.string()).dictionary_encode().cast(self.schema.field('role').type),
+            pa.array(columns['content'], type=pa.large_string()),
+            pa.array(columns['code_blocks'], type=pa.int32()),
+        ], schema=self.schema)
+        self._writer.write_batch(batch, row_group_size=count)
+        self.rows_written += count
+        self._columns = {name: [] for name in COLUMNS}
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self) -> 'ParquetWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_writer(path: str, append: bool = False, **kwargs: Any) -> Union[JSONLWriter, ParquetWriter]:
+    """
+    Open a writer for a path, choosing the format from its extension.
+
+    ``.jsonl`` files get a JSONLWriter; anything else is treated as a
+    Parquet dataset directory.
+    """
+    if path.endswith(('.jsonl', '.ndjson')):
+        return JSONLWriter(path, append=append)
+    return ParquetWriter(path, append=append, **kwargs)
+
+
+def export_conversations(
+    conversations: Iterable[Conversation],
+    path: str,
+    append: bool = False,
+    **kwargs: Any,
+) -> int:
+    """
+    Export conversations to a JSONL file or Parquet dataset.
+
+    Args:
+        conversations: The conversations to write, consumed lazily.
+        path: A ``.jsonl`` file or a Parquet dataset directory.
+        append: Add to existing output instead of replacing it.
+        **kwargs: Extra ParquetWriter options.
+
+    Returns:
+        The number of rows written.
+    """
+    with open_writer(path, append=append, **kwargs) as writer:
+        writer.write_many(conversations)
+    return writer.rows_written
@@ -0,0 +1,4 @@
+from .inverted import Hit, InvertedIndex
+from .query import Query, parse_query, tokenize
+
+__all__ = ['Hit', 'InvertedIndex', 'Query', 'parse_query', 'tokenize']
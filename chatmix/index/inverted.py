@@ -0,0 +1,342 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+from ..export import conversation_id
+from ..parsers.models import Conversation, Role
+from .query import Query, parse_query, tokenize
+from .segment import MESSAGE_FIELDS, Postings, Segment, positions_of, write_segment
+
+
+MANIFEST = 'manifest.json'
+
+ROLE_CODES = {Role.USER: 0, Role.ASSISTANT: 1}
+_ROLES = {code: role for role, code in ROLE_CODES.items()}
+
+
+class Hit(NamedTuple):
+    """A message matching a query."""
+    conversation_id: str
+    url: str
+    turn_index: int
+    role: Role
+
+
+class _SegmentBuilder:
+    """Postings for conversations added since the last segment was written."""
+
+    def __init__(self):
+        self.conversations: List[Tuple[str, str]] = []
+        self.ids: Set[str] = set()
+        self.messages = array('I')
+        self.postings: Dict[str, Tuple[array, array, array]] = {}
+
+    @property
+    def message_count(self) -> int:
+        return len(self.messages) // MESSAGE_FIELDS
+
+    def add(self, conversation: Conversation, identifier: str) -> None:
+        ordinal = len(self.conversations)
+        self.conversations.append((identifier, conversation.url))
+        self.ids.add(identifier)
+        for turn, message in enumerate(conversation.messages):
+            message_ordinal = self.message_count
+            self.messages.extend((ordinal, turn, ROLE_CODES[message.role]))
+            found: Dict[str, List[int]] = {}
+            for position, token in enumerate(tokenize(message.content)):
+                found.setdefault(token, []).append(position)
+            for token, positions in found.items():
+                entry = self.postings.get(token)
+                if entry is None:
+                    entry = self.postings[token] = (array('I'), array('I'), array('I'))
+                entry[0].append(message_ordinal)
+                entry[1].append(len(positions))
+                entry[2].extend(positions)
+
+    def write(self, path: str) -> None:
+        terms = sorted((term.encode('utf-8'), postings) for term, postings in self.postings.items())
+        write_segment(path, self.conversations, self.messages, ((term, *postings) for term, postings in terms))
+
+
+def _contains(values: Sequence[int], value: int) -> bool:
+    index = bisect_left(values, value)
+    return index < len(values) and values[index] == value
+
+
+def _intersect(small: Sequence[int], large: Sequence[int]) -> List[int]:
+    # Probe the larger list when it dwarfs the smaller one, else use sets
+    if len(small) * 16 < len(large):
+        return [value for value in small if _contains(large, value)]
+    return sorted(set(small).intersection(large))
+
+
+def _has_phrase(postings: Dict[str, Postings], phrase: Tuple[str, ...], message: int) -> bool:
+    # Start positions the phrase could begin at, narrowed word by word
+    starts = set(positions_of(postings[phrase[0]], message))
+    for offset, word in enumerate(phrase[1:], 1):
+        starts.intersection_update([position - offset for position in positions_of(postings[word], message)])
+        if not starts:
+            return False
+    return True
+
+
+class InvertedIndex:
+    """
+    An on-disk full-text index of conversation messages.
+
+    The index is a directory of immutable, memory-mapped segments plus a
+    manifest listing them. ``add`` writes new segments, so indexing more
+    conversations never rewrites what is already there; a conversation
+    added again replaces its earlier copy. ``compact`` merges the segments
+    into one.
+
+    Messages are tokenized into lowercase words. Queries match messages
+    containing every word, and every quoted phrase as consecutive words.
+
+    One process may write to an index at a time; readers in other
+    processes see new segments after ``refresh``.
+
+    Args:
+        path: The index directory, created if missing.
+        segment_messages: The most messages ``add`` puts in one segment,
+            bounding the memory used while indexing.
+    """
+
+    def __init__(self, path: str, segment_messages: int = 100_000):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.segment_messages = segment_messages
+        self._lock = threading.Lock()
+        # Each segment with the conversation ordinals newer segments replace
+        self._snapshot: List[Tuple[Segment, Set[int]]] = []
+        self._next_segment = 0
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Pick up segments written since the index was opened, and unmap
+        segments another process compacted away. Searches still iterating
+        over those must finish first.
+        """
+        try:
+            with open(os.path.join(self.path, MANIFEST), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {'segments': [], 'next_segment': 0}
+        with self._lock:
+            opened = {os.path.basename(segment.path): segment for segment, _ in self._snapshot}
+            segments = [
+                opened.get(name) or Segment(os.path.join(self.path, name)) for name in manifest['segments']
+            ]
+            self._install(segments, manifest['next_segment'])
+            for name, segment in opened.items():
+                if name not in manifest['segments']:
+                    segment.close()
+
+    def _install(self, segments: List[Segment], next_segment: int) -> None:
+        # A conversation in a newer segment hides its copies in older ones
+        shadowed: List[Set[int]] = []
+        newer: Set[str] = set()
+        for segment in reversed(segments):
+            shadowed.append({
+                ordinal for ordinal, (identifier, _) in enumerate(segment.conversations) if identifier in newer
+            })
+            newer.update(identifier for identifier, _ in segment.conversations)
+        shadowed.reverse()
+        # Searches iterate over the old list, so swap rather than mutate
+        self._snapshot = list(zip(segments, shadowed))
+        self._next_segment = next_segment
+
+    def _write_manifest(self, names: List[str], next_segment: int) -> None:
+        path = os.path.join(self.path, MANIFEST)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'segments': names, 'next_segment': next_segment}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+    def _commit(self, segments: List[Segment]) -> None:
+        self._write_manifest([os.path.basename(segment.path) for segment in segments], self._next_segment)
+        self._install(segments, self._next_segment)
+
+    def _new_segment_path(self) -> str:
+        name = f'segment-{self._next_segment:08d}.idx'
+        self._next_segment += 1
+        return os.path.join(self.path, name)
+
+    def add(self, conversations: Iterable[Conversation]) -> int:
+        """
+        Index conversations, each replacing any earlier copy with its ID.
+
+        Conversations are identified as in ``chatmix.export``, by the share
+        link's ID.
+
+        Returns:
+            The number of messages indexed.
+        """
+        added = 0
+        with self._lock:
+            builder = _SegmentBuilder()
+            for conversation in conversations:
+                identifier = conversation_id(conversation)
+                # Copies within a segment cannot shadow each other, so a
+                # repeat starts a new segment
+                if builder.message_count >= self.segment_messages or identifier in builder.ids:
+                    self._flush(builder)
+                    builder = _SegmentBuilder()
+                builder.add(conversation, identifier)
+                added += len(conversation.messages)
+            if builder.conversations:
+                self._flush(builder)
+        return added
+
+    def _flush(self, builder: _SegmentBuilder) -> None:
+        path = self._new_segment_path()
+        builder.write(path)
+        self._commit([segment for segment, _ in self._snapshot] + [Segment(path)])
+
+    def search(self, query: Union[str, Query], role: Optional[Role] = None, limit: Optional[int] = None) -> List[Hit]:
+        """
+        Find messages matching a query.
+
+        Args:
+            query: Words and quoted phrases, e.g. 'redirect "dns record"'.
+            role: Only match messages with this role.
+            limit: Stop after this many hits.
+
+        Returns:
+            The matching messages, in the order they were indexed.
+        """
+        return list(itertools.islice(self.iter_search(query, role), limit))
+
+    def iter_search(self, query: Union[str, Query], role: Optional[Role] = None) -> Iterator[Hit]:
+        """Like ``search``, but yield hits lazily."""
+        if isinstance(query, str):
+            query = parse_query(query)
+        if query.empty:
+            return
+        role_code = None if role is None else ROLE_CODES[Role(role)]
+        for segment, shadowed in self._snapshot:
+            for message in self._search_segment(segment, shadowed, query, role_code):
+                conversation, turn, code = segment.message(message)
+                identifier, url = segment.conversations[conversation]
+                yield Hit(identifier, url, turn, _ROLES[code])
+
+    def _search_segment(self, segment: Segment, shadowed: Set[int], query: Query,
+                        role_code: Optional[int]) -> Iterator[int]:
+        postings: Dict[str, Postings] = {}
+        for word in itertools.chain(query.terms, *query.phrases):
+            if word not in postings:
+                found = segment.postings(word)
+                if found is None:
+                    return
+                postings[word] = found
+
+        rarest_first = sorted(postings.values(), key=lambda found: len(found[0]))
+        candidates: Sequence[int] = rarest_first[0][0]
+        for found in rarest_first[1:]:
+            candidates = _intersect(candidates, found[0])
+            if not candidates:
+                return
+
+        for message in candidates:
+            conversation, _, code = segment.message(message)
+            if role_code is not None and code != role_code:
+                continue
+            if conversation in shadowed:
+                continue
+            if all(_has_phrase(postings, phrase, message) for phrase in query.phrases):
+                yield message
+
+    def __len__(self) -> int:
+        """The number of messages in the index, not counting replaced copies."""
+        total = 0
+        for segment, shadowed in self._snapshot:
+            total += segment.message_count
+            if shadowed:
+                total -= sum(1 for message in range(segment.message_count) if segment.message(message)[0] in shadowed)
+        return total
+
+    def compact(self) -> None:
+        """
+        Merge every segment into one, dropping replaced conversations.
+
+        The old segments are unmapped and deleted, so searches still
+        iterating over them must finish first.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if len(snapshot) < 2:
+                return
+            segments = [segment for segment, _ in snapshot]
+
+            conversations: List[Tuple[str, str]] = []
+            messages = array('I')
+            remaps: List[array] = []
+            for segment, shadowed in snapshot:
+                conversation_map = {}
+                for ordinal, conversation in enumerate(segment.conversations):
+                    if ordinal not in shadowed:
+                        conversation_map[ordinal] = len(conversations)
+                        conversations.append(conversation)
+                # Each old message ordinal's new ordinal, or -1 if dropped
+                remap = array('q')
+                for message in range(segment.message_count):
+                    conversation, turn, code = segment.message(message)
+                    if conversation in conversation_map:
+                        remap.append(len(messages) // MESSAGE_FIELDS)
+                        messages.extend((conversation_map[conversation], turn, code))
+                    else:
+                        remap.append(-1)
+                remaps.append(remap)
+
+            path = self._new_segment_path()
+            write_segment(path, conversations, messages, self._merged_postings(segments, remaps))
+            replaced = segments
+            self._commit([Segment(path)])
+            for segment in replaced:
+                segment.close()
+
+        for segment in replaced:
+            try:
+                os.remove(segment.path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _merged_postings(segments: List[Segment], remaps: List[array]) -> Iterator[Tuple[bytes, array, array, array]]:
+        def tagged(index: int, segment: Segment) -> Iterator[Tuple[bytes, int, Postings]]:
+            for term, postings in segment.iter_postings():
+                yield term, index, postings
+
+        streams = [tagged(index, segment) for index, segment in enumerate(segments)]
+        for term, group in itertools.groupby(heapq.merge(*streams), key=lambda item: item[0]):
+            term_messages, counts, positions = array('I'), array('I'), array('I')
+            for _, index, (old_messages, offsets, old_positions) in group:
+                remap = remaps[index]
+                for i, message in enumerate(old_messages):
+                    new = remap[message]
+                    if new >= 0:
+                        term_messages.append(new)
+                        counts.append(offsets[i + 1] - offsets[i])
+                        positions.extend(old_positions[offsets[i]:offsets[i + 1]])
+            if term_messages:
+                yield term, term_messages, counts, positions
+
+    def close(self) -> None:
+        """Unmap every segment."""
+        with self._lock:
+            for segment, _ in self._snapshot:
+                segment.close()
+            self._snapshot = []
+
+    def __enter__(self) -> 'InvertedIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
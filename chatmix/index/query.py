@@ -0,0 +1,40 @@
+import re
+import unicodedata
+from typing import List, NamedTuple, Tuple
+
+
+_TOKEN = re.compile(r'\w+')
+_PHRASE_OR_WORD = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens; positions are list indexes."""
+    return _TOKEN.findall(unicodedata.normalize('NFC', text).lower())
+
+
+class Query(NamedTuple):
+    """A parsed query: every term and every phrase must match."""
+    terms: Tuple[str, ...]
+    phrases: Tuple[Tuple[str, ...], ...]
+
+    @property
+    def empty(self) -> bool:
+        return not self.terms and not self.phrases
+
+
+def parse_query(text: str) -> Query:
+    """
+    Parse a query string.
+
+    Quoted text is a phrase whose words must appear consecutively; other
+    words must each appear somewhere in the message.
+    """
+    terms: List[str] = []
+    phrases: List[Tuple[str, ...]] = []
+    for phrase, word in _PHRASE_OR_WORD.findall(text):
+        tokens = tokenize(phrase or word)
+        if len(tokens) > 1:
+            phrases.append(tuple(tokens))
+        else:
+            terms.extend(tokens)
+    return Query(tuple(dict.fromkeys(terms)), tuple(dict.fromkeys(phrases)))
@@ -0,0 +1,213 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+MAGIC = b'CMXI'
+VERSION = 1
+
+# magic, version, then counts and the (offset, length) of every section
+_HEADER = struct.Struct('<4sIIII12Q')
+_SECTIONS = ('messages', 'postings', 'term_bytes', 'term_offsets', 'posting_offsets', 'conversations')
+
+# (conversation ordinal, turn index, role code) per message
+MESSAGE_FIELDS = 3
+
+# A term's postings: the messages it occurs in, in ascending order; where
+# each message's positions start; and the positions themselves
+Postings = Tuple[Sequence[int], Sequence[int], Sequence[int]]
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _pad(f: Any) -> None:
+    # Keep every section 8-byte aligned so the reader can cast it in place
+    f.write(b'\0' * (-f.tell() % 8))
+
+
+def write_segment(
+    path: str,
+    conversations: Sequence[Tuple[str, str]],
+    messages: array,
+    terms: Iterable[Tuple[bytes, Sequence[int], Sequence[int], Sequence[int]]],
+) -> None:
+    """
+    Write an immutable index segment.
+
+    Postings are streamed to disk term by term, so only the term offsets
+    are held in memory.
+
+    Args:
+        path: The segment file; written to a temporary file, then renamed.
+        conversations: (conversation ID, URL) per conversation ordinal.
+        messages: MESSAGE_FIELDS unsigned ints per message.
+        terms: (term, messages, counts, positions) in ascending term order.
+    """
+    temporary = f'{path}.tmp'
+    sections = {}
+    term_offsets = array('Q', [0])
+    posting_offsets = array('Q', [0])
+    term_bytes = bytearray()
+    words = 0
+
+    with open(temporary, 'wb') as f:
+        f.write(b'\0' * _HEADER.size)
+        _pad(f)
+
+        start = f.tell()
+        f.write(_little_endian(messages).tobytes())
+        sections['messages'] = (start, f.tell() - start)
+        _pad(f)
+
+        start = f.tell()
+        for term, term_messages, counts, positions in terms:
+            offsets = array('I', [0])
+            for count in counts:
+                offsets.append(offsets[-1] + count)
+            block = array('I', [len(term_messages)])
+            block.extend(term_messages)
+            block.extend(offsets)
+            block.extend(positions)
+            f.write(_little_endian(block).tobytes())
+            words += len(block)
+            posting_offsets.append(words)
+            term_bytes += term
+            term_offsets.append(len(term_bytes))
+        sections['postings'] = (start, f.tell() - start)
+
+        for name, data in (
+            ('term_bytes', bytes(term_bytes)),
+            ('term_offsets', _little_endian(term_offsets).tobytes()),
+            ('posting_offsets', _little_endian(posting_offsets).tobytes()),
+            ('conversations', json.dumps(conversations).encode('utf-8')),
+        ):
+            _pad(f)
+            sections[name] = (f.tell(), len(data))
+            f.write(data)
+
+        f.seek(0)
+        f.write(_HEADER.pack(
+            MAGIC, VERSION, len(term_offsets) - 1, len(messages) // MESSAGE_FIELDS, len(conversations),
+            *(value for name in _SECTIONS for value in sections[name])
+        ))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class Segment:
+    """
+    A read-only, memory-mapped index segment.
+
+    Sections are cast in place, so opening a segment reads only its header
+    and conversation list; postings are paged in as queries touch them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        self._views = [view]
+        magic, version, self.term_count, self.message_count, _, *offsets = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} chatmix index segment')
+        self._sections = {
+            name: view[offsets[2 * i]:offsets[2 * i] + offsets[2 * i + 1]] for i, name in enumerate(_SECTIONS)
+        }
+        self._views.extend(self._sections.values())
+        self.messages = self._cast('messages', 'I')
+        self._postings = self._cast('postings', 'I')
+        self._term_bytes = self._sections['term_bytes']
+        self._term_offsets = self._cast('term_offsets', 'Q')
+        self._posting_offsets = self._cast('posting_offsets', 'Q')
+        self.conversations: List[Tuple[str, str]] = [
+            (conversation_id, url) for conversation_id, url in json.loads(bytes(self._sections['conversations']))
+        ]
+
+    def _cast(self, name: str, typecode: str) -> Sequence[int]:
+        section = self._sections[name]
+        if sys.byteorder == 'big':
+            values = array(typecode, bytes(section))
+            values.byteswap()
+            return values
+        values = section.cast(typecode)
+        self._views.append(values)
+        return values
+
+    def message(self, ordinal: int) -> Tuple[int, int, int]:
+        """Return (conversation ordinal, turn index, role code) for a message."""
+        start = ordinal * MESSAGE_FIELDS
+        return self.messages[start], self.messages[start + 1], self.messages[start + 2]
+
+    def term(self, ordinal: int) -> bytes:
+        return bytes(self._term_bytes[self._term_offsets[ordinal]:self._term_offsets[ordinal + 1]])
+
+    def _find(self, term: bytes) -> Optional[int]:
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle) < term:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.term_count and self.term(low) == term:
+            return low
+        return None
+
+    def _postings_at(self, ordinal: int) -> Postings:
+        start = self._posting_offsets[ordinal]
+        count = self._postings[start]
+        term_messages = self._postings[start + 1:start + 1 + count]
+        offsets = self._postings[start + 1 + count:start + 2 + 2 * count]
+        end = self._posting_offsets[ordinal + 1]
+        return term_messages, offsets, self._postings[start + 2 + 2 * count:end]
+
+    def postings(self, term: str) -> Optional[Postings]:
+        """
+        Return a term's postings without copying them.
+
+        Returns:
+            (messages, offsets, positions), where the positions of the term
+            in ``messages[i]`` are ``positions[offsets[i]:offsets[i + 1]]``;
+            or None if the term does not occur.
+        """
+        ordinal = self._find(term.encode('utf-8'))
+        return None if ordinal is None else self._postings_at(ordinal)
+
+    def iter_postings(self) -> Iterator[Tuple[bytes, Postings]]:
+        """Yield every term and its postings, in ascending term order."""
+        for ordinal in range(self.term_count):
+            yield self.term(ordinal), self._postings_at(ordinal)
+
+    def close(self) -> None:
+        self.messages = self._postings = self._term_bytes = self._term_offsets = self._posting_offsets = ()
+        self._sections.clear()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Postings a caller still holds keep the mapping alive until
+            # they are dropped
+            pass
+
+
+def positions_of(postings: Postings, message: int) -> Sequence[int]:
+    """Return where a term occurs in a message, or nothing if it does not."""
+    term_messages, offsets, positions = postings
+    index = bisect_left(term_messages, message)
+    if index == len(term_messages) or term_messages[index] != message:
+        return ()
+    return positions[offsets[index]:offsets[index + 1]]
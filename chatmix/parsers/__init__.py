@@ -1,5 +1,49 @@
-from .models import Message, Conversation, Role
-from .parser import ChatGPTParser
-from .claude.parser import ClaudeParser
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ['Message', 'Conversation', 'ChatGPTParser', 'ClaudeParser', 'Role']
+# Public names and the submodules they live in. Submodules, and requests and
+# bs4 with them, are only imported when one of their names is first used.
+_EXPORTS = {
+    'Message': '.models',
+    'LazyMessage': '.lazy',
+    'Conversation': '.models',
+    'Role': '.models',
+    'BatchResult': '.batch',
+    'HostRateLimiter': '.batch',
+    'ResponseCache': '.cache',
+    'MemoCache': '.memo',
+    'ParseObserver': '.observe',
+    'MetricsObserver': '.observe',
+    'ChatGPTParser': '.parser',
+    'ClaudeParser': '.claude.parser',
+    'parse': '.registry',
+    'register': '.registry',
+    'parse_saved_pages': '.offline',
+}
+
+if TYPE_CHECKING:
+    from .models import Message, Conversation, Role
+    from .lazy import LazyMessage
+    from .batch import BatchResult, HostRateLimiter
+    from .cache import ResponseCache
+    from .memo import MemoCache
+    from .observe import MetricsObserver, ParseObserver
+    from .parser import ChatGPTParser
+    from .claude.parser import ClaudeParser
+    from .registry import parse, register
+    from .offline import parse_saved_pages
+
+__all__ = ['Message', 'LazyMessage', 'Conversation', 'ChatGPTParser', 'ClaudeParser', 'Role', 'BatchResult', 'HostRateLimiter', 'ResponseCache', 'MemoCache', 'ParseObserver', 'MetricsObserver', 'parse', 'register', 'parse_saved_pages']
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,83 @@
+import os
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import List, Optional
+from bs4 import BeautifulSoup
+
+
+# Environment variable that picks the backend when none is passed explicitly.
+BACKEND_ENV_VAR = 'CHATMIX_HTML_BACKEND'
+
+# Known BeautifulSoup tree builders, mapped to the module each one needs.
+BACKENDS = {
+    'lxml': 'lxml',
+    'html5lib': 'html5lib',
+    'html.parser': None,
+}
+
+# Preference order for automatic selection, fastest first.
+AUTO_ORDER = ('lxml', 'html.parser')
+
+# The pure-Python builder that ships with the standard library. It is the
+# default, so installing lxml never changes results: the builders repair
+# malformed markup such as unclosed <p> and <li> differently.
+FALLBACK_BACKEND = 'html.parser'
+
+
+@lru_cache(maxsize=None)
+def is_available(backend: str) -> bool:
+    """Return True if the backend's parser module can be imported."""
+    if backend not in BACKENDS:
+        return False
+    module = BACKENDS[backend]
+    return module is None or find_spec(module) is not None
+
+
+def available_backends() -> List[str]:
+    """Return the names of every installed backend."""
+    return [name for name in BACKENDS if is_available(name)]
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """
+    Choose the HTML backend to parse with.
+
+    An explicit backend wins, then the ``CHATMIX_HTML_BACKEND`` environment
+    variable, then ``html.parser``. ``'auto'`` opts in to the fastest
+    installed backend, whose output may differ on malformed markup.
+
+    Args:
+        backend: The backend name, 'auto', or None.
+
+    Returns:
+        The name of an installed backend.
+
+    Raises:
+        ValueError: If the requested backend is unknown or not installed.
+    """
+    if backend is None:
+        backend = os.environ.get(BACKEND_ENV_VAR) or FALLBACK_BACKEND
+    if backend == 'auto':
+        for name in AUTO_ORDER:
+            if is_available(name):
+                return name
+        return FALLBACK_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML backend {backend!r}; expected one of {sorted(BACKENDS)}")
+    if not is_available(backend):
+        raise ValueError(f"HTML backend {backend!r} is not installed")
+    return backend
+
+
+def make_soup(html: str, backend: Optional[str] = None) -> BeautifulSoup:
+    """
+    Parse HTML with the selected backend.
+
+    Args:
+        html: The HTML content to parse.
+        backend: The backend name, 'auto', or None for the default.
+
+    Returns:
+        The parsed BeautifulSoup document.
+    """
+    return BeautifulSoup(html, resolve_backend(backend))
@@ -0,0 +1,453 @@
+import time
+import requests
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Sequence, Union
+from bs4 import BeautifulSoup, Tag
+from .models import Conversation, Message, Role
+from .lazy import LazyMessage, has_text
+from .backends import make_soup, resolve_backend
+from .batch import BatchResult, HostRateLimiter, aparse_many, parse_many
+from .pipeline import parse_pipeline
+from .streaming import Classifier, stream_messages
+from .embedded import iter_json_payloads
+from .cache import ResponseCache
+from .incremental import ConversationUpdate, update_conversation
+from .transport import Transport, default_transport
+from .memo import MemoCache, content_key, conversation_size, copy_conversation
+from .observe import (
+    CACHE_STRATEGY, EMBEDDED_STRATEGY, MEMO_STRATEGY,
+    FetchEvent, ParseEvent, ParseObserver, ParseTrace,
+)
+
+
+class BaseParser:
+    """
+    Shared fetching behaviour for the share-link parsers.
+
+    Subclasses implement ``parse_from_html``; everything that touches the
+    network lives here so that both parsers fetch pages the same way.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        memo: Optional[MemoCache] = None,
+        keep_raw_html: bool = True,
+        observer: Optional[ParseObserver] = None,
+        transport: Optional[Transport] = None,
+        lazy: bool = False,
+    ):
+        """
+        Args:
+            backend: The HTML backend to parse with ('lxml', 'html.parser',
+                'auto', ...). Defaults to $CHATMIX_HTML_BACKEND, then
+                html.parser.
+            cache: An optional persistent cache for parse_from_url.
+            memo: An optional in-process cache of parse_from_html results,
+                keyed by a hash of the HTML, URL and backend. May be shared.
+            keep_raw_html: Whether messages keep their source markup. Turning
+                it off roughly halves the memory a parsed message takes.
+            observer: An optional ParseObserver told about every fetch and
+                parse. Without one, no timing is done at all.
+            transport: The HTTP transport to fetch with, which also sets the
+                User-Agent. Defaults to one shared by every parser in the
+                process.
+            lazy: Whether messages parsed from the DOM are LazyMessages,
+                which build their content and raw HTML on first access.
+                Lazy parses bypass the memo, since their messages hold the
+                page's DOM.
+        """
+        self.backend = resolve_backend(backend)
+        self.cache = cache
+        self.memo = memo
+        self.keep_raw_html = keep_raw_html
+        self.observer = observer
+        self.transport = transport or default_transport()
+        self.session = self.transport.session
+        self.lazy = lazy
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        Fetch a share page, raising for HTTP error statuses.
+
+        Args:
+            url: The URL of the share link.
+            headers: Extra request headers.
+
+        Returns:
+            The successful HTTP response.
+        """
+        observer = self.observer
+        if observer is None:
+            response = self.session.get(url, headers=headers)
+        else:
+            response = self._observed_get(url, headers, observer)
+        response.raise_for_status()
+        return response
+
+    def _observed_get(self, url: str, headers: Optional[Dict[str, str]], observer: ParseObserver) -> requests.Response:
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers)
+        except BaseException as exc:
+            observer.on_fetch(FetchEvent(url, None, 0, started, time.perf_counter() - start, exc))
+            raise
+        observer.on_fetch(FetchEvent(
+            url, response.status_code, len(response.content), started, time.perf_counter() - start
+        ))
+        return response
+
+    def parse_from_url(self, url: str) -> Conversation:
+        """
+        Parse a conversation from a share link.
+
+        Args:
+            url: The URL of the share link.
+
+        Returns:
+            A Conversation object containing the parsed messages.
+        """
+        if self.cache is None:
+            response = self.fetch(url)
+            return self.parse_from_html(response.text, url)
+
+        # Revalidate a cached copy; a 304 means the stored parse still holds
+        # if a parser configured like this one made it
+        parser_name = self._cache_identity()
+        entry = self.cache.get(url)
+        response = self.fetch(url, headers=entry.validators() if entry else None)
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidated(url)
+            if entry.parser == parser_name:
+                if self.observer is not None:
+                    self.observer.on_parse(ParseEvent(
+                        url, CACHE_STRATEGY, len(entry.conversation.messages), 0, time.time(), 0.0
+                    ))
+                return entry.conversation
+            conversation = self.parse_from_html(entry.html, url)
+            body, encoding = entry.body, entry.encoding
+            etag, last_modified = entry.etag, entry.last_modified
+        else:
+            conversation = self.parse_from_html(response.text, url)
+            body, encoding = response.content, response.encoding
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+        self.cache.put(
+            url, parser_name, body, conversation,
+            etag=etag,
+            last_modified=last_modified,
+            encoding=encoding,
+        )
+        return conversation
+
+    def _cache_identity(self) -> str:
+        """Name the parser and the settings that change what it returns."""
+        return f'{type(self).__name__}:{self.backend}:keep_raw_html={self.keep_raw_html}'
+
+    def parse_from_html(self, html: str, url: str) -> Conversation:
+        """
+        Parse a conversation from HTML content.
+
+        With a memo, identical HTML for the same URL is only parsed once.
+        Every call returns its own copy, so callers may modify the result.
+
+        Args:
+            html: The HTML content of the share page.
+            url: The URL of the share link.
+
+        Returns:
+            A Conversation object containing the parsed messages.
+        """
+        observer = self.observer
+        if observer is None:
+            return self._parse_memoized(html, url, None)
+
+        trace = ParseTrace()
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            conversation = self._parse_memoized(html, url, trace)
+        except BaseException as exc:
+            observer.on_parse(ParseEvent(
+                url, trace.strategy, 0, len(html), started, time.perf_counter() - start,
+                trace.soup_seconds, exc
+            ))
+            raise
+        observer.on_parse(ParseEvent(
+            url, trace.strategy, len(conversation.messages), len(html), started,
+            time.perf_counter() - start, trace.soup_seconds
+        ))
+        return conversation
+
+    def update_from_url(self, previous: Conversation) -> ConversationUpdate:
+        """
+        Re-parse a conversation's share link and diff it against ``previous``.
+
+        With a cache, a page that has not changed since it was cached is
+        not parsed again at all.
+
+        Args:
+            previous: The conversation from an earlier parse of the link.
+
+        Returns:
+            A ConversationUpdate listing the added, changed and removed
+            messages. Unchanged messages are the ones from ``previous``.
+        """
+        return update_conversation(previous, self.parse_from_url(previous.url))
+
+    def update_from_html(self, previous: Conversation, html: str, url: Optional[str] = None) -> ConversationUpdate:
+        """
+        Parse a newer copy of a conversation's page and diff it against ``previous``.
+
+        Args:
+            previous: The conversation from an earlier parse.
+            html: The HTML content of the page now.
+            url: The URL of the share link, defaults to ``previous.url``.
+
+        Returns:
+            A ConversationUpdate listing the added, changed and removed
+            messages. Unchanged messages are the ones from ``previous``.
+        """
+        return update_conversation(previous, self.parse_from_html(html, url or previous.url))
+
+    def _parse_memoized(self, html: str, url: str, trace: Optional[ParseTrace]) -> Conversation:
+        if self.memo is None or self.lazy:
+            return self._parse_html(html, url, trace)
+
+        key = content_key(type(self).__name__, self.backend, str(self.keep_raw_html), url, html)
+        cached = self.memo.get(key)
+        if cached is not None:
+            if trace is not None:
+                trace.strategy = MEMO_STRATEGY
+            return copy_conversation(cached)
+        conversation = self._parse_html(html, url, trace)
+        self.memo.put(key, copy_conversation(conversation), conversation_size(conversation))
+        return conversation
+
+    def _parse_html(self, html: str, url: str, trace: Optional[ParseTrace] = None) -> Conversation:
+        """
+        Parse HTML without the memo. Implementations record the winning
+        strategy and DOM build time on ``trace`` when one is given.
+        """
+        raise NotImplementedError
+
+    def _make_soup(self, html: str, trace: Optional[ParseTrace] = None) -> BeautifulSoup:
+        """Build the DOM with this parser's backend, timing it when traced."""
+        if trace is None:
+            return make_soup(html, self.backend)
+        start = time.perf_counter()
+        soup = make_soup(html, self.backend)
+        trace.soup_seconds += time.perf_counter() - start
+        return soup
+
+    def _raw_html(self, *elements: Any) -> Optional[str]:
+        """Serialize the elements a message came from, unless raw HTML is off."""
+        if not self.keep_raw_html:
+            return None
+        return '\n'.join([str(element) for element in elements])
+
+    def _message(self, role: Role, elements: Sequence[Tag], separator: str = '\n') -> Optional[Message]:
+        """
+        Build a message from the elements it came from.
+
+        Each element's stripped strings are joined with ``separator``, and
+        the elements' texts with newlines. Lazy parsers only check that
+        there is some text and leave the rest to LazyMessage.
+
+        Returns:
+            The message, or None if its content would be empty.
+        """
+        if self.lazy:
+            if len(elements) > 1 or has_text(elements[0]):
+                return LazyMessage(role, elements, separator, self.keep_raw_html)
+            return None
+        content = '\n'.join([element.get_text(separator, strip=True) for element in elements])
+        if not content:
+            return None
+        return Message(role=role, content=content, raw_html=self._raw_html(*elements))
+
+    def conversation_from_json(self, data: Any, url: str) -> Optional[Conversation]:
+        """
+        Build a conversation from a JSON document embedded in the page.
+
+        Returns:
+            The conversation, or None if the document does not hold one.
+        """
+        return None
+
+    def parse_embedded(
+        self,
+        html: Union[str, bytes],
+        url: str,
+        trace: Optional[ParseTrace] = None,
+    ) -> Optional[Conversation]:
+        """
+        Parse the conversation from the page's embedded JSON, if it has any.
+
+        This only searches the page for script payloads and decodes them, so
+        it is much cheaper than building the DOM.
+
+        Args:
+            html: The page, as text or raw bytes.
+            url: The URL of the share link.
+            trace: Records the embedded strategy when it succeeds.
+
+        Returns:
+            The conversation, or None if no embedded payload holds messages.
+        """
+        for payload in iter_json_payloads(html):
+            conversation = self.conversation_from_json(payload, url)
+            if conversation is not None and conversation.messages:
+                if trace is not None:
+                    trace.strategy = EMBEDDED_STRATEGY
+                return conversation
+        return None
+
+    def stream_classifier(self) -> Classifier:
+        """
+        Return a fresh classifier deciding which tags open a message.
+
+        Used by the streaming methods; called once per page so that the
+        classifier may keep state while a page is read.
+        """
+        raise NotImplementedError
+
+    def iter_messages_from_url(self, url: str, chunk_size: int = 64 * 1024) -> Iterator[Message]:
+        """
+        Stream messages from a share link without building the whole DOM.
+
+        The response body is read in chunks and tokenized incrementally;
+        each message is yielded as soon as its element closes.
+
+        Args:
+            url: The URL of the share link.
+            chunk_size: How many bytes to read from the network at a time.
+
+        Returns:
+            An iterator of Message objects in document order.
+        """
+        response = self.session.get(url, stream=True)
+        try:
+            response.raise_for_status()
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            chunks = response.iter_content(chunk_size=chunk_size, decode_unicode=True)
+            yield from stream_messages(chunks, self.stream_classifier(), self.keep_raw_html)
+        finally:
+            response.close()
+
+    def iter_messages_from_html(self, html: Union[str, Iterable[str]]) -> Iterator[Message]:
+        """
+        Stream messages from HTML content, given whole or in chunks.
+
+        Args:
+            html: The HTML content, or an iterable of pieces of it.
+
+        Returns:
+            An iterator of Message objects in document order.
+        """
+        chunks = [html] if isinstance(html, str) else html
+        return stream_messages(chunks, self.stream_classifier(), self.keep_raw_html)
+
+    def parse_many(
+        self,
+        urls: Iterable[str],
+        concurrency: int = 8,
+        ordered: bool = True,
+        retries: int = 2,
+        backoff: float = 0.5,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ) -> Iterator[BatchResult]:
+        """
+        Fetch and parse many share links concurrently.
+
+        Args:
+            urls: The share links to parse.
+            concurrency: The number of requests in flight at once.
+            ordered: Yield results in input order instead of completion order.
+            retries: How many times a transient failure is retried.
+            backoff: The base delay in seconds for exponential backoff.
+            rate_limiter: An optional per-host rate limiter.
+
+        Returns:
+            An iterator of BatchResult objects, one per URL.
+        """
+        return parse_many(
+            self, urls,
+            concurrency=concurrency,
+            ordered=ordered,
+            retries=retries,
+            backoff=backoff,
+            rate_limiter=rate_limiter,
+        )
+
+    def aparse_many(
+        self,
+        urls: Iterable[str],
+        concurrency: int = 8,
+        retries: int = 2,
+        backoff: float = 0.5,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Asynchronously fetch and parse many share links.
+
+        Args:
+            urls: The share links to parse.
+            concurrency: The number of requests in flight at once.
+            retries: How many times a transient failure is retried.
+            backoff: The base delay in seconds for exponential backoff.
+            rate_limiter: An optional per-host rate limiter.
+
+        Returns:
+            An async iterator of BatchResult objects in completion order.
+        """
+        return aparse_many(
+            self, urls,
+            concurrency=concurrency,
+            retries=retries,
+            backoff=backoff,
+            rate_limiter=rate_limiter,
+        )
+
+    def parse_pipeline(
+        self,
+        urls: Iterable[str],
+        fetch_workers: int = 8,
+        parse_workers: Optional[int] = None,
+        ordered: bool = True,
+        max_pending: int = 64,
+        retries: int = 2,
+        backoff: float = 0.5,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        parser_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[BatchResult]:
+        """
+        Fetch share links on threads and parse them on a process pool.
+
+        Args:
+            urls: The share links to parse.
+            fetch_workers: The number of concurrent downloads.
+            parse_workers: The number of parser processes, defaults to the CPU count.
+            ordered: Yield results in input order instead of completion order.
+            max_pending: The maximum number of fetched pages awaiting the caller.
+            retries: How many times a transient fetch failure is retried.
+            backoff: The base delay in seconds for exponential backoff.
+            rate_limiter: An optional per-host rate limiter.
+            parser_kwargs: Keyword arguments for the worker parsers.
+
+        Returns:
+            An iterator of BatchResult objects, one per URL.
+        """
+        return parse_pipeline(
+            self, urls,
+            fetch_workers=fetch_workers,
+            parse_workers=parse_workers,
+            ordered=ordered,
+            max_pending=max_pending,
+            retries=retries,
+            backoff=backoff,
+            rate_limiter=rate_limiter,
+            parser_kwargs=parser_kwargs,
+        )
@@ -0,0 +1,312 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from .models import Conversation
+
+if TYPE_CHECKING:
+    from .base import BaseParser
+
+
+# Statuses worth retrying: rate limiting and transient upstream failures.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class BatchResult:
+    """The outcome of parsing a single URL as part of a batch."""
+    index: int
+    url: str
+    conversation: Optional[Conversation] = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests to the same host.
+
+    Each host gets at most ``rate`` requests per second; requests to
+    different hosts never wait on each other. Safe to share between threads.
+    """
+
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.interval = 1.0 / rate
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url: str) -> float:
+        """
+        Reserve the next request slot for the URL's host.
+
+        Args:
+            url: The URL about to be requested.
+
+        Returns:
+            How many seconds the caller must wait before sending the request.
+        """
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        return slot - now
+
+    def acquire(self, url: str) -> None:
+        """Block until a request to the URL's host is allowed."""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Return True if a failed fetch is worth retrying."""
+    if isinstance(exc, requests.HTTPError):
+        response = exc.response
+        return response is not None and response.status_code in RETRY_STATUSES
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def retry_delay(exc: BaseException, attempt: int, backoff: float) -> float:
+    """
+    Compute how long to wait before retrying.
+
+    Uses exponential backoff, but honours a numeric ``Retry-After`` header
+    when the server sent one.
+    """
+    delay = backoff * (2 ** attempt)
+    response = getattr(exc, 'response', None)
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+    return delay
+
+
+def call_with_retries(
+    call: Callable[[str], Any],
+    result: BatchResult,
+    retries: int,
+    backoff: float,
+    rate_limiter: Optional[HostRateLimiter],
+) -> Any:
+    """
+    Call ``call(result.url)``, retrying transient failures with backoff.
+
+    The attempt count and any final error are recorded on ``result``.
+
+    Returns:
+        The return value of ``call``, or None if every attempt failed.
+    """
+    url = result.url
+    for attempt in range(retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire(url)
+        result.attempts = attempt + 1
+        try:
+            value = call(url)
+            result.error = None
+            return value
+        except Exception as exc:
+            result.error = exc
+            if attempt == retries or not is_transient(exc):
+                return None
+            time.sleep(retry_delay(exc, attempt, backoff))
+    return None
+
+
+def _parse_one(
+    parser: 'BaseParser',
+    index: int,
+    url: str,
+    retries: int,
+    backoff: float,
+    rate_limiter: Optional[HostRateLimiter],
+) -> BatchResult:
+    result = BatchResult(index=index, url=url)
+    result.conversation = call_with_retries(parser.parse_from_url, result, retries, backoff, rate_limiter)
+    return result
+
+
+def parse_many(
+    parser: 'BaseParser',
+    urls: Iterable[str],
+    concurrency: int = 8,
+    ordered: bool = True,
+    retries: int = 2,
+    backoff: float = 0.5,
+    rate_limiter: Optional[HostRateLimiter] = None,
+) -> Iterator[BatchResult]:
+    """
+    Fetch and parse share links on a bounded thread pool.
+
+    Only a window of URLs is in flight at any time, so ``urls`` may be a
+    lazy iterator over millions of links. A failure is reported on that
+    URL's BatchResult and never aborts the rest of the batch.
+
+    Args:
+        parser: The parser used to fetch and parse each URL.
+        urls: The share links to parse.
+        concurrency: The number of requests in flight at once.
+        ordered: Yield results in input order instead of completion order.
+        retries: How many times a transient failure is retried.
+        backoff: The base delay in seconds for exponential backoff.
+        rate_limiter: An optional per-host rate limiter.
+
+    Returns:
+        An iterator of BatchResult objects, one per URL.
+
+    Raises:
+        ValueError: If concurrency is below 1, when called rather than
+            when first iterated.
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
+    return _parse_many(parser, urls, concurrency, ordered, retries, backoff, rate_limiter)
+
+
+def _parse_many(
+    parser: 'BaseParser',
+    urls: Iterable[str],
+    concurrency: int,
+    ordered: bool,
+    retries: int,
+    backoff: float,
+    rate_limiter: Optional[HostRateLimiter],
+) -> Iterator[BatchResult]:
+    parser.transport.ensure_pool_size(concurrency)
+    pending = iter(enumerate(urls))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def submit_next():
+            for index, url in pending:
+                return executor.submit(_parse_one, parser, index, url, retries, backoff, rate_limiter)
+            return None
+
+        if ordered:
+            # Keep a little more than one batch queued so a slow head of
+            # line does not leave the pool idle.
+            window = deque()
+            for _ in range(concurrency * 2):
+                future = submit_next()
+                if future is None:
+                    break
+                window.append(future)
+            while window:
+                yield window.popleft().result()
+                future = submit_next()
+                if future is not None:
+                    window.append(future)
+        else:
+            in_flight = set()
+            for _ in range(concurrency):
+                future = submit_next()
+                if future is None:
+                    break
+                in_flight.add(future)
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+                    replacement = submit_next()
+                    if replacement is not None:
+                        in_flight.add(replacement)
+
+
+def aparse_many(
+    parser: 'BaseParser',
+    urls: Iterable[str],
+    concurrency: int = 8,
+    retries: int = 2,
+    backoff: float = 0.5,
+    rate_limiter: Optional[HostRateLimiter] = None,
+) -> AsyncIterator[BatchResult]:
+    """
+    Asynchronously fetch and parse share links, yielding as they finish.
+
+    Blocking HTTP and parsing run on a private thread pool while rate
+    limiting and backoff waits happen on the event loop, so a slow host
+    never ties up a worker thread.
+
+    Args:
+        parser: The parser used to fetch and parse each URL.
+        urls: The share links to parse.
+        concurrency: The number of requests in flight at once.
+        retries: How many times a transient failure is retried.
+        backoff: The base delay in seconds for exponential backoff.
+        rate_limiter: An optional per-host rate limiter.
+
+    Returns:
+        An async iterator of BatchResult objects in completion order.
+
+    Raises:
+        ValueError: If concurrency is below 1, when called rather than
+            when first iterated.
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
+    return _aparse_many(parser, urls, concurrency, retries, backoff, rate_limiter)
+
+
+async def _aparse_many(
+    parser: 'BaseParser',
+    urls: Iterable[str],
+    concurrency: int,
+    retries: int,
+    backoff: float,
+    rate_limiter: Optional[HostRateLimiter],
+) -> AsyncIterator[BatchResult]:
+    parser.transport.ensure_pool_size(concurrency)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def run(index: int, url: str) -> BatchResult:
+        result = BatchResult(index=index, url=url)
+        for attempt in range(retries + 1):
+            if rate_limiter is not None:
+                delay = rate_limiter.reserve(url)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            result.attempts = attempt + 1
+            try:
+                result.conversation = await loop.run_in_executor(executor, parser.parse_from_url, url)
+                result.error = None
+                return result
+            except Exception as exc:
+                result.error = exc
+                if attempt == retries or not is_transient(exc):
+                    return result
+                await asyncio.sleep(retry_delay(exc, attempt, backoff))
+        return result
+
+    pending = iter(enumerate(urls))
+    in_flight = set()
+    try:
+        for index, url in pending:
+            in_flight.add(asyncio.ensure_future(run(index, url)))
+            if len(in_flight) >= concurrency:
+                break
+        while in_flight:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+                for index, url in pending:
+                    in_flight.add(asyncio.ensure_future(run(index, url)))
+                    break
+    finally:
+        for task in in_flight:
+            task.cancel()
+        executor.shutdown(wait=False)
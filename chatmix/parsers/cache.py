@@ -0,0 +1,265 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from .models import Conversation
+
+
+# Query parameters that never change which conversation a link points to:
+# exact names, and prefixes of families like utm_source.
+TRACKING_PARAMS = frozenset({'fbclid', 'gclid', 'ref', 'ref_src', 'ref_url'})
+TRACKING_PREFIXES = ('utm_',)
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    parser TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    encoding TEXT,
+    body BLOB NOT NULL,
+    conversation TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a share link so equivalent spellings share a cache key.
+
+    Lowercases the scheme and host, drops default ports, fragments, trailing
+    slashes and tracking query parameters, and sorts what is left.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    path = parts.path.rstrip('/') or '/'
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+class SQLiteStore:
+    """
+    A SQLite database in WAL mode shared by threads and processes.
+
+    Each thread and process opens its own connection on first use and
+    creates the subclass's ``schema`` if it is missing.
+
+    Args:
+        path: The database file, created if missing.
+    """
+    schema = ''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        local = self._local
+        connection = getattr(local, 'connection', None)
+        if connection is not None and local.pid == os.getpid():
+            return connection
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(self.schema)
+        local.connection = connection
+        local.pid = os.getpid()
+        return connection
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+@dataclass
+class CacheEntry:
+    """A stored response and the conversation parsed from it."""
+    key: str
+    parser: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    encoding: Optional[str]
+    body: bytes
+    conversation: Conversation
+    stored_at: float
+
+    def validators(self) -> Dict[str, str]:
+        """Return the conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    @property
+    def html(self) -> str:
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class ResponseCache(SQLiteStore):
+    """
+    A persistent cache of share-page responses and parsed conversations.
+
+    Entries live in a SQLite database in WAL mode, so several threads and
+    worker processes can share one cache file. Each thread and process
+    opens its own connection.
+
+    Args:
+        path: The database file, created if missing.
+        max_bytes: Evict least recently used entries beyond this many bytes.
+        ttl: Drop entries not revalidated for this many seconds.
+    """
+
+    schema = _SCHEMA
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        super().__init__(path)
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and stored_at + self.ttl < now
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """
+        Look up the entry for a share link.
+
+        Args:
+            url: The share link, in any equivalent spelling.
+
+        Returns:
+            The entry, or None if it is missing or expired.
+        """
+        key = normalize_url(url)
+        connection = self._connect()
+        row = connection.execute(
+            'SELECT parser, etag, last_modified, encoding, body, conversation, stored_at '
+            'FROM responses WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        parser, etag, last_modified, encoding, body, conversation, stored_at = row
+        now = time.time()
+        if self._expired(stored_at, now):
+            connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+            return None
+        connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+        return CacheEntry(
+            key=key,
+            parser=parser,
+            etag=etag,
+            last_modified=last_modified,
+            encoding=encoding,
+            body=body,
+            conversation=Conversation.from_dict(json.loads(conversation)),
+            stored_at=stored_at,
+        )
+
+    def put(
+        self,
+        url: str,
+        parser: str,
+        body: bytes,
+        conversation: Conversation,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        encoding: Optional[str] = None,
+    ) -> None:
+        """
+        Store a response and its parsed conversation, then enforce limits.
+
+        Args:
+            url: The share link.
+            parser: Identifies the parser and settings that produced the
+                conversation; ``parse_from_url`` reparses entries from
+                any other.
+            body: The raw response body.
+            conversation: The parsed conversation.
+            etag: The response's ETag header.
+            last_modified: The response's Last-Modified header.
+            encoding: The response's text encoding.
+        """
+        serialized = json.dumps(conversation.to_dict())
+        size = len(body) + len(serialized)
+        now = time.time()
+        connection = self._connect()
+        connection.execute(
+            'INSERT OR REPLACE INTO responses '
+            '(key, parser, etag, last_modified, encoding, body, conversation, size, stored_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (normalize_url(url), parser, etag, last_modified, encoding, body, serialized, size, now, now)
+        )
+        self.evict()
+
+    def revalidated(self, url: str) -> None:
+        """Record that the origin confirmed the entry is still current."""
+        now = time.time()
+        self._connect().execute(
+            'UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?',
+            (now, now, normalize_url(url))
+        )
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then least recently used ones over ``max_bytes``.
+
+        Returns:
+            The number of entries removed.
+        """
+        connection = self._connect()
+        removed = 0
+        if self.ttl is not None:
+            removed += connection.execute(
+                'DELETE FROM responses WHERE stored_at < ?', (time.time() - self.ttl,)
+            ).rowcount
+        if self.max_bytes is not None:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+                if total > self.max_bytes:
+                    rows = connection.execute('SELECT key, size FROM responses ORDER BY accessed_at')
+                    victims = []
+                    for key, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        victims.append((key,))
+                        total -= size
+                    connection.executemany('DELETE FROM responses WHERE key = ?', victims)
+                    removed += len(victims)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        return removed
+
+    def stats(self) -> Tuple[int, int]:
+        """Return the number of entries and their total size in bytes."""
+        count, size = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+        ).fetchone()
+        return count, size
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._connect().execute('DELETE FROM responses')
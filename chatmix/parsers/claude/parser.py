@@ -1,154 +1,378 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import Optional, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import re
+from html import unescape
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 from ..models import Message, Conversation, Role
+from ..base import BaseParser
+from ..streaming import Classifier
+from ..embedded import find_object
+from ..observe import ParseTrace
 
 
-class ClaudeParser:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-    
-    def parse_from_url(self, url: str) -> Conversation:
-        """
-        Parse a conversation from a Claude share link.
-        
-        Args:
-            url: The URL of the Claude share link.
-            
-        Returns:
-            A Conversation object containing the parsed messages.
-        """
-        response = self.session.get(url)
-        response.raise_for_status()
-        
-        return self.parse_from_html(response.text, url)
-    
-    def parse_from_html(self, html: str, url: str) -> Conversation:
+# Class-name markers for message containers, most specific first. A page is
+# classified with the specific markers when any element carries one, and
+# only falls back to the broad markers otherwise, separately for each role.
+SPECIFIC_MARKERS = {
+    Role.USER: ('user-message', 'human-message'),
+    Role.ASSISTANT: ('assistant-message', 'claude-message'),
+}
+BROAD_MARKERS = {
+    Role.USER: ('user', 'human'),
+    Role.ASSISTANT: ('assistant', 'claude'),
+}
+
+# Every marker, for telling whether class selectors can match a page
+MARKERS = tuple(
+    marker for tiers in (SPECIFIC_MARKERS, BROAD_MARKERS) for markers in tiers.values() for marker in markers
+)
+
+# Class attributes, double-quoted, single-quoted or bare
+_CLASS_ATTR = re.compile(r'''\sclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))''', re.IGNORECASE)
+
+# Values of the 'sender' field in embedded chat_messages JSON
+SENDER_ROLES = {
+    'human': Role.USER,
+    'user': Role.USER,
+    'assistant': Role.ASSISTANT,
+}
+
+# String types that count as text, matching what Tag.get_text() returns.
+_TEXT_TYPES = (NavigableString, CData)
+
+# Strategy names, in the order they are tried.
+STRATEGIES = ('class-selectors', 'main-paragraphs', 'main-divs', 'heuristic')
+
+
+def role_tiers(class_value: str) -> Tuple[int, int]:
+    """
+    Score a class attribute against the user and assistant markers.
+
+    Args:
+        class_value: The element's class attribute, space-separated.
+
+    Returns:
+        A (user, assistant) pair where 2 means a specific marker matched,
+        1 a broad marker and 0 none.
+    """
+    tiers = []
+    for role in (Role.USER, Role.ASSISTANT):
+        if any(marker in class_value for marker in SPECIFIC_MARKERS[role]):
+            tiers.append(2)
+        elif any(marker in class_value for marker in BROAD_MARKERS[role]):
+            tiers.append(1)
+        else:
+            tiers.append(0)
+    return tiers[0], tiers[1]
+
+
+def has_marker_class(html: str) -> bool:
+    """
+    Tell whether any class attribute in a page carries a role marker.
+
+    The page is searched with a regular expression rather than parsed, and
+    text that merely mentions a marker does not count.
+    """
+    if not any(marker in html for marker in MARKERS):
+        return False
+    for match in _CLASS_ATTR.finditer(html):
+        value = unescape(match.group(match.lastindex))
+        if any(marker in value for marker in MARKERS):
+            return True
+    return False
+
+
+def _chat_message_text(item: Dict[str, Any]) -> Optional[str]:
+    """Return a chat message's text, or None if its content is malformed."""
+    blocks = item.get('content')
+    text = item.get('text')
+    if not isinstance(blocks, (list, type(None))) or not isinstance(text, (str, type(None))):
+        return None
+    # Newer payloads split a message into typed content blocks
+    if blocks:
+        texts = [block.get('text') for block in blocks if isinstance(block, dict) and block.get('type') == 'text']
+        joined = '\n\n'.join(t for t in texts if isinstance(t, str))
+        if joined.strip():
+            return joined.strip()
+    return text.strip() if text is not None else ''
+
+
+def _class_value(tag: Tag) -> str:
+    value = tag.get('class')
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else ' '.join(value)
+
+
+def _text_lengths(soup: BeautifulSoup) -> Dict[int, int]:
+    """
+    Compute ``len(tag.get_text(strip=True))`` for every tag in one pass.
+
+    Calling get_text on each element separately re-reads every descendant
+    once per ancestor, which is quadratic in nesting depth. Here each
+    string's stripped length is added to its parent and then rolled up the
+    tree in reverse document order, so children finish before parents.
+
+    Returns:
+        A mapping from ``id(tag)`` to its stripped text length.
+    """
+    lengths: Dict[int, int] = {}
+    tags: List[Tag] = []
+    for node in soup.descendants:
+        if isinstance(node, Tag):
+            lengths[id(node)] = 0
+            tags.append(node)
+        elif type(node) in _TEXT_TYPES and node.parent is not None:
+            parent_id = id(node.parent)
+            if parent_id in lengths:
+                lengths[parent_id] += len(node.strip())
+    for tag in reversed(tags):
+        parent_id = id(tag.parent)
+        if parent_id in lengths:
+            lengths[parent_id] += lengths[id(tag)]
+    return lengths
+
+
+class ClaudeParser(BaseParser):
+    def _parse_html(self, html: str, url: str, trace: Optional[ParseTrace] = None) -> Conversation:
         """
         Parse a conversation from HTML content.
-        
+
         Args:
             html: The HTML content of the Claude share page.
             url: The URL of the Claude share link.
-            
+
         Returns:
             A Conversation object containing the parsed messages.
         """
-        soup = BeautifulSoup(html, 'html.parser')
-        
+        # Share pages that embed their data can skip the DOM entirely
+        conversation = self.parse_embedded(html, url, trace)
+        if conversation is not None:
+            return conversation
+
+        soup = self._make_soup(html, trace)
+
         # Extract title if available
         title_elem = soup.select_one('header')
         title = title_elem.text if title_elem else None
-        
-        # Extract messages
+
+        name, messages = self._extract(html, soup)
+        if messages and trace is not None:
+            trace.strategy = name
+
+        return Conversation(
+            messages=messages,
+            url=url,
+            title=title
+        )
+
+    def conversation_from_json(self, data: Any, url: str) -> Optional[Conversation]:
+        """
+        Build a conversation from an embedded ``chat_messages`` document.
+
+        Returns:
+            The conversation, or None if the payload has no chat messages
+            or they are not shaped as expected, so the DOM is parsed instead.
+        """
+        chat = find_object(data, lambda obj: isinstance(obj.get('chat_messages'), list))
+        if chat is None:
+            return None
+
         messages = []
-        
-        # Find user message elements
-        user_elements = soup.select('div[class*="user-message"], div[class*="human-message"]')
-        if not user_elements:
-            # Try alternative selectors
-            user_elements = soup.select('div[class*="user"], div[class*="human"]')
-        
-        # Find assistant message elements
-        assistant_elements = soup.select('div[class*="assistant-message"], div[class*="claude-message"]')
-        if not assistant_elements:
-            # Try alternative selectors
-            assistant_elements = soup.select('div[class*="assistant"], div[class*="claude"]')
-        
-        # If we still can't find message elements, try to extract from the main content
-        if not user_elements and not assistant_elements:
-            # Look for the main content area
-            main_content = soup.find('main')
-            if main_content and not isinstance(main_content, str):
-                # Try to find user and assistant messages based on structure
-                paragraphs = main_content.find_all('p') if hasattr(main_content, 'find_all') else []
-                divs = main_content.find_all('div') if hasattr(main_content, 'find_all') else []
-                
-                # If we have at least two paragraphs or divs, assume the first is user and second is assistant
-                if len(paragraphs) >= 2:
-                    user_content = paragraphs[0].get_text(strip=True)
-                    assistant_content = '\n'.join([p.get_text(strip=True) for p in paragraphs[1:]])
-                    
-                    if user_content:
-                        messages.append(Message(
-                            role=Role.USER,
-                            content=user_content,
-                            raw_html=str(paragraphs[0])
-                        ))
-                    
-                    if assistant_content:
-                        messages.append(Message(
-                            role=Role.ASSISTANT,
-                            content=assistant_content,
-                            raw_html='\n'.join([str(p) for p in paragraphs[1:]])
-                        ))
-                elif len(divs) >= 2:
-                    user_content = divs[0].get_text(strip=True)
-                    assistant_content = '\n'.join([d.get_text(strip=True) for d in divs[1:]])
-                    
-                    if user_content:
-                        messages.append(Message(
-                            role=Role.USER,
-                            content=user_content,
-                            raw_html=str(divs[0])
-                        ))
-                    
-                    if assistant_content:
-                        messages.append(Message(
-                            role=Role.ASSISTANT,
-                            content=assistant_content,
-                            raw_html='\n'.join([str(d) for d in divs[1:]])
-                        ))
-        
-        # If we still don't have messages, try to extract from the visible content
-        if not messages:
-            # Based on the observed structure of the Claude share page
-            user_message = None
-            assistant_message = None
-            
-            # Find the user message (typically a URL or text after an 'S' element)
-            s_element = soup.find(string=lambda text: text == 'S')
-            if s_element and s_element.parent:
-                # Look for the next element which might contain the user message
-                next_elem = s_element.parent.find_next_sibling()
-                if next_elem:
-                    user_message = next_elem.get_text(strip=True)
-            
-            # If we couldn't find the user message, look for a question-like text
-            if not user_message:
-                # Look for short paragraphs that might be questions
-                for p in soup.find_all('p'):
+        for item in chat['chat_messages']:
+            if not isinstance(item, dict):
+                continue
+            sender = item.get('sender')
+            if not isinstance(sender, (str, type(None))):
+                return None
+            role = SENDER_ROLES.get(sender)
+            content = _chat_message_text(item)
+            if content is None:
+                return None
+            if role is not None and content:
+                messages.append(Message(
+                    role=role,
+                    content=content,
+                    raw_html=""
+                ))
+
+        title = chat.get('name')
+        return Conversation(
+            messages=messages,
+            url=url,
+            title=title if isinstance(title, str) and title else None
+        )
+
+    def stream_classifier(self) -> Classifier:
+        """
+        Classify message divs while streaming, using the same class markers.
+
+        A stream cannot look ahead, so broad markers are honoured for a role
+        only until the first specific marker for that role appears.
+        """
+        seen_specific = {Role.USER: False, Role.ASSISTANT: False}
+
+        def classify(tag: str, attrs: Dict[str, Optional[str]]) -> Optional[Role]:
+            class_value = attrs.get('class')
+            if tag != 'div' or not class_value:
+                return None
+            user_tier, assistant_tier = role_tiers(class_value)
+            matches = {}
+            for role, tier in ((Role.USER, user_tier), (Role.ASSISTANT, assistant_tier)):
+                if tier == 2:
+                    seen_specific[role] = True
+                if tier == 2 or (tier == 1 and not seen_specific[role]):
+                    matches[role] = tier
+            if not matches:
+                return None
+            if len(matches) == 2 and assistant_tier > user_tier:
+                return Role.ASSISTANT
+            return Role.USER if Role.USER in matches else Role.ASSISTANT
+
+        return classify
+
+    def _extract(self, html: str, soup: BeautifulSoup) -> Tuple[Optional[str], List[Message]]:
+        """
+        Try each extraction strategy until one finds messages.
+
+        Class selectors cannot match a page where no class attribute
+        carries a role marker, so on such pages they are skipped without
+        walking the DOM.
+
+        Returns:
+            The winning strategy's name and its messages.
+        """
+        names = STRATEGIES if has_marker_class(html) else STRATEGIES[1:]
+        for name in names:
+            messages = self._strategy(name)(soup)
+            if messages:
+                return name, messages
+        return None, []
+
+    def _strategy(self, name: str) -> Callable[[BeautifulSoup], List[Message]]:
+        return {
+            'class-selectors': self._extract_classified,
+            'main-paragraphs': self._extract_main_paragraphs,
+            'main-divs': self._extract_main_divs,
+            'heuristic': self._extract_heuristic,
+        }[name]
+
+    def _extract_classified(self, soup: BeautifulSoup) -> List[Message]:
+        """
+        Extract messages from divs whose class marks them as user or assistant.
+
+        Every div is classified in a single document-order walk, so messages
+        come out interleaved as they appear on the page. When a container's
+        descendants also match (e.g. ``user-message`` wrapping
+        ``user-message-content``) only the outermost one becomes a message.
+        """
+        # candidates: (div, user tier, assistant tier, index of nearest candidate ancestor)
+        candidates: List[Tuple[Tag, int, int, int]] = []
+        enclosing: Dict[int, int] = {id(soup): -1}
+        best = {Role.USER: 0, Role.ASSISTANT: 0}
+        for node in soup.descendants:
+            if not isinstance(node, Tag):
+                continue
+            ancestor = enclosing.get(id(node.parent), -1)
+            enclosing[id(node)] = ancestor
+            if node.name != 'div' or 'class' not in node.attrs:
+                continue
+            user_tier, assistant_tier = role_tiers(_class_value(node))
+            if user_tier or assistant_tier:
+                enclosing[id(node)] = len(candidates)
+                candidates.append((node, user_tier, assistant_tier, ancestor))
+                best[Role.USER] = max(best[Role.USER], user_tier)
+                best[Role.ASSISTANT] = max(best[Role.ASSISTANT], assistant_tier)
+
+        messages = []
+        covered: List[bool] = []
+        for node, user_tier, assistant_tier, ancestor in candidates:
+            is_user = user_tier and user_tier == best[Role.USER]
+            is_assistant = assistant_tier and assistant_tier == best[Role.ASSISTANT]
+            inside_message = ancestor >= 0 and covered[ancestor]
+            covered.append(inside_message or bool(is_user or is_assistant))
+            if inside_message or not (is_user or is_assistant):
+                continue
+            if is_user and is_assistant:
+                role = Role.ASSISTANT if assistant_tier > user_tier else Role.USER
+            else:
+                role = Role.USER if is_user else Role.ASSISTANT
+            message = self._message(role, (node,))
+            if message is not None:
+                messages.append(message)
+        return messages
+
+    def _extract_main_paragraphs(self, soup: BeautifulSoup) -> List[Message]:
+        """Treat the first <p> in <main> as the user and the rest as the assistant."""
+        main_content = soup.find('main')
+        if not isinstance(main_content, Tag):
+            return []
+        return self._split_first(main_content.find_all('p'))
+
+    def _extract_main_divs(self, soup: BeautifulSoup) -> List[Message]:
+        """Treat the first <div> in <main> as the user and the rest as the assistant."""
+        main_content = soup.find('main')
+        if not isinstance(main_content, Tag) or len(main_content.find_all('p', limit=2)) >= 2:
+            # Paragraph structure takes precedence, see _extract_main_paragraphs
+            return []
+        return self._split_first(main_content.find_all('div'))
+
+    def _split_first(self, elements: List[Tag]) -> List[Message]:
+        # If we have at least two elements, assume the first is user and the rest assistant
+        if len(elements) < 2:
+            return []
+        messages = []
+        for role, group in ((Role.USER, elements[:1]), (Role.ASSISTANT, elements[1:])):
+            message = self._message(role, group, separator='')
+            if message is not None:
+                messages.append(message)
+        return messages
+
+    def _extract_heuristic(self, soup: BeautifulSoup) -> List[Message]:
+        """Guess one user and one assistant message from the visible content."""
+        # Based on the observed structure of the Claude share page
+        user_message = None
+        assistant_message = None
+
+        # Find the user message (typically a URL or text after an 'S' element)
+        s_element = soup.find(string=lambda text: text == 'S')
+        if s_element and s_element.parent:
+            # Look for the next element which might contain the user message
+            next_elem = s_element.parent.find_next_sibling()
+            if next_elem:
+                user_message = next_elem.get_text(strip=True)
+
+        lengths = _text_lengths(soup)
+
+        # If we couldn't find the user message, look for a question-like text
+        if not user_message:
+            # Look for short paragraphs that might be questions
+            for p in soup.find_all('p'):
+                if 0 < lengths[id(p)] < 200:
                     text = p.get_text(strip=True)
-                    if text and len(text) < 200 and text.endswith('?'):
+                    if text.endswith('?'):
                         user_message = text
                         break
-            
-            # If we still don't have a user message, use a fallback
-            if not user_message:
-                user_message = "what domain record to redirect to a different domain?"
-            
-            # Find the assistant message (typically a longer text with lists, paragraphs, etc.)
-            # Look for elements that might contain the assistant's response
-            for elem in soup.find_all(['p', 'div']):
-                text = elem.get_text(strip=True)
-                # Assistant messages are typically longer
-                if text and len(text) > 200:
-                    assistant_message = text
-                    break
-            
-            # If we couldn't find the assistant message, look for lists which are common in responses
-            if not assistant_message:
-                lists = soup.find_all(['ol', 'ul'])
-                if lists:
-                    assistant_message = '\n'.join([lst.get_text(strip=True) for lst in lists])
-            
-            # If we still don't have an assistant message, use a fallback based on the observed content
-            if not assistant_message:
-                assistant_message = """
+
+        # If we still don't have a user message, use a fallback
+        if not user_message:
+            user_message = "what domain record to redirect to a different domain?"
+
+        # Find the assistant message (typically a longer text with lists, paragraphs, etc.)
+        # Assistant messages are typically longer; only the winner's text is built
+        for elem in soup.find_all(['p', 'div']):
+            if lengths[id(elem)] > 200:
+                assistant_message = elem.get_text(strip=True)
+                break
+
+        # If we couldn't find the assistant message, look for lists which are common in responses
+        if not assistant_message:
+            lists = soup.find_all(['ol', 'ul'])
+            if lists:
+                assistant_message = '\n'.join([lst.get_text(strip=True) for lst in lists])
+
+        # If we still don't have an assistant message, use a fallback based on the observed content
+        if not assistant_message:
+            assistant_message = """
                 It looks like you're trying to set up a DNS record to redirect from one domain to another.
                 Based on the image, you're currently working with an A record configuration for what
                 appears to be a subdomain.
@@ -163,22 +387,16 @@ class ClaudeParser:
                 3. In the "Answer / Value" field, enter the full target domain you want to redirect to (without http:// or https://)
                 4. Keep your TTL as needed (600 seconds is fine)
                 """
-            
-            # Create messages
-            messages.append(Message(
+
+        return [
+            Message(
                 role=Role.USER,
                 content=user_message,
                 raw_html=""
-            ))
-            
-            messages.append(Message(
+            ),
+            Message(
                 role=Role.ASSISTANT,
                 content=assistant_message.strip(),
                 raw_html=""
-            ))
-        
-        return Conversation(
-            messages=messages,
-            url=url,
-            title=title
-        )
+            ),
+        ]
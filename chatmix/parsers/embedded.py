@@ -0,0 +1,97 @@
+import json
+from typing import Any, Callable, Iterator, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+# Markers of script tags whose body is a JSON document.
+JSON_SCRIPT_MARKERS = ('__NEXT_DATA__', 'application/json')
+
+# Inline assignments of a JSON object to a global, e.g. window.__remixContext = {...};
+JSON_ASSIGNMENTS = ('window.__remixContext = ', 'window.__NEXT_DATA__ = ')
+
+_raw_decoder = json.JSONDecoder()
+
+
+def loads(payload: Union[str, bytes]) -> Any:
+    """Decode JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _same_type(html: Union[str, bytes], marker: str) -> Union[str, bytes]:
+    # Markers are searched for in whatever type the page was given as
+    return marker.encode('ascii') if isinstance(html, bytes) else marker
+
+
+def iter_json_payloads(html: Union[str, bytes]) -> Iterator[Any]:
+    """
+    Yield JSON documents embedded in a page, without parsing the HTML.
+
+    Finds ``<script id="__NEXT_DATA__">``/``type="application/json"`` bodies
+    and ``window.__remixContext = {...}`` style assignments with plain
+    substring searches. Payloads that fail to decode are skipped.
+
+    Args:
+        html: The page, as text or raw bytes.
+
+    Returns:
+        An iterator of decoded JSON values in page order.
+    """
+    open_tag = _same_type(html, '<script')
+    close_tag = _same_type(html, '</script>')
+    tag_end = _same_type(html, '>')
+    markers = [_same_type(html, m) for m in JSON_SCRIPT_MARKERS]
+
+    position = html.find(open_tag)
+    while position != -1:
+        start = html.find(tag_end, position)
+        if start == -1:
+            return
+        end = html.find(close_tag, start)
+        if end == -1:
+            return
+        attributes = html[position:start]
+        if any(m in attributes for m in markers):
+            try:
+                yield loads(html[start + 1:end])
+            except ValueError:
+                pass
+        else:
+            yield from _iter_assignments(html[start + 1:end])
+        position = html.find(open_tag, end)
+
+
+def _iter_assignments(script: Union[str, bytes]) -> Iterator[Any]:
+    if isinstance(script, bytes):
+        script = script.decode('utf-8', errors='replace')
+    for assignment in JSON_ASSIGNMENTS:
+        index = script.find(assignment)
+        if index == -1:
+            continue
+        try:
+            value, _ = _raw_decoder.raw_decode(script, index + len(assignment))
+        except ValueError:
+            continue
+        yield value
+
+
+def find_object(data: Any, predicate: Callable[[dict], bool]) -> Optional[dict]:
+    """
+    Return the first dict in a JSON document that satisfies ``predicate``.
+
+    The document is searched breadth-first, so shallow matches win.
+    """
+    queue: List[Any] = [data]
+    for node in queue:
+        if isinstance(node, dict):
+            if predicate(node):
+                return node
+            queue.extend(value for value in node.values() if isinstance(value, (dict, list)))
+        elif isinstance(node, list):
+            queue.extend(value for value in node if isinstance(value, (dict, list)))
+    return None
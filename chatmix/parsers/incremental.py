@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field, replace
+from typing import List
+from .memo import content_key
+from .models import Conversation, Message
+
+
+def message_key(message: Message) -> bytes:
+    """Hash a message's role and content; markup is not part of the key."""
+    return content_key(message.role.value, message.content)
+
+
+@dataclass
+class ConversationUpdate:
+    """
+    How a conversation changed between two parses of its page.
+
+    Indexes in ``added`` and ``changed`` refer to ``conversation.messages``;
+    indexes in ``removed`` refer to ``previous.messages``.
+    """
+    previous: Conversation
+    conversation: Conversation
+    # The number of leading messages that are unchanged
+    prefix: int
+    added: List[int] = field(default_factory=list)
+    changed: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+
+    @property
+    def modified(self) -> bool:
+        return bool(self.added or self.changed or self.removed) or self.previous.title != self.conversation.title
+
+    @property
+    def new_messages(self) -> List[Message]:
+        """The messages appended since the previous parse."""
+        messages = self.conversation.messages
+        return [messages[index] for index in self.added]
+
+
+def update_conversation(previous: Conversation, current: Conversation) -> ConversationUpdate:
+    """
+    Diff a fresh parse against the previous one, position by position.
+
+    Messages whose role and content hash the same as before are replaced
+    by the previous Message objects, so unchanged turns keep their identity
+    and anything keyed on them stays valid.
+
+    Args:
+        previous: The conversation from the earlier parse.
+        current: The conversation parsed from the page now.
+
+    Returns:
+        The update, whose ``conversation`` is ``current`` with unchanged
+        messages taken from ``previous``.
+    """
+    old, new = previous.messages, current.messages
+    shared = min(len(old), len(new))
+
+    prefix = 0
+    while prefix < shared and (old[prefix] is new[prefix] or message_key(old[prefix]) == message_key(new[prefix])):
+        prefix += 1
+
+    messages = old[:prefix]
+    changed = []
+    for index in range(prefix, shared):
+        if message_key(old[index]) == message_key(new[index]):
+            messages.append(old[index])
+        else:
+            messages.append(new[index])
+            changed.append(index)
+    messages.extend(new[shared:])
+
+    return ConversationUpdate(
+        previous=previous,
+        conversation=replace(current, messages=messages),
+        prefix=prefix,
+        added=list(range(shared, len(new))),
+        changed=changed,
+        removed=list(range(shared, len(old))),
+    )
@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from bs4 import Tag
+from .models import Message, Role
+from .utils import _TEXT_TYPES, _code_blocks, _collect, _elements_to_markdown, _tables
+
+
+def has_text(element: Tag) -> bool:
+    """
+    Return whether ``element.get_text(strip=True)`` would be non-empty.
+
+    Stops at the first string that is not whitespace instead of building
+    the text.
+    """
+    for node in element.descendants:
+        if type(node) in _TEXT_TYPES and node.strip():
+            return True
+    return False
+
+
+class LazyMessage(Message):
+    """
+    A message that builds its text from the page's DOM when first read.
+
+    Parsers created with ``lazy=True`` return these. A lazy message only
+    holds its role and the elements it came from; ``content``,
+    ``raw_html``, ``markdown``, ``code_blocks`` and ``tables`` are each
+    computed on first access and kept, so callers that only need the
+    title or the number of messages never pay for them.
+
+    A lazy message compares and hashes like the equivalent Message, and
+    pickles as one. Until it is dropped or replaced with ``materialize()``
+    it keeps the whole DOM of its page alive.
+    """
+    __slots__ = (
+        '_elements', '_separator', '_keep_raw_html',
+        '_content', '_raw_html', '_markdown', '_extracted',
+    )
+
+    def __init__(self, role: Role, elements: Sequence[Tag], separator: str = '\n', keep_raw_html: bool = True):
+        """
+        Args:
+            role: The message's role.
+            elements: The elements the message came from, in document order.
+            separator: Joins the strings within each element's text; the
+                elements' texts are joined with newlines.
+            keep_raw_html: Whether ``raw_html`` serializes the elements or
+                is None.
+        """
+        # Message is frozen; these are set once, before anyone sees the message
+        object.__setattr__(self, 'role', role)
+        object.__setattr__(self, '_elements', tuple(elements))
+        object.__setattr__(self, '_separator', separator)
+        object.__setattr__(self, '_keep_raw_html', keep_raw_html)
+        for name in ('_content', '_raw_html', '_markdown', '_extracted'):
+            object.__setattr__(self, name, None)
+
+    @property
+    def content(self) -> str:
+        content = self._content
+        if content is None:
+            content = '\n'.join([element.get_text(self._separator, strip=True) for element in self._elements])
+            object.__setattr__(self, '_content', content)
+        return content
+
+    @property
+    def raw_html(self) -> Optional[str]:
+        if not self._keep_raw_html:
+            return None
+        raw_html = self._raw_html
+        if raw_html is None:
+            raw_html = '\n'.join([str(element) for element in self._elements])
+            object.__setattr__(self, '_raw_html', raw_html)
+        return raw_html
+
+    @property
+    def markdown(self) -> str:
+        """The message as Markdown, rendered from the DOM rather than ``raw_html``."""
+        markdown = self._markdown
+        if markdown is None:
+            markdown = _elements_to_markdown(self._elements)
+            object.__setattr__(self, '_markdown', markdown)
+        return markdown
+
+    def _extract(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        extracted = self._extracted
+        if extracted is None:
+            buckets = _collect(*self._elements)
+            extracted = (_code_blocks(buckets), _tables(buckets))
+            object.__setattr__(self, '_extracted', extracted)
+        return extracted
+
+    @property
+    def code_blocks(self) -> List[Dict[str, Any]]:
+        """Code blocks as ``utils.extract_code_blocks`` returns them; shared between calls."""
+        return self._extract()[0]
+
+    @property
+    def tables(self) -> List[Dict[str, Any]]:
+        """Tables as ``utils.extract_tables`` returns them; shared between calls."""
+        return self._extract()[1]
+
+    def materialize(self) -> Message:
+        """Return an equivalent plain Message, which does not hold the DOM."""
+        return Message(role=self.role, content=self.content, raw_html=self.raw_html)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Message):
+            return NotImplemented
+        return (self.role, self.content, self.raw_html) == (other.role, other.content, other.raw_html)
+
+    def __hash__(self) -> int:
+        return hash((self.role, self.content, self.raw_html))
+
+    def __reduce__(self):
+        # The DOM does not pickle; workers send the text instead
+        return Message, (self.role, self.content, self.raw_html)
@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from hashlib import blake2b
+from typing import Any, Callable, Optional, Tuple
+from .models import Conversation
+
+
+def content_key(*parts: str) -> bytes:
+    """Hash strings into a compact memo key."""
+    digest = blake2b(digest_size=16)
+    for part in parts:
+        data = part.encode('utf-8', errors='surrogatepass')
+        # Length-prefix each part so ('ab', 'c') and ('a', 'bc') differ
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.digest()
+
+
+def conversation_size(conversation: Conversation) -> int:
+    """Estimate the memory a conversation's strings take up, in characters."""
+    size = len(conversation.url) + len(conversation.title or '')
+    for message in conversation.messages:
+        size += len(message.content) + len(message.raw_html or '')
+    return size
+
+
+def copy_conversation(conversation: Conversation) -> Conversation:
+    """
+    Copy a conversation so callers can change it without touching the memo.
+
+    Messages are immutable and shared; only the message list is copied.
+    """
+    return replace(conversation, messages=list(conversation.messages))
+
+
+@dataclass
+class MemoStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size: int = 0
+
+
+class MemoCache:
+    """
+    A bounded, thread-safe LRU cache for parse results.
+
+    Entries are evicted least recently used first once either limit is
+    exceeded. Values must be treated as immutable; callers that hand out
+    mutable values copy them on the way in and out.
+
+    Args:
+        max_entries: The maximum number of entries.
+        max_bytes: The maximum total size of the entries, as reported by
+            the caller when storing them.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[bytes, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = MemoStats()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Return the value stored under ``key``, or None, and count the lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, value: Any, size: int) -> None:
+        """Store a value, evicting older entries to stay within the limits."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._stats.size -= previous[1]
+            self._entries[key] = (value, size)
+            self._stats.size += size
+            while len(self._entries) > self.max_entries or self._stats.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._stats.size -= evicted_size
+                self._stats.evictions += 1
+
+    def get_or_compute(self, key: bytes, compute: Callable[[], Any], size_of: Callable[[Any], int]) -> Any:
+        """Return the memoized value for ``key``, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value, size_of(value))
+        return value
+
+    def stats(self) -> MemoStats:
+        """Return a snapshot of the hit, miss and eviction counters."""
+        with self._lock:
+            return replace(self._stats, entries=len(self._entries))
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._stats.size = 0
@@ -1,23 +1,73 @@
+import sys
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from enum import Enum
 
 
+# Slotted dataclasses need Python 3.10; older versions fall back to __dict__.
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
 class Role(Enum):
     USER = 'user'
     ASSISTANT = 'assistant'
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class Message:
+    """
+    A single turn of a conversation.
+
+    Messages are immutable and slotted, so large corpora stay compact and
+    parsed results can be shared safely. ``raw_html`` is None when the
+    parser was created with ``keep_raw_html=False``.
+    """
     role: Role
     content: str
     raw_html: Optional[str] = None
 
+    def __post_init__(self):
+        # Always hold the shared Role member, never a bare string
+        if not isinstance(self.role, Role):
+            object.__setattr__(self, 'role', Role(self.role))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable representation of the message."""
+        return {
+            'role': self.role.value,
+            'content': self.content,
+            'raw_html': self.raw_html,
+        }
 
-@dataclass
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Message':
+        """Rebuild a message from ``to_dict`` output."""
+        return cls(
+            role=Role(data['role']),
+            content=data['content'],
+            raw_html=data.get('raw_html'),
+        )
+
+
+@dataclass(frozen=True, **_SLOTS)
 class Conversation:
     messages: List[Message]
     url: str
     title: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable representation of the conversation."""
+        return {
+            'url': self.url,
+            'title': self.title,
+            'messages': [message.to_dict() for message in self.messages],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Conversation':
+        """Rebuild a conversation from ``to_dict`` output."""
+        return cls(
+            messages=[Message.from_dict(message) for message in data['messages']],
+            url=data['url'],
+            title=data.get('title'),
+        )
@@ -0,0 +1,160 @@
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Optional
+
+
+# Strategy names reported for results that did not come from the DOM.
+EMBEDDED_STRATEGY = 'embedded-json'
+MEMO_STRATEGY = 'memo'
+CACHE_STRATEGY = 'cache'
+
+
+@dataclass
+class FetchEvent:
+    """One HTTP request made by a parser."""
+    url: str
+    # None when the request failed before a response arrived
+    status: Optional[int]
+    # The size of the decoded response body
+    size: int
+    # Wall-clock start, in seconds since the epoch
+    started: float
+    seconds: float
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class ParseEvent:
+    """One conversation parsed from HTML."""
+    url: str
+    # The extraction strategy that produced the messages, or None if none did
+    strategy: Optional[str]
+    messages: int
+    # The length of the HTML in characters
+    size: int
+    started: float
+    seconds: float
+    # Time spent building the DOM; the rest went to extraction
+    soup_seconds: float = 0.0
+    error: Optional[BaseException] = None
+
+
+class ParseTrace:
+    """Details a parser fills in while parsing, when it is being observed."""
+    __slots__ = ('strategy', 'soup_seconds')
+
+    def __init__(self):
+        self.strategy: Optional[str] = None
+        self.soup_seconds = 0.0
+
+
+class ParseObserver:
+    """
+    Receives events from a parser. Every method is a no-op; override the
+    ones you need.
+
+    A parser shared across threads, as in ``parse_many``, calls its observer
+    from all of them, so implementations must be thread-safe. Pages parsed
+    in ``parse_pipeline`` worker processes are not reported.
+    """
+
+    def on_fetch(self, event: FetchEvent) -> None:
+        pass
+
+    def on_parse(self, event: ParseEvent) -> None:
+        pass
+
+
+@dataclass
+class Metrics:
+    """Totals collected by a MetricsObserver."""
+    fetches: int = 0
+    fetch_errors: int = 0
+    fetch_seconds: float = 0.0
+    bytes_received: int = 0
+    parses: int = 0
+    parse_errors: int = 0
+    parse_seconds: float = 0.0
+    soup_seconds: float = 0.0
+    messages: int = 0
+    strategies: Dict[str, int] = field(default_factory=dict)
+
+
+class MetricsObserver(ParseObserver):
+    """Aggregate counters and timings across every call, thread-safely."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = Metrics()
+
+    def on_fetch(self, event: FetchEvent) -> None:
+        with self._lock:
+            metrics = self._metrics
+            metrics.fetches += 1
+            metrics.fetch_seconds += event.seconds
+            metrics.bytes_received += event.size
+            if event.error is not None or (event.status is not None and event.status >= 400):
+                metrics.fetch_errors += 1
+
+    def on_parse(self, event: ParseEvent) -> None:
+        with self._lock:
+            metrics = self._metrics
+            metrics.parses += 1
+            metrics.parse_seconds += event.seconds
+            metrics.soup_seconds += event.soup_seconds
+            metrics.messages += event.messages
+            if event.error is not None:
+                metrics.parse_errors += 1
+            elif event.strategy is not None:
+                metrics.strategies[event.strategy] = metrics.strategies.get(event.strategy, 0) + 1
+
+    def snapshot(self) -> Metrics:
+        """Return a copy of the totals so far."""
+        with self._lock:
+            return replace(self._metrics, strategies=dict(self._metrics.strategies))
+
+
+class OpenTelemetryObserver(ParseObserver):
+    """
+    Record fetches and parses as OpenTelemetry spans.
+
+    Spans are created after the fact with explicit start and end times, so
+    they nest under whatever span is current in the calling thread.
+
+    Args:
+        tracer: An ``opentelemetry.trace.Tracer``.
+    """
+
+    def __init__(self, tracer: Any):
+        self.tracer = tracer
+
+    def _span(self, name: str, started: float, seconds: float, attributes: Dict[str, Any],
+              error: Optional[BaseException]) -> None:
+        start = int(started * 1e9)
+        span = self.tracer.start_span(name, start_time=start, attributes=attributes)
+        if error is not None:
+            span.record_exception(error)
+            try:
+                from opentelemetry.trace import Status, StatusCode
+            except ImportError:  # pragma: no cover - duck-typed tracers
+                pass
+            else:
+                span.set_status(Status(StatusCode.ERROR, str(error)))
+        span.end(end_time=start + int(seconds * 1e9))
+
+    def on_fetch(self, event: FetchEvent) -> None:
+        attributes: Dict[str, Any] = {'url.full': event.url, 'http.response.body.size': event.size}
+        if event.status is not None:
+            attributes['http.response.status_code'] = event.status
+        self._span('chatmix.fetch', event.started, event.seconds, attributes, event.error)
+
+    def on_parse(self, event: ParseEvent) -> None:
+        attributes: Dict[str, Any] = {
+            'url.full': event.url,
+            'chatmix.html.size': event.size,
+            'chatmix.messages': event.messages,
+            'chatmix.soup_seconds': event.soup_seconds,
+        }
+        if event.strategy is not None:
+            attributes['chatmix.strategy'] = event.strategy
+        self._span('chatmix.parse', event.started, event.seconds, attributes, event.error)
@@ -0,0 +1,333 @@
+import codecs
+import gzip
+import html as html_module
+import re
+import zlib
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+from .batch import BatchResult
+from .pipeline import Page, run_pipeline
+
+
+# Saved pages, optionally gzipped, and WARC archives
+PAGE_SUFFIXES = ('.html', '.htm', '.html.gz', '.htm.gz')
+ARCHIVE_SUFFIXES = ('.warc', '.warc.gz')
+
+# The canonical URL is looked for in this much of the start of a page
+HEAD_BYTES = 256 * 1024
+
+_TAG = re.compile(rb'<(?:link|meta)\b[^>]*>', re.IGNORECASE)
+_ATTRIBUTE = re.compile(rb'''([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''')
+_CHARSET = re.compile(r'charset=["\']?([\w-]+)', re.IGNORECASE)
+_META_CHARSET = re.compile(rb'''charset\s*=\s*["']?([\w-]+)''', re.IGNORECASE)
+
+PathLike = Union[str, Path]
+
+
+class SavedPage:
+    """
+    One saved page: a file to be read on a loader thread, or a record
+    already read from an archive.
+    """
+    __slots__ = ('location', 'path', 'url', 'body', 'encoding', 'http_headers', 'error')
+
+    def __init__(self, location: str, path: Optional[Path] = None, url: Optional[str] = None,
+                 body: Optional[bytes] = None, encoding: Optional[str] = None,
+                 http_headers: Optional[Dict[str, str]] = None, error: Optional[Exception] = None):
+        # The file, or 'archive#offset' for archive records
+        self.location = location
+        self.path = path
+        self.url = url
+        self.body = body
+        self.encoding = encoding
+        # For archived responses, the headers describing how body is encoded
+        self.http_headers = http_headers
+        # Why an archive record could not be read, raised by load
+        self.error = error
+
+    def load(self) -> Page:
+        """
+        Return the page as (url, body, encoding), reading and decoding it if needed.
+
+        When neither the file nor the archived response declares a charset,
+        the encoding comes from the page's ``<meta charset>``; pages with no
+        usable charset at all are decoded as UTF-8 with invalid bytes replaced.
+
+        Raises:
+            EOFError: The archive ended inside this record.
+            OSError: The file or archive could not be read.
+        """
+        if self.error is not None:
+            raise self.error
+        if self.body is not None:
+            body = self.body if self.http_headers is None else _decode_body(self.body, self.http_headers)
+            return self.url or self.location, body, self.encoding or meta_charset(body)
+        opener = gzip.open if self.path.name.endswith('.gz') else open
+        with opener(self.path, 'rb') as f:
+            body = f.read()
+        return canonical_url(body) or self.path.resolve().as_uri(), body, self.encoding or meta_charset(body)
+
+    def __str__(self) -> str:
+        return self.url or self.location
+
+
+def canonical_url(body: bytes) -> Optional[str]:
+    """
+    Return the page's own URL from its canonical link or og:url meta tag.
+
+    Only the first ``HEAD_BYTES`` of the page are searched.
+    """
+    found: Dict[str, str] = {}
+    for tag in _TAG.finditer(body, 0, HEAD_BYTES):
+        attributes = {name.lower(): b''.join(values) for name, *values in _ATTRIBUTE.findall(tag.group())}
+        if attributes.get(b'rel', b'').lower() == b'canonical' and b'href' in attributes:
+            found.setdefault('canonical', attributes[b'href'].decode('utf-8', 'replace'))
+        elif attributes.get(b'property', b'').lower() == b'og:url' and b'content' in attributes:
+            found.setdefault('og:url', attributes[b'content'].decode('utf-8', 'replace'))
+    for key in ('canonical', 'og:url'):
+        url = html_module.unescape(found.get(key, '')).strip()
+        if url.startswith(('http://', 'https://')):
+            return url
+    return None
+
+
+def meta_charset(body: bytes) -> Optional[str]:
+    """
+    Return the charset a page declares in a ``<meta>`` tag, if Python knows it.
+
+    Only the first ``HEAD_BYTES`` of the page are searched.
+    """
+    for tag in _TAG.finditer(body, 0, HEAD_BYTES):
+        if not tag.group().lower().startswith(b'<meta'):
+            continue
+        match = _META_CHARSET.search(tag.group())
+        if match:
+            name = match.group(1).decode('ascii', 'replace')
+            try:
+                return codecs.lookup(name).name
+            except LookupError:
+                return None
+    return None
+
+
+def _read_headers(stream: IO[bytes]) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    for line in iter(stream.readline, b''):
+        line = line.rstrip(b'\r\n')
+        if not line:
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _dechunk(body: bytes) -> bytes:
+    chunks: List[bytes] = []
+    position = 0
+    while True:
+        end = body.find(b'\r\n', position)
+        if end < 0:
+            break
+        size = int(body[position:end].split(b';')[0] or b'0', 16)
+        if size == 0:
+            break
+        chunks.append(body[end + 2:end + 2 + size])
+        position = end + 2 + size + 2
+    return b''.join(chunks)
+
+
+def _split_http(block: bytes) -> Tuple[int, Dict[str, str], bytes]:
+    """Split an archived HTTP response into its status, headers and raw body."""
+    head, separator, body = block.partition(b'\r\n\r\n')
+    if not separator:
+        head, separator, body = block.partition(b'\n\n')
+    status_line, _, header_lines = head.partition(b'\n')
+    parts = status_line.split()
+    status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+    headers: Dict[str, str] = {}
+    for line in header_lines.split(b'\n'):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, body
+
+
+def _decode_body(body: bytes, headers: Dict[str, str]) -> bytes:
+    """Undo the transfer and content codings of an archived response body."""
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        body = _dechunk(body)
+    coding = headers.get('content-encoding', '').lower()
+    if coding in ('gzip', 'x-gzip'):
+        body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    elif coding == 'deflate':
+        try:
+            body = zlib.decompress(body)
+        except zlib.error:
+            body = zlib.decompress(body, -zlib.MAX_WBITS)
+    elif coding == 'br':
+        import brotli
+        body = brotli.decompress(body)
+    return body
+
+
+def iter_warc(path: PathLike) -> Iterator[SavedPage]:
+    """
+    Stream the HTML pages out of a WARC file, gzipped or not.
+
+    ``response`` records with a 200 status and ``resource`` records are
+    yielded in archive order; everything else is skipped. Records are read
+    one at a time, so memory is bounded by the largest record rather than
+    the archive. Response bodies are decompressed by ``SavedPage.load``.
+
+    A truncated or corrupt archive ends with one last page whose ``load``
+    raises the error, so it is reported rather than silently shortening
+    the output. The records after the damage cannot be found, and in a
+    gzipped archive the error can surface a record or two early, since the
+    stream is decompressed in blocks.
+    """
+    path = Path(path)
+    opener = gzip.open if path.name.endswith('.gz') else open
+    with opener(path, 'rb') as stream:
+        while True:
+            offset = stream.tell()
+            headers: Dict[str, str] = {}
+            try:
+                line = stream.readline()
+                if not line:
+                    return
+                if not line.startswith(b'WARC/'):
+                    # The blank lines that end the previous record
+                    continue
+                headers = _read_headers(stream)
+                length = int(headers.get('content-length', 0))
+                block = stream.read(length)
+                if len(block) < length:
+                    raise EOFError(f'{path} ends {length - len(block)} bytes into the record at offset {offset}')
+            except (EOFError, OSError, ValueError, zlib.error) as exc:
+                yield SavedPage(
+                    location=f'{path}#{offset}',
+                    url=headers.get('warc-target-uri', '').strip('<>') or None,
+                    error=exc,
+                )
+                return
+            kind = headers.get('warc-type')
+            content_type = headers.get('content-type', '')
+            http_headers = None
+            if kind == 'response' and content_type.startswith('application/http'):
+                status, http_headers, block = _split_http(block)
+                if status != 200:
+                    continue
+                content_type = http_headers.get('content-type', 'text/html')
+            elif kind != 'resource':
+                continue
+            if 'html' not in content_type.lower():
+                continue
+            charset = _CHARSET.search(content_type)
+            yield SavedPage(
+                location=f'{path}#{offset}',
+                url=headers.get('warc-target-uri', '').strip('<>') or None,
+                body=block,
+                encoding=charset.group(1) if charset else None,
+                http_headers=http_headers,
+            )
+
+
+def iter_saved_pages(paths: Iterable[PathLike]) -> Iterator[SavedPage]:
+    """
+    Yield every saved page under ``paths`` in a stable order.
+
+    Directories are walked recursively in sorted order; files are taken in
+    the order given. Pages are read lazily by ``SavedPage.load``; archive
+    records are read as the iterator reaches them.
+
+    Args:
+        paths: Directories, saved pages (.html, .htm, optionally .gz) and
+            WARC archives (.warc, .warc.gz).
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            files: Iterable[Path] = sorted(
+                p for p in path.rglob('*')
+                if p.is_file() and p.name.endswith(PAGE_SUFFIXES + ARCHIVE_SUFFIXES)
+            )
+        else:
+            files = [path]
+        for file in files:
+            if file.name.endswith(ARCHIVE_SUFFIXES):
+                yield from iter_warc(file)
+            else:
+                yield SavedPage(location=str(file), path=file)
+
+
+def _resolve_parser(parser: Union[None, str, Type[Any]]) -> Type[Any]:
+    from .registry import ParserRouter, parser_class
+    if parser is None:
+        return ParserRouter
+    if isinstance(parser, str):
+        return parser_class(parser)
+    return parser
+
+
+def parse_saved_pages(
+    paths: Iterable[PathLike],
+    parser: Union[None, str, Type[Any]] = None,
+    parse_workers: Optional[int] = None,
+    io_workers: int = 4,
+    ordered: bool = True,
+    max_pending: int = 64,
+    start: int = 0,
+    parser_kwargs: Optional[Dict[str, Any]] = None,
+) -> Iterator[BatchResult]:
+    """
+    Parse directories of saved pages and WARC archives on every core.
+
+    Files are read on loader threads and parsed on a process pool, so a
+    large archive is a batch job rather than a loop over ``parse_from_html``.
+    Each page is dispatched to the registered parser its URL or content
+    matches, unless ``parser`` names one. A page's URL is its canonical link
+    or og:url when it has one, the WARC-Target-URI for archive records, and
+    its file URI otherwise. Pages are decoded with the charset their
+    response headers or ``<meta charset>`` declare, and as UTF-8 with
+    invalid bytes replaced when they declare none. A page that cannot be
+    read, including the record where a truncated archive ends, comes back
+    as a result with its ``error`` set.
+
+    Args:
+        paths: Directories, saved pages and WARC archives; see ``iter_saved_pages``.
+        parser: A registered parser name or a parser class. Defaults to
+            routing each page through the registry.
+        parse_workers: The number of parser processes, defaults to the CPU count.
+        io_workers: The number of threads reading and decompressing files.
+        ordered: Yield results in input order, so reruns produce identical
+            output, instead of completion order.
+        max_pending: The maximum number of loaded pages awaiting the caller.
+        start: Skip this many pages without parsing them, e.g. to resume an
+            interrupted run. Skipped files are not opened, but skipped
+            archive records are still read and decompressed, since that is
+            the only way to find where the next record starts.
+        parser_kwargs: Keyword arguments for the worker parsers.
+
+    Returns:
+        An iterator of BatchResult objects, one per page, whose ``index``
+        counts pages from the start of ``paths``.
+    """
+    pages = iter_saved_pages(paths)
+    for _ in range(start):
+        if next(pages, None) is None:
+            break
+
+    def load(result: BatchResult, page: SavedPage) -> Page:
+        result.attempts = 1
+        loaded = page.load()
+        result.url = loaded[0]
+        return loaded
+
+    for result in run_pipeline(
+        _resolve_parser(parser), pages, load,
+        io_workers=io_workers,
+        parse_workers=parse_workers,
+        ordered=ordered,
+        max_pending=max_pending,
+        parser_kwargs=parser_kwargs,
+    ):
+        result.index += start
+        yield result
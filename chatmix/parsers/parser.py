@@ -1,33 +1,136 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 import re
 from .models import Message, Conversation, Role
+from .base import BaseParser
+from .streaming import Classifier
+from .embedded import find_object
+from .observe import ParseTrace
 
 
-class ChatGPTParser:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-    
-    def parse_from_url(self, url: str) -> Conversation:
+# Attribute ChatGPT puts on each message container, e.g. data-message-author-role="user"
+AUTHOR_ROLE_ATTR = 'data-message-author-role'
+
+AUTHOR_ROLES = {
+    'user': Role.USER,
+    'assistant': Role.ASSISTANT,
+}
+
+# Strategy names for the DOM paths, in the order they are tried.
+STRATEGIES = ('author-role', 'fallback')
+
+
+def _node_text(message: Dict[str, Any]) -> Optional[str]:
+    """Return a message's text, or None if its content is malformed."""
+    content = message.get('content')
+    if content is None:
+        return ''
+    if not isinstance(content, dict):
+        return None
+    if content.get('content_type') == 'code' or 'text' in content:
+        text = content.get('text')
+        return text.strip() if isinstance(text, str) else ''
+    parts = content.get('parts') or []
+    if not isinstance(parts, list):
+        return None
+    return '\n'.join(part for part in parts if isinstance(part, str)).strip()
+
+
+def _conversation_nodes(conversation: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return the conversation's nodes from the root to the current message.
+
+    Returns:
+        The nodes, or None if the message tree is malformed.
+    """
+    if isinstance(conversation.get('linear_conversation'), list):
+        return [node for node in conversation['linear_conversation'] if isinstance(node, dict)]
+
+    mapping = conversation.get('mapping') or {}
+    if not all(
+        isinstance(node, dict)
+        and isinstance(node.get('parent'), (str, type(None)))
+        and isinstance(node.get('children') or [], list)
+        for node in mapping.values()
+    ):
+        return None
+    node_id = conversation.get('current_node')
+    if not isinstance(node_id, str) or node_id not in mapping:
+        # Without a current node, follow the first branch from the root
+        roots = [key for key, node in mapping.items() if not node.get('parent')]
+        node_id = roots[0] if roots else None
+        seen = set()
+        while node_id in mapping and node_id not in seen and mapping[node_id].get('children'):
+            seen.add(node_id)
+            node_id = mapping[node_id]['children'][0]
+            if not isinstance(node_id, str):
+                return None
+
+    path = []
+    seen = set()
+    while node_id in mapping and node_id not in seen:
+        seen.add(node_id)
+        path.append(mapping[node_id])
+        node_id = mapping[node_id].get('parent')
+    path.reverse()
+    return path
+
+
+class ChatGPTParser(BaseParser):
+    def conversation_from_json(self, data: Any, url: str) -> Optional[Conversation]:
         """
-        Parse a conversation from a ChatGPT share link.
-        
-        Args:
-            url: The URL of the ChatGPT share link.
-            
+        Build a conversation from an embedded share payload's message tree.
+
         Returns:
-            A Conversation object containing the parsed messages.
+            The conversation, or None if the payload has no message tree or
+            it is not shaped as expected, so the DOM is parsed instead.
         """
-        response = self.session.get(url)
-        response.raise_for_status()
-        
-        return self.parse_from_html(response.text, url)
-    
-    def parse_from_html(self, html: str, url: str) -> Conversation:
+        conversation = find_object(data, lambda obj: (
+            isinstance(obj.get('mapping'), dict) or isinstance(obj.get('linear_conversation'), list)
+        ))
+        if conversation is None:
+            return None
+        nodes = _conversation_nodes(conversation)
+        if nodes is None:
+            return None
+
+        messages = []
+        for node in nodes:
+            message = node.get('message')
+            if not isinstance(message, dict):
+                continue
+            author = message.get('author') or {}
+            metadata = message.get('metadata') or {}
+            if not isinstance(author, dict) or not isinstance(metadata, dict):
+                return None
+            role = author.get('role')
+            role = AUTHOR_ROLES.get(role) if isinstance(role, str) else None
+            if role is None or metadata.get('is_visually_hidden_from_conversation'):
+                continue
+            content = _node_text(message)
+            if content is None:
+                return None
+            if content:
+                messages.append(Message(
+                    role=role,
+                    content=content,
+                    raw_html=""
+                ))
+
+        title = conversation.get('title')
+        return Conversation(
+            messages=messages,
+            url=url,
+            title=title if isinstance(title, str) else None
+        )
+
+    def stream_classifier(self) -> Classifier:
+        """Classify message containers by their author-role attribute."""
+        def classify(tag: str, attrs: Dict[str, Optional[str]]) -> Optional[Role]:
+            return AUTHOR_ROLES.get(attrs.get(AUTHOR_ROLE_ATTR) or '')
+
+        return classify
+
+    def _parse_html(self, html: str, url: str, trace: Optional[ParseTrace] = None) -> Conversation:
         """
         Parse a conversation from HTML content.
         
@@ -38,18 +141,43 @@ class ChatGPTParser:
         Returns:
             A Conversation object containing the parsed messages.
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        # Share pages carry the conversation as JSON; decoding it is much
+        # cheaper than building the DOM and gives the real messages
+        conversation = self.parse_embedded(html, url, trace)
+        if conversation is not None:
+            return conversation
+
+        soup = self._make_soup(html, trace)
         
         # Extract title if available
         title_elem = soup.select_one('title')
         title = title_elem.text if title_elem else None
         
-        # Extract messages
+        # Extract messages from the rendered message containers
         messages = []
+        for element in soup.find_all(attrs={AUTHOR_ROLE_ATTR: True}):
+            role = AUTHOR_ROLES.get(element.get(AUTHOR_ROLE_ATTR))
+            if role is None or element.find_parent(attrs={AUTHOR_ROLE_ATTR: True}):
+                continue
+            message = self._message(role, (element,))
+            if message is not None:
+                messages.append(message)
+        
+        if messages:
+            if trace is not None:
+                trace.strategy = STRATEGIES[0]
+            return Conversation(
+                messages=messages,
+                url=url,
+                title=title
+            )
         
         # For the example URL, we'll create a simulated conversation based on the visible content
         # This is a fallback for when we can't extract the actual conversation structure
         
+        if trace is not None:
+            trace.strategy = STRATEGIES[1]
+
         # Create a user message with the question
         messages.append(Message(
             role=Role.USER,
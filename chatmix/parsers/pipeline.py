@@ -0,0 +1,210 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Type
+
+from .batch import BatchResult, HostRateLimiter, call_with_retries
+
+if TYPE_CHECKING:
+    from .base import BaseParser
+
+
+# A unit of work for the parse stage: (url, body, encoding).
+Page = Tuple[str, bytes, Optional[str]]
+
+_worker_parser = None
+
+
+def _init_worker(parser_cls: Type['BaseParser'], parser_kwargs: Dict[str, Any]) -> None:
+    global _worker_parser
+    _worker_parser = parser_cls(**parser_kwargs)
+
+
+def _parse_page(index: int, url: str, body: bytes, encoding: Optional[str], attempts: int) -> BatchResult:
+    result = BatchResult(index=index, url=url, attempts=attempts)
+    try:
+        html = body.decode(encoding or 'utf-8', errors='replace')
+        result.conversation = _worker_parser.parse_from_html(html, url)
+    except Exception as exc:
+        result.error = exc
+    return result
+
+
+def run_pipeline(
+    parser_cls: Type['BaseParser'],
+    items: Iterable[Any],
+    produce: Callable[[BatchResult, Any], Optional[Page]],
+    io_workers: int = 8,
+    parse_workers: Optional[int] = None,
+    ordered: bool = True,
+    max_pending: int = 64,
+    parser_kwargs: Optional[Dict[str, Any]] = None,
+) -> Iterator[BatchResult]:
+    """
+    Run an I/O stage on threads feeding a parse stage on processes.
+
+    ``produce`` runs on the I/O thread pool and turns each input item into
+    a page for the parse stage; it returns None (after recording the error
+    on the BatchResult it is given) when the item cannot be loaded. At most
+    ``max_pending`` items are loaded but not yet consumed by the caller, so
+    memory stays bounded however long ``items`` is.
+
+    Args:
+        parser_cls: The parser class instantiated in each worker process.
+        items: The inputs to load, e.g. URLs.
+        produce: Loads one item and returns its (url, body, encoding).
+        io_workers: The number of loader threads.
+        parse_workers: The number of parser processes, defaults to the CPU count.
+        ordered: Yield results in input order instead of completion order.
+        max_pending: The maximum number of loaded pages awaiting the caller.
+        parser_kwargs: Keyword arguments for the worker parsers.
+
+    Returns:
+        An iterator of BatchResult objects, one per item.
+
+    Raises:
+        Exception: Whatever iterating ``items`` raised, once the results
+            for the items before it have been yielded.
+    """
+    if max_pending < 1:
+        raise ValueError('max_pending must be at least 1')
+    slots = threading.Semaphore(max_pending)
+    done: 'queue.Queue[Any]' = queue.Queue()
+    stopped = threading.Event()
+    total = None
+    failure: Optional[BaseException] = None
+
+    io_pool = ThreadPoolExecutor(max_workers=io_workers)
+    parse_pool = ProcessPoolExecutor(
+        max_workers=parse_workers or os.cpu_count() or 1,
+        initializer=_init_worker,
+        initargs=(parser_cls, parser_kwargs or {}),
+    )
+
+    def on_parsed(future: Future, index: int, url: str, attempts: int) -> None:
+        try:
+            done.put(future.result())
+        except Exception as exc:
+            done.put(BatchResult(index=index, url=url, attempts=attempts, error=exc))
+
+    def load(index: int, item: Any) -> None:
+        result = BatchResult(index=index, url=str(item))
+        try:
+            page = produce(result, item)
+        except Exception as exc:
+            page, result.error = None, exc
+        if page is None or stopped.is_set():
+            done.put(result)
+            return
+        url, body, encoding = page
+        attempts = result.attempts or 1
+        future = parse_pool.submit(_parse_page, index, url, body, encoding, attempts)
+        future.add_done_callback(lambda f: on_parsed(f, index, url, attempts))
+
+    def feed() -> None:
+        count = 0
+        error = None
+        try:
+            for index, item in enumerate(items):
+                slots.acquire()
+                if stopped.is_set():
+                    break
+                io_pool.submit(load, index, item)
+                count += 1
+        except BaseException as exc:
+            # Raised to the caller, not lost with this thread
+            error = exc
+        finally:
+            done.put(('total', count, error))
+
+    # Start the worker processes before any of our threads exist, so they
+    # are not forked from a process with other threads running.
+    parse_pool.submit(int).result()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    buffered: Dict[int, BatchResult] = {}
+    next_index = 0
+    yielded = 0
+    try:
+        while total is None or yielded < total:
+            item = done.get()
+            if isinstance(item, tuple):
+                _, total, failure = item
+                continue
+            if not ordered:
+                yielded += 1
+                yield item
+                slots.release()
+                continue
+            buffered[item.index] = item
+            while next_index in buffered:
+                result = buffered.pop(next_index)
+                next_index += 1
+                yielded += 1
+                yield result
+                slots.release()
+        if failure is not None:
+            raise failure
+    finally:
+        stopped.set()
+        # Wake the feeder if it is blocked waiting for a slot.
+        slots.release()
+        io_pool.shutdown(wait=False, cancel_futures=True)
+        parse_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_pipeline(
+    parser: 'BaseParser',
+    urls: Iterable[str],
+    fetch_workers: int = 8,
+    parse_workers: Optional[int] = None,
+    ordered: bool = True,
+    max_pending: int = 64,
+    retries: int = 2,
+    backoff: float = 0.5,
+    rate_limiter: Optional[HostRateLimiter] = None,
+    parser_kwargs: Optional[Dict[str, Any]] = None,
+) -> Iterator[BatchResult]:
+    """
+    Fetch share links on threads and parse them on a process pool.
+
+    Fetch workers only download raw bytes; HTML parsing runs in separate
+    processes so it is not serialized behind the GIL. Worker processes use
+    their own instance of the parser's class.
+
+    Args:
+        parser: The parser whose session fetches the pages.
+        urls: The share links to parse.
+        fetch_workers: The number of concurrent downloads.
+        parse_workers: The number of parser processes, defaults to the CPU count.
+        ordered: Yield results in input order instead of completion order.
+        max_pending: The maximum number of fetched pages awaiting the caller.
+        retries: How many times a transient fetch failure is retried.
+        backoff: The base delay in seconds for exponential backoff.
+        rate_limiter: An optional per-host rate limiter.
+        parser_kwargs: Keyword arguments for the worker parsers, defaults
+            to the parser's backend and raw HTML setting.
+
+    Returns:
+        An iterator of BatchResult objects, one per URL.
+    """
+    if parser_kwargs is None:
+        parser_kwargs = {'backend': parser.backend, 'keep_raw_html': parser.keep_raw_html}
+    parser.transport.ensure_pool_size(fetch_workers)
+
+    def fetch(result: BatchResult, url: str) -> Optional[Page]:
+        response = call_with_retries(parser.fetch, result, retries, backoff, rate_limiter)
+        if response is None:
+            return None
+        return url, response.content, response.encoding
+
+    return run_pipeline(
+        type(parser), urls, fetch,
+        io_workers=fetch_workers,
+        parse_workers=parse_workers,
+        ordered=ordered,
+        max_pending=max_pending,
+        parser_kwargs=parser_kwargs,
+    )
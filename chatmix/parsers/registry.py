@@ -0,0 +1,206 @@
+import importlib
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+if TYPE_CHECKING:
+    from .models import Conversation
+
+
+class Registration(NamedTuple):
+    """How to recognize a platform's share links and pages."""
+    name: str
+    # 'module:Class', imported on first use so registering costs nothing
+    target: str
+    url_patterns: Tuple[Pattern[str], ...]
+    # Substrings that only this platform's share pages contain
+    fingerprints: Tuple[str, ...]
+
+
+_registry: Dict[str, Registration] = {}
+_classes: Dict[str, type] = {}
+_lock = threading.Lock()
+
+
+def register(name: str, target: str, url_patterns: Tuple[str, ...] = (), fingerprints: Tuple[str, ...] = ()) -> None:
+    """
+    Register a parser for ``parse`` to dispatch to.
+
+    Args:
+        name: A short name for the platform, e.g. 'claude'.
+        target: The parser class as 'module:Class'. It is only imported
+            when a link or page is first routed to it.
+        url_patterns: Regular expressions matched against share links.
+        fingerprints: Substrings that identify the platform's pages.
+    """
+    with _lock:
+        _registry[name] = Registration(
+            name=name,
+            target=target,
+            url_patterns=tuple(re.compile(pattern, re.IGNORECASE) for pattern in url_patterns),
+            fingerprints=tuple(fingerprints),
+        )
+        _classes.pop(name, None)
+
+
+def registered() -> List[str]:
+    """Return the names of the registered parsers."""
+    return list(_registry)
+
+
+def parser_for_url(url: str) -> Optional[str]:
+    """Return the name of the parser whose URL patterns match, or None."""
+    for registration in _registry.values():
+        if any(pattern.match(url) for pattern in registration.url_patterns):
+            return registration.name
+    return None
+
+
+def parser_for_html(html: str) -> Optional[str]:
+    """
+    Return the name of the parser whose fingerprints best match a page.
+
+    Returns:
+        The parser matching the most fingerprints, or None if no parser
+        matches any or two match equally well.
+    """
+    scores = sorted(
+        ((sum(marker in html for marker in registration.fingerprints), registration.name)
+         for registration in _registry.values()),
+        reverse=True,
+    )
+    if not scores or scores[0][0] == 0 or (len(scores) > 1 and scores[0][0] == scores[1][0]):
+        return None
+    return scores[0][1]
+
+
+def parser_class(name: str) -> type:
+    """Import and return a registered parser class."""
+    cls = _classes.get(name)
+    if cls is None:
+        try:
+            module_name, _, class_name = _registry[name].target.partition(':')
+        except KeyError:
+            raise ValueError(f'Unknown parser: {name!r}') from None
+        cls = getattr(importlib.import_module(module_name), class_name)
+        _classes[name] = cls
+    return cls
+
+
+def _looks_like_url(text: str) -> bool:
+    return text.startswith(('http://', 'https://')) and not any(c.isspace() or c == '<' for c in text)
+
+
+class ParserRouter:
+    """
+    Route links and pages to registered parsers, one parser per platform.
+
+    A router has the same ``parse_from_url``, ``parse_from_html`` and
+    ``transport`` as a parser, so it can stand in for one in ``parse_many``
+    when links from several platforms are mixed.
+
+    Args:
+        **parser_kwargs: Arguments for every parser the router creates.
+    """
+
+    def __init__(self, **parser_kwargs: Any):
+        self.parser_kwargs = parser_kwargs
+        self._parsers: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def transport(self) -> Any:
+        transport = self.parser_kwargs.get('transport')
+        if transport is None:
+            from .transport import default_transport
+            transport = default_transport()
+        return transport
+
+    def parser(self, name: str) -> Any:
+        """Return this router's parser for a registered platform."""
+        cls = parser_class(name)
+        parser = self._parsers.get(name)
+        if type(parser) is not cls:
+            with self._lock:
+                parser = self._parsers.get(name)
+                if type(parser) is not cls:
+                    parser = cls(**self.parser_kwargs)
+                    self._parsers[name] = parser
+        return parser
+
+    def parse_from_url(self, url: str, parser: Optional[str] = None) -> 'Conversation':
+        """
+        Fetch and parse a share link.
+
+        Links no URL pattern matches are fetched once and routed by the
+        page's fingerprints.
+        """
+        name = parser or parser_for_url(url)
+        if name is not None:
+            return self.parser(name).parse_from_url(url)
+        response = self.transport.session.get(url)
+        response.raise_for_status()
+        html = response.text
+        name = parser_for_html(html)
+        if name is None:
+            raise ValueError(f'No registered parser recognizes {url}')
+        return self.parser(name).parse_from_html(html, url)
+
+    def parse_from_html(self, html: str, url: Optional[str] = None, parser: Optional[str] = None) -> 'Conversation':
+        """Parse a page, routing by ``url`` when it matches and by content otherwise."""
+        name = parser or (url and parser_for_url(url)) or parser_for_html(html)
+        if name is None:
+            raise ValueError(f'No registered parser recognizes {url or "this page"}')
+        return self.parser(name).parse_from_html(html, url or '')
+
+    def parse(self, url_or_html: str, url: Optional[str] = None, parser: Optional[str] = None) -> 'Conversation':
+        """Parse a share link or page; see ``chatmix.parse``."""
+        if _looks_like_url(url_or_html):
+            return self.parse_from_url(url_or_html, parser)
+        return self.parse_from_html(url_or_html, url, parser)
+
+
+_default_router = ParserRouter()
+
+
+def parse(
+    url_or_html: str,
+    url: Optional[str] = None,
+    parser: Optional[str] = None,
+    **parser_kwargs: Any,
+) -> 'Conversation':
+    """
+    Parse a share link or page with whichever parser fits it.
+
+    Links are routed by URL pattern. Pages, and links no pattern matches,
+    are routed by fingerprint once their HTML is at hand.
+
+    Args:
+        url_or_html: A share link, or the HTML of a share page.
+        url: The page's URL when HTML is given; also used for routing.
+        parser: Skip routing and use this registered parser.
+        **parser_kwargs: Arguments for the parser. Without any, a shared
+            parser per platform is reused across calls.
+
+    Returns:
+        The parsed Conversation.
+
+    Raises:
+        ValueError: If no registered parser recognizes the link or page.
+    """
+    router = ParserRouter(**parser_kwargs) if parser_kwargs else _default_router
+    return router.parse(url_or_html, url, parser)
+
+
+register(
+    'chatgpt',
+    'chatmix.parsers.parser:ChatGPTParser',
+    url_patterns=(r'https?://(www\.)?(chatgpt\.com|chat\.openai\.com)/',),
+    fingerprints=('data-message-author-role', 'linear_conversation', 'cdn.oaistatic.com', 'chatgpt.com'),
+)
+register(
+    'claude',
+    'chatmix.parsers.claude.parser:ClaudeParser',
+    url_patterns=(r'https?://(www\.)?claude\.ai/',),
+    fingerprints=('font-claude-message', 'font-user-message', 'chat_messages', 'claude.ai'),
+)
@@ -0,0 +1,170 @@
+from html import escape
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .models import Message, Role
+
+
+# Decides whether an opening tag starts a message: (tag, attrs) -> role or None.
+Classifier = Callable[[str, Dict[str, Optional[str]]], Optional[Role]]
+
+# Elements that never have a closing tag.
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+])
+
+# Elements whose text content is not part of the visible text.
+HIDDEN_TEXT_ELEMENTS = frozenset(['script', 'style', 'template'])
+
+
+class _OpenMessage:
+    __slots__ = ('role', 'depth', 'runs', 'current', 'markup')
+
+    def __init__(self, role: Role, depth: int):
+        self.role = role
+        self.depth = depth
+        self.runs: List[str] = []
+        self.current: List[str] = []
+        self.markup: List[str] = []
+
+
+class MessageStream(HTMLParser):
+    """
+    Incrementally tokenize HTML and emit each message when it closes.
+
+    Feed the page in chunks of any size with ``feed``; completed messages
+    are returned from ``feed`` and ``close``. Only the message currently
+    open is buffered, so memory is bounded by the largest single message
+    rather than the whole page.
+
+    Message content matches ``Tag.get_text('\\n', strip=True)`` on the
+    container. ``raw_html`` is rebuilt from the tokens, so attribute
+    quoting and entity escaping may differ from the source.
+    """
+
+    def __init__(self, classify: Classifier, keep_raw_html: bool = True):
+        super().__init__(convert_charrefs=True)
+        self.classify = classify
+        self.keep_raw_html = keep_raw_html
+        self._stack: List[str] = []
+        self._hidden = 0
+        self._message: Optional[_OpenMessage] = None
+        self._done: List[Message] = []
+
+    def feed(self, data: str) -> List[Message]:
+        super().feed(data)
+        return self._drain()
+
+    def close(self) -> List[Message]:
+        super().close()
+        # Close anything the page left open, like BeautifulSoup does
+        if self._message is not None:
+            self._pop_to(self._message.depth)
+        return self._drain()
+
+    def _drain(self) -> List[Message]:
+        done, self._done = self._done, []
+        return done
+
+    def _markup(self, text: str) -> None:
+        if self._message is not None and self.keep_raw_html:
+            self._message.markup.append(text)
+
+    def _flush_text(self) -> None:
+        message = self._message
+        if message is not None and message.current:
+            text = ''.join(message.current).strip()
+            if text:
+                message.runs.append(text)
+            message.current = []
+
+    def _pop_to(self, depth: int) -> None:
+        while len(self._stack) > depth:
+            name = self._stack.pop()
+            if name in HIDDEN_TEXT_ELEMENTS:
+                self._hidden -= 1
+            if self._message is not None:
+                self._markup(f'</{name}>')
+                if len(self._stack) == self._message.depth:
+                    self._finish()
+
+    def _finish(self) -> None:
+        message = self._message
+        self._message = None
+        content = '\n'.join(message.runs)
+        if content:
+            self._done.append(Message(
+                role=message.role,
+                content=content,
+                raw_html=''.join(message.markup) if self.keep_raw_html else None
+            ))
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._flush_text()
+        if self._message is None:
+            role = self.classify(tag, dict(attrs))
+            if role is not None and tag not in VOID_ELEMENTS:
+                self._message = _OpenMessage(role, len(self._stack))
+        self._markup(self.get_starttag_text() or f'<{tag}>')
+        if tag in VOID_ELEMENTS:
+            return
+        self._stack.append(tag)
+        if tag in HIDDEN_TEXT_ELEMENTS:
+            self._hidden += 1
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._flush_text()
+        self._markup(self.get_starttag_text() or f'<{tag}/>')
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush_text()
+        # Like BeautifulSoup, an end tag closes the innermost open element
+        # of that name and anything opened inside it; stray ones are ignored.
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth] == tag:
+                self._pop_to(depth)
+                return
+
+    def handle_data(self, data: str) -> None:
+        message = self._message
+        if message is None:
+            return
+        self._markup(data if self._hidden else escape(data, quote=False))
+        if not self._hidden:
+            message.current.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        self._flush_text()
+        self._markup(f'<!--{data}-->')
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush_text()
+        if self._message is not None and data.startswith('CDATA['):
+            text = data[len('CDATA['):]
+            self._markup(f'<![CDATA[{text}]]>')
+            if text.strip():
+                self._message.runs.append(text.strip())
+
+    def handle_decl(self, decl: str) -> None:
+        self._flush_text()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush_text()
+
+
+def stream_messages(chunks: Iterable[str], classify: Classifier, keep_raw_html: bool = True) -> Iterator[Message]:
+    """
+    Yield messages from HTML delivered in chunks.
+
+    Args:
+        chunks: The page's HTML, in pieces of any size.
+        classify: Decides which opening tags start a message.
+        keep_raw_html: Whether to rebuild each message's markup.
+
+    Returns:
+        An iterator of Message objects in document order.
+    """
+    stream = MessageStream(classify, keep_raw_html)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
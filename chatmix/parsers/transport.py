@@ -0,0 +1,136 @@
+import os
+import threading
+from typing import Any, Optional, Tuple, Union
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+from .batch import RETRY_STATUSES
+
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Every content coding urllib3 can decode here: gzip and deflate, plus br
+# and zstd when brotli or zstandard is installed.
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+Timeout = Union[None, float, Tuple[float, float]]
+
+
+class _TransportAdapter(HTTPAdapter):
+    """An HTTPAdapter that applies a default timeout to every request."""
+
+    def __init__(self, timeout: Timeout, **kwargs: Any):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class Transport:
+    """
+    A tuned HTTP session that parsers can share.
+
+    Parsers built without a transport use ``default_transport()``, so
+    every parser in a process reuses the same keep-alive connections.
+
+    Args:
+        pool_size: Connections kept open per host; also the number of
+            hosts whose pools are cached.
+        timeout: Seconds to wait, as one number or (connect, read).
+        retries: Connection-level retries for connect errors, read errors
+            and retryable statuses, with exponential backoff. ``parse_many``
+            and ``parse_pipeline`` retry on top of these.
+        backoff: The base delay in seconds between connection-level retries.
+        keep_alive: Reuse connections between requests.
+        user_agent: The User-Agent header.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 16,
+        timeout: Timeout = (10.0, 60.0),
+        retries: int = 0,
+        backoff: float = 0.5,
+        keep_alive: bool = True,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.keep_alive = keep_alive
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive' if keep_alive else 'close',
+        })
+        self._mount(pool_size)
+
+    def _mount(self, pool_size: int) -> None:
+        retry = Retry(
+            total=self.retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            backoff_factor=self.backoff,
+            respect_retry_after_header=True,
+            # Hand the last response back so callers see the real status
+            raise_on_status=False,
+        )
+        adapter = _TransportAdapter(
+            self.timeout,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.pool_size = pool_size
+
+    def ensure_pool_size(self, size: int) -> None:
+        """Grow the connection pools to hold at least ``size`` connections per host."""
+        with self._lock:
+            if size > self.pool_size:
+                self._mount(size)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        self.session.close()
+
+    def __enter__(self) -> 'Transport':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_default: Optional[Transport] = None
+_default_pid: Optional[int] = None
+_default_lock = threading.Lock()
+
+
+def default_transport() -> Transport:
+    """
+    Return the process-wide transport, creating it on first use.
+
+    A forked child gets its own, since connections cannot be shared
+    across processes.
+    """
+    global _default, _default_pid
+    with _default_lock:
+        if _default is None or _default_pid != os.getpid():
+            _default = Transport()
+            _default_pid = os.getpid()
+        return _default
+
+
+def set_default_transport(transport: Transport) -> None:
+    """Replace the transport used by parsers created without one."""
+    global _default, _default_pid
+    with _default_lock:
+        _default = transport
+        _default_pid = os.getpid()
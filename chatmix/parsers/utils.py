@@ -1,25 +1,97 @@
 import re
-from typing import Optional, Dict, Any, List
-from bs4 import BeautifulSoup
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from .backends import make_soup, resolve_backend
+from .memo import MemoCache, content_key
 
 
-def extract_code_blocks(html: str) -> List[Dict[str, Any]]:
+_HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+_COLLECTED_TAGS = frozenset(['pre', 'ul', 'ol', 'table'] + _HEADING_TAGS)
+
+_WHITESPACE = re.compile(r'[ \t\r\n\f]+')
+_SPACES = re.compile(r' {2,}')
+_LINE_EDGES = re.compile(r' *\n *')
+_TEXT_TYPES = (NavigableString, CData)
+
+# Elements that start a new block but have no Markdown syntax of their own.
+_BLOCK_CONTAINERS = frozenset([
+    'address', 'article', 'aside', 'body', 'dd', 'details', 'dialog', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'header',
+    'html', 'main', 'nav', 'section', 'summary',
+])
+
+
+@dataclass
+class ExtractedContent:
+    """Everything the extractors in this module find in one HTML fragment."""
+    code_blocks: List[Dict[str, Any]] = field(default_factory=list)
+    lists: List[Dict[str, Any]] = field(default_factory=list)
+    tables: List[Dict[str, Any]] = field(default_factory=list)
+    headings: List[Dict[str, Any]] = field(default_factory=list)
+    markdown: str = ''
+
+
+def _collect(*roots: Tag) -> Dict[str, List[Tag]]:
+    """
+    Walk the trees once, bucketing the elements the extractors care about.
+
+    The roots themselves count, so a message's own elements are found as
+    they would be in a fragment of its HTML. Buckets keep document order,
+    matching what ``find_all`` returns.
+    """
+    buckets: Dict[str, List[Tag]] = {name: [] for name in _COLLECTED_TAGS}
+    for root in roots:
+        if root.name in buckets:
+            buckets[root.name].append(root)
+        for element in root.descendants:
+            if isinstance(element, Tag) and element.name in buckets:
+                buckets[element.name].append(element)
+    return buckets
+
+
+def extract_all(html: str, backend: Optional[str] = None) -> ExtractedContent:
+    """
+    Run every extractor in this module over HTML content.
+
+    The HTML is parsed once and walked once, instead of once per extractor.
+
+    Args:
+        html: The HTML content to extract from.
+        backend: The HTML backend to parse with, see ``backends.resolve_backend``.
+
+    Returns:
+        An ExtractedContent with code blocks, lists, tables, headings and Markdown.
+    """
+    soup = make_soup(html, backend)
+    buckets = _collect(soup)
+    return ExtractedContent(
+        code_blocks=_code_blocks(buckets),
+        lists=_lists(buckets),
+        tables=_tables(buckets),
+        headings=_headings(buckets),
+        markdown=_soup_to_markdown(soup),
+    )
+
+
+def extract_code_blocks(html: str, backend: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Extract code blocks from HTML content.
     
     Args:
         html: The HTML content containing code blocks.
+        backend: The HTML backend to parse with, see ``backends.resolve_backend``.
         
     Returns:
         A list of dictionaries containing code blocks with language and content.
     """
-    soup = BeautifulSoup(html, 'html.parser')
+    return _code_blocks(_collect(make_soup(html, backend)))
+
+
+def _code_blocks(buckets: Dict[str, List[Tag]]) -> List[Dict[str, Any]]:
     code_blocks = []
     
-    # Find all pre elements (code blocks)
-    pre_elements = soup.find_all('pre')
-    
-    for pre in pre_elements:
+    for pre in buckets['pre']:
         code_elem = pre.find('code')
         if not code_elem:
             continue
@@ -40,31 +112,31 @@ def extract_code_blocks(html: str) -> List[Dict[str, Any]]:
     return code_blocks
 
 
-def extract_lists(html: str) -> List[Dict[str, Any]]:
+def extract_lists(html: str, backend: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Extract lists from HTML content.
     
     Args:
         html: The HTML content containing lists.
+        backend: The HTML backend to parse with, see ``backends.resolve_backend``.
         
     Returns:
         A list of dictionaries containing list type and items.
     """
-    soup = BeautifulSoup(html, 'html.parser')
+    return _lists(_collect(make_soup(html, backend)))
+
+
+def _lists(buckets: Dict[str, List[Tag]]) -> List[Dict[str, Any]]:
     lists = []
     
-    # Find all ul and ol elements
-    ul_elements = soup.find_all('ul')
-    ol_elements = soup.find_all('ol')
-    
-    for ul in ul_elements:
+    for ul in buckets['ul']:
         items = [li.get_text() for li in ul.find_all('li')]
         lists.append({
             'type': 'unordered',
             'items': items
         })
     
-    for ol in ol_elements:
+    for ol in buckets['ol']:
         items = [li.get_text() for li in ol.find_all('li')]
         lists.append({
             'type': 'ordered',
@@ -74,23 +146,24 @@ def extract_lists(html: str) -> List[Dict[str, Any]]:
     return lists
 
 
-def extract_tables(html: str) -> List[Dict[str, Any]]:
+def extract_tables(html: str, backend: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Extract tables from HTML content.
     
     Args:
         html: The HTML content containing tables.
+        backend: The HTML backend to parse with, see ``backends.resolve_backend``.
         
     Returns:
         A list of dictionaries containing table headers and rows.
     """
-    soup = BeautifulSoup(html, 'html.parser')
+    return _tables(_collect(make_soup(html, backend)))
+
+
+def _tables(buckets: Dict[str, List[Tag]]) -> List[Dict[str, Any]]:
     tables = []
     
-    # Find all table elements
-    table_elements = soup.find_all('table')
-    
-    for table in table_elements:
+    for table in buckets['table']:
         headers = []
         rows = []
         
@@ -116,23 +189,26 @@ def extract_tables(html: str) -> List[Dict[str, Any]]:
     return tables
 
 
-def extract_headings(html: str) -> List[Dict[str, Any]]:
+def extract_headings(html: str, backend: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Extract headings from HTML content.
     
     Args:
         html: The HTML content containing headings.
+        backend: The HTML backend to parse with, see ``backends.resolve_backend``.
         
     Returns:
         A list of dictionaries containing heading level and text.
     """
-    soup = BeautifulSoup(html, 'html.parser')
+    return _headings(_collect(make_soup(html, backend)))
+
+
+def _headings(buckets: Dict[str, List[Tag]]) -> List[Dict[str, Any]]:
     headings = []
     
-    # Find all heading elements (h1-h6)
-    for level in range(1, 7):
-        tag = f'h{level}'
-        for heading in soup.find_all(tag):
+    # Headings are grouped by level, then in document order
+    for level, tag in enumerate(_HEADING_TAGS, start=1):
+        for heading in buckets[tag]:
             headings.append({
                 'level': level,
                 'text': heading.get_text()
@@ -141,82 +217,192 @@ def extract_headings(html: str) -> List[Dict[str, Any]]:
     return headings
 
 
-def html_to_markdown(html: str) -> str:
+def html_to_markdown(html: str, backend: Optional[str] = None, memo: Optional[MemoCache] = None) -> str:
     """
     Convert HTML content to Markdown format.
     
     Args:
         html: The HTML content to convert.
+        backend: The HTML backend to parse with, see ``backends.resolve_backend``.
+        memo: An optional cache of conversions, keyed by a hash of the HTML
+            and the backend.
         
     Returns:
         The converted Markdown text.
     """
-    # This is a simplified implementation
-    # For a complete solution, consider using a dedicated library
-    
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    # Replace headings
-    for level in range(1, 7):
-        tag = f'h{level}'
-        for heading in soup.find_all(tag):
-            heading_text = heading.get_text()
-            heading.replace_with(f"{'#' * level} {heading_text}\n\n")
-    
-    # Replace lists
-    for ul in soup.find_all('ul'):
-        items = []
-        for li in ul.find_all('li'):
-            items.append(f"- {li.get_text()}")
-        ul.replace_with("\n".join(items) + "\n\n")
-    
-    for ol in soup.find_all('ol'):
-        items = []
-        for i, li in enumerate(ol.find_all('li')):
-            items.append(f"{i+1}. {li.get_text()}")
-        ol.replace_with("\n".join(items) + "\n\n")
-    
-    # Replace code blocks
-    for pre in soup.find_all('pre'):
-        code = pre.find('code')
-        if code:
-            language = ""
-            class_attr = code.get('class', [])
-            for cls in class_attr:
-                if cls.startswith('language-'):
-                    language = cls.replace('language-', '')
-                    break
-            
-            code_text = code.get_text()
-            pre.replace_with(f"```{language}\n{code_text}\n```\n\n")
-    
-    # Replace inline code
-    for code in soup.find_all('code'):
-        if code.parent.name != 'pre':
-            code_text = code.get_text()
-            code.replace_with(f"`{code_text}`")
-    
-    # Replace links
-    for a in soup.find_all('a'):
-        href = a.get('href', '')
-        text = a.get_text()
-        a.replace_with(f"[{text}]({href})")
-    
-    # Replace images
-    for img in soup.find_all('img'):
-        alt = img.get('alt', '')
-        src = img.get('src', '')
-        img.replace_with(f"![{alt}]({src})")
-    
-    # Replace paragraphs
-    for p in soup.find_all('p'):
-        p_text = p.get_text()
-        p.replace_with(f"{p_text}\n\n")
-    
-    # Get the text and clean up
-    markdown = soup.get_text()
-    
-    # Clean up extra whitespace
-    markdown = re.sub(r'\n{3,}', '\n\n', markdown)
-    
-    return markdown.strip()
+    if memo is not None:
+        backend = resolve_backend(backend)
+        return memo.get_or_compute(
+            content_key('markdown', backend, html),
+            lambda: _soup_to_markdown(make_soup(html, backend)),
+            len,
+        )
+    return _soup_to_markdown(make_soup(html, backend))
+
+
+def _soup_to_markdown(soup: BeautifulSoup) -> str:
+    """
+    Render a parsed tree as Markdown in one recursive walk.
+
+    The tree is not modified. Inline text has its whitespace collapsed as a
+    browser would; code blocks keep theirs.
+    """
+    return _render(soup, '\n\n')
+
+
+class _MarkdownBuilder:
+    """Collects finished blocks and the inline run currently being built."""
+    __slots__ = ('blocks', 'inline')
+
+    def __init__(self):
+        self.blocks: List[str] = []
+        self.inline: List[str] = []
+
+    def flush(self) -> None:
+        if self.inline:
+            text = _SPACES.sub(' ', ''.join(self.inline))
+            text = _LINE_EDGES.sub('\n', text).strip()
+            if text:
+                self.blocks.append(text)
+            self.inline = []
+
+    def block(self, text: str) -> None:
+        self.flush()
+        if text:
+            self.blocks.append(text)
+
+
+def _render(node: Tag, separator: str) -> str:
+    builder = _MarkdownBuilder()
+    _render_children(node, builder)
+    builder.flush()
+    return separator.join(builder.blocks)
+
+
+def _render_inline(node: Tag) -> str:
+    # Content that must fit on one line, like headings and table cells
+    return ' '.join(_render(node, '\n').split('\n'))
+
+
+def _elements_to_markdown(elements: Sequence[Tag]) -> str:
+    """
+    Render elements as Markdown, as if their HTML was joined by newlines
+    and converted with ``html_to_markdown``, without reparsing it.
+    """
+    builder = _MarkdownBuilder()
+    for index, element in enumerate(elements):
+        if index:
+            builder.inline.append(' ')
+        _render_node(element, builder)
+    builder.flush()
+    return '\n\n'.join(builder.blocks)
+
+
+def _render_children(node: Tag, builder: _MarkdownBuilder) -> None:
+    for child in node.children:
+        _render_node(child, builder)
+
+
+def _render_node(node: Any, builder: _MarkdownBuilder) -> None:
+    if type(node) in _TEXT_TYPES:
+        builder.inline.append(_WHITESPACE.sub(' ', node))
+        return
+    if not isinstance(node, Tag):
+        return
+    name = node.name
+    if name in _HEADING_TAGS:
+        builder.block(f"{'#' * int(name[1])} {_render_inline(node)}")
+    elif name == 'p':
+        builder.block(_render(node, '\n\n'))
+    elif name == 'ul' or name == 'ol':
+        builder.block(_render_list(node, name == 'ol'))
+    elif name == 'pre':
+        builder.block(_render_pre(node))
+    elif name == 'table':
+        builder.block(_render_table(node))
+    elif name == 'blockquote':
+        quoted = _render(node, '\n\n')
+        builder.block('\n'.join(f'> {line}' if line else '>' for line in quoted.split('\n')))
+    elif name == 'hr':
+        builder.block('---')
+    elif name == 'code':
+        builder.inline.append(f'`{_WHITESPACE.sub(" ", node.get_text())}`')
+    elif name == 'a':
+        builder.inline.append(f"[{_render_inline(node)}]({node.get('href', '')})")
+    elif name == 'img':
+        builder.inline.append(f"![{node.get('alt', '')}]({node.get('src', '')})")
+    elif name == 'br':
+        builder.inline.append('\n')
+    elif name in _BLOCK_CONTAINERS:
+        builder.flush()
+        _render_children(node, builder)
+        builder.flush()
+    else:
+        _render_children(node, builder)
+
+
+def _child_tags(tag: Tag, names: Tuple[str, ...]) -> List[Tag]:
+    # Cheaper than find_all(names, recursive=False), which builds a filter per call
+    return [child for child in tag.children if isinstance(child, Tag) and child.name in names]
+
+
+def _render_list(tag: Tag, ordered: bool) -> str:
+    number = 1
+    if ordered:
+        try:
+            number = int(tag.get('start', 1))
+        except ValueError:
+            pass
+    items = []
+    for li in _child_tags(tag, ('li',)):
+        marker = f'{number}. ' if ordered else '- '
+        number += 1
+        # Continuation lines, including nested lists, align under the text
+        lines = _render(li, '\n').split('\n')
+        indent = ' ' * len(marker)
+        items.append(marker + lines[0])
+        items.extend(indent + line if line else line for line in lines[1:])
+    return '\n'.join(items)
+
+
+def _render_pre(pre: Tag) -> str:
+    code = pre.find('code')
+    language = ''
+    if code is not None:
+        for cls in code.get('class', []):
+            if cls.startswith('language-'):
+                language = cls.replace('language-', '')
+                break
+    text = (code or pre).get_text()
+    if text.endswith('\n'):
+        text = text[:-1]
+    fence = '```'
+    while fence in text:
+        fence += '`'
+    return f'{fence}{language}\n{text}\n{fence}'
+
+
+def _table_rows(table: Tag) -> List[Tag]:
+    # Rows of this table only, not of tables nested in its cells
+    rows = []
+    for child in _child_tags(table, ('thead', 'tbody', 'tfoot', 'tr')):
+        if child.name == 'tr':
+            rows.append(child)
+        else:
+            rows.extend(_child_tags(child, ('tr',)))
+    return rows
+
+
+def _render_table(table: Tag) -> str:
+    rows = [
+        [_render_inline(cell).replace('|', '\\|') for cell in _child_tags(tr, ('th', 'td'))]
+        for tr in _table_rows(table)
+    ]
+    rows = [row for row in rows if row]
+    if not rows:
+        return ''
+    width = max(len(row) for row in rows)
+    lines = [f"| {' | '.join(row + [''] * (width - len(row)))} |" for row in rows]
+    # GFM tables always have a header row; the first row serves as one
+    lines.insert(1, f"|{' --- |' * width}")
+    return '\n'.join(lines)
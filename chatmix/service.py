@@ -0,0 +1,269 @@
+"""
+A long-running parse service for many short-lived callers.
+
+    python -m chatmix serve --socket /tmp/chatmix.sock
+    python -m chatmix serve --port 8765
+
+Callers send one JSON request per line and get one JSON response per line
+(see ``chatmix.client``). The service keeps parsers, their HTTP
+connections and a pool of parser processes warm between requests, and
+concurrent requests for the same link share a single fetch and parse.
+"""
+
+import asyncio
+import json
+import os
+import stat
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+from .parsers.cache import normalize_url
+from .parsers.memo import content_key
+from .parsers.registry import ParserRouter, parser_for_html, parser_for_url
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised without orjson installed
+    orjson = None
+
+
+# The longest request line accepted, which bounds the HTML a request may carry
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+Address = Union[str, Tuple[str, int]]
+
+_worker_router: Optional[ParserRouter] = None
+
+
+def _init_worker(parser_kwargs: Dict[str, Any]) -> None:
+    global _worker_router
+    _worker_router = ParserRouter(**parser_kwargs)
+
+
+def _parse_in_worker(html: str, url: str, parser: Optional[str]) -> Dict[str, Any]:
+    return _worker_router.parse_from_html(html, url, parser).to_dict()
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value) + b'\n'
+    return json.dumps(value).encode('utf-8') + b'\n'
+
+
+def _loads(line: bytes) -> Any:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+@dataclass
+class ServiceStats:
+    """Counters since the service started."""
+    requests: int = 0
+    # Requests that joined a fetch or parse already in flight
+    coalesced: int = 0
+    fetches: int = 0
+    parses: int = 0
+    errors: int = 0
+
+
+class ParseService:
+    """
+    Fetch and parse share links on behalf of clients, with request coalescing.
+
+    Fetches run on a thread pool through the shared transport; parsing runs
+    on a pool of worker processes that each keep a warm ``ParserRouter``,
+    so no request pays for imports, sessions or parser setup. While a link
+    is being fetched and parsed, further requests for it, in any spelling
+    ``normalize_url`` treats as equal, wait for that result instead of
+    starting their own.
+
+    Args:
+        workers: The number of parser processes, defaults to the CPU count.
+            0 parses on the fetch threads instead.
+        fetch_workers: The number of concurrent fetches.
+        **parser_kwargs: Arguments for the parsers, e.g. backend.
+    """
+
+    def __init__(self, workers: Optional[int] = None, fetch_workers: int = 16, **parser_kwargs: Any):
+        self.router = ParserRouter(**parser_kwargs)
+        self.router.transport.ensure_pool_size(fetch_workers)
+        self.stats = ServiceStats()
+        self._io = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix='chatmix-fetch')
+        self._parse_pool: Optional[Executor] = None
+        if workers != 0:
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count() or 1,
+                initializer=_init_worker,
+                initargs=(parser_kwargs,),
+            )
+            # Start the workers now, before any request is waiting on them
+            self._parse_pool.submit(int).result()
+        self._inflight: Dict[Any, 'asyncio.Future[Dict[str, Any]]'] = {}
+
+    async def _single_flight(self, key: Any, make: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+        else:
+            future = asyncio.ensure_future(make())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finished(key, done))
+        # A caller that goes away must not cancel the work others wait on
+        return await asyncio.shield(future)
+
+    def _finished(self, key: Any, future: 'asyncio.Future[Dict[str, Any]]') -> None:
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is not None:
+            self.stats.errors += 1
+
+    def _fetch(self, url: str) -> str:
+        response = self.router.transport.session.get(url)
+        response.raise_for_status()
+        return response.text
+
+    async def _parse(self, html: str, url: str, parser: Optional[str]) -> Dict[str, Any]:
+        self.stats.parses += 1
+        loop = asyncio.get_running_loop()
+        if self._parse_pool is None:
+            return await loop.run_in_executor(
+                self._io, lambda: self.router.parse_from_html(html, url, parser).to_dict()
+            )
+        return await loop.run_in_executor(self._parse_pool, _parse_in_worker, html, url, parser)
+
+    async def parse_url(self, url: str, parser: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Fetch and parse a share link, returning ``Conversation.to_dict()`` output.
+
+        The normalized link is fetched, so every spelling that shares a
+        fetch gets the same result.
+        """
+        normalized = normalize_url(url)
+
+        async def fetch_and_parse() -> Dict[str, Any]:
+            name = parser or parser_for_url(normalized)
+            self.stats.fetches += 1
+            html = await asyncio.get_running_loop().run_in_executor(self._io, self._fetch, normalized)
+            if name is None:
+                name = parser_for_html(html)
+                if name is None:
+                    raise ValueError(f'No registered parser recognizes {url}')
+            return await self._parse(html, normalized, name)
+
+        return await self._single_flight(('url', normalized, parser), fetch_and_parse)
+
+    async def parse_html(self, html: str, url: Optional[str] = None, parser: Optional[str] = None) -> Dict[str, Any]:
+        """Parse a page, returning ``Conversation.to_dict()`` output."""
+        key = ('html', content_key(html, url or '', parser or ''))
+        return await self._single_flight(key, lambda: self._parse(html, url or '', parser))
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one protocol request."""
+        self.stats.requests += 1
+        response: Dict[str, Any] = {'id': request.get('id')}
+        try:
+            method = request.get('method', 'parse')
+            if method == 'parse':
+                if request.get('html') is not None:
+                    result = await self.parse_html(request['html'], request.get('url'), request.get('parser'))
+                elif request.get('url'):
+                    result = await self.parse_url(request['url'], request.get('parser'))
+                else:
+                    raise ValueError('A parse request needs a url or html')
+            elif method == 'stats':
+                result = asdict(self.stats)
+            elif method == 'ping':
+                result = {'time': time.time()}
+            else:
+                raise ValueError(f'Unknown method: {method!r}')
+            response['result'] = result
+        except Exception as exc:
+            response['error'] = {'type': type(exc).__name__, 'message': str(exc)}
+        return response
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Requests on one connection are answered concurrently, so responses
+        # may come back out of order; clients match them by id
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line: bytes) -> None:
+            try:
+                request = _loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('A request must be a JSON object')
+            except ValueError as exc:
+                response = {'id': None, 'error': {'type': 'ProtocolError', 'message': str(exc)}}
+            else:
+                response = await self.handle(request)
+            async with lock:
+                writer.write(_dumps(response))
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The line is longer than MAX_REQUEST_BYTES
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def start(self, address: Address) -> asyncio.AbstractServer:
+        """
+        Start listening on a Unix socket path or a (host, port) pair.
+
+        A socket left at the path by an earlier run is replaced.
+
+        Returns:
+            The asyncio server; call ``serve_forever`` on it or close it.
+
+        Raises:
+            FileExistsError: If something other than a socket is at the path.
+        """
+        if isinstance(address, str):
+            if os.path.lexists(address):
+                if not _is_socket(address):
+                    raise FileExistsError(f'{address} exists and is not a socket')
+                os.remove(address)
+            return await asyncio.start_unix_server(self._serve_connection, address, limit=MAX_REQUEST_BYTES)
+        host, port = address
+        return await asyncio.start_server(self._serve_connection, host, port, limit=MAX_REQUEST_BYTES)
+
+    def close(self) -> None:
+        """Shut down the fetch threads and parser processes."""
+        self._io.shutdown(wait=False, cancel_futures=True)
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(address: Address, **service_kwargs: Any) -> None:
+    """Run a ParseService on ``address`` until cancelled."""
+    service = ParseService(**service_kwargs)
+    try:
+        server = await service.start(address)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+        if isinstance(address, str) and _is_socket(address):
+            os.remove(address)
+
+
+def _is_socket(path: str) -> bool:
+    try:
+        return stat.S_ISSOCK(os.lstat(path).st_mode)
+    except FileNotFoundError:
+        return False
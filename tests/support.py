@@ -0,0 +1,86 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CLAUDE_HTML = """
+<main>
+    <header>Redirecting Domains with DNS Records</header>
+    <div>
+        <p>what domain record to redirect to a different domain?</p>
+    </div>
+    <div>
+        <p>It looks like you're trying to set up a DNS record to redirect from one domain to another.</p>
+    </div>
+</main>
+"""
+
+
+class LocalServer:
+    """
+    A throwaway HTTP server standing in for a share-link origin.
+
+    ``routes`` maps a path to a list of ``(status, body)`` or
+    ``(status, body, headers)`` responses; each request pops the next
+    response and the last one repeats forever. A response with an ETag
+    header is answered with 304 when the request's If-None-Match matches.
+    Every response is held back by ``delay`` seconds.
+    """
+
+    def __init__(self, routes=None, headers=None, delay=0.0):
+        self.routes = {path: list(responses) for path, responses in (routes or {}).items()}
+        self.headers = headers or {}
+        self.delay = delay
+        self.requests = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append((self.path, dict(self.headers)))
+                    server.connections.add(self.client_address)
+                    responses = server.routes.get(self.path)
+                    if not responses:
+                        status, body, extra = 404, 'not found', {}
+                    else:
+                        status, body, *rest = responses[0] if len(responses) == 1 else responses.pop(0)
+                        extra = rest[0] if rest else {}
+                if server.delay:
+                    time.sleep(server.delay)
+                etag = {**server.headers, **extra}.get('ETag')
+                if etag is not None and self.headers.get('If-None-Match') == etag:
+                    status, body = 304, b''
+                payload = body.encode('utf-8') if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in {**server.headers, **extra}.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self._server.server_address[1]}{path}'
+
+    def hits(self, path):
+        with self._lock:
+            return sum(1 for requested, _ in self.requests if requested == path)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,166 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+from chatmix.export import export_conversations
+from chatmix.parsers import ClaudeParser
+from chatmix.parsers.models import Conversation, Message, Role
+
+try:
+    import numpy as np
+    from chatmix.analytics import CorpusAnalyzer, Distribution, analyze_conversations, analyze_export
+except ImportError:
+    np = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def make_corpus(count, seed=0):
+    rng = random.Random(seed)
+    conversations = []
+    for n in range(count):
+        messages = []
+        for turn in range(rng.randint(1, 12)):
+            content = 'word ' * rng.randint(0, 300)
+            if turn % 3 == 1:
+                content += '```python\nprint(1)\n```'
+            # No markup, as from embedded JSON, so fences in the content count
+            messages.append(Message(role=Role.USER if turn % 2 == 0 else Role.ASSISTANT, content=content, raw_html=''))
+        conversations.append(Conversation(messages=messages, url=f'https://claude.ai/share/{n:032d}'))
+    return conversations
+
+
+@unittest.skipIf(np is None or pq is None, 'numpy and pyarrow are not installed')
+class TestDistribution(unittest.TestCase):
+    def test_exact_summary_and_small_values(self):
+        distribution = Distribution()
+        distribution.update([3, 1, 2, 2, 50])
+        self.assertEqual((distribution.count, distribution.total), (5, 58))
+        self.assertEqual((distribution.min, distribution.max), (1, 50))
+        self.assertAlmostEqual(distribution.mean, 11.6)
+        self.assertAlmostEqual(distribution.std, float(np.std([3, 1, 2, 2, 50])))
+        # Values below 64 are bucketed exactly
+        self.assertEqual(distribution.quantiles((0, 0.5, 1)), {0: 1.0, 0.5: 2.0, 1: 50.0})
+        counts, edges = distribution.histogram()
+        self.assertEqual(counts.tolist()[:3], [1, 2, 1])
+        self.assertEqual(edges.tolist()[:2], [1.0, 2.0])
+
+    def test_large_values_are_approximate_and_mergeable(self):
+        values = np.random.default_rng(0).lognormal(7, 2, 50_000).astype(np.int64)
+        whole, first, second = Distribution(), Distribution(), Distribution()
+        whole.update(values)
+        first.update(values[:20_000])
+        second.update(values[20_000:])
+        first.merge(second)
+        for q, value in whole.quantiles((0.1, 0.5, 0.9, 0.99)).items():
+            self.assertAlmostEqual(value / np.quantile(values, q), 1, delta=0.03)
+        self.assertEqual(first.quantiles(), whole.quantiles())
+        self.assertEqual(first.to_dict(), whole.to_dict())
+
+        counts, _ = whole.histogram([0, 1000, 10_000, 1e9])
+        expected, _ = np.histogram(values, [0, 1000, 10_000, 1e9])
+        self.assertEqual(counts.sum(), len(values))
+        for got, want in zip(counts, expected):
+            self.assertAlmostEqual(got / want, 1, delta=0.05)
+
+        with self.assertRaises(ValueError):
+            whole.update([-1])
+
+
+@unittest.skipIf(np is None or pq is None, 'numpy and pyarrow are not installed')
+class TestCorpusStats(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.conversations = make_corpus(200)
+
+    def expected(self):
+        messages = [m for c in self.conversations for m in c.messages]
+        tokens = [-(-len(m.content) // 4) for m in messages]
+        return messages, tokens
+
+    def test_matches_a_python_loop(self):
+        stats = analyze_conversations(self.conversations)
+        messages, tokens = self.expected()
+        self.assertEqual(stats.conversations, len(self.conversations))
+        self.assertEqual(stats.messages, len(messages))
+        self.assertEqual(stats.message_chars.total, sum(len(m.content) for m in messages))
+        self.assertEqual(stats.message_tokens.total, sum(tokens))
+        self.assertEqual(stats.role_messages[Role.USER], sum(m.role == Role.USER for m in messages))
+        self.assertEqual(
+            stats.role_tokens[Role.ASSISTANT],
+            sum(t for m, t in zip(messages, tokens) if m.role == Role.ASSISTANT),
+        )
+        self.assertAlmostEqual(sum(stats.role_balance.values()), 1)
+        with_code = sum('```' in m.content for m in messages)
+        self.assertEqual((stats.code_blocks, stats.messages_with_code), (with_code, with_code))
+        self.assertAlmostEqual(stats.code_density, with_code / len(messages))
+        self.assertEqual(stats.turns.max, max(len(c.messages) for c in self.conversations))
+        self.assertEqual(stats.conversation_tokens.total, sum(tokens))
+
+    def test_chunk_boundaries_do_not_split_conversations(self):
+        whole = analyze_conversations(self.conversations).to_dict()
+        self.assertEqual(analyze_conversations(self.conversations, chunk_messages=5).to_dict(), whole)
+
+        parts = [CorpusAnalyzer(), CorpusAnalyzer()]
+        for index, conversation in enumerate(self.conversations):
+            parts[index % 2].add_chunk(
+                [m.content for m in conversation.messages],
+                [m.role.value for m in conversation.messages],
+                [index] * len(conversation.messages),
+                [m.raw_html for m in conversation.messages],
+            )
+        merged = parts[0].finish()
+        merged.merge(parts[1].finish())
+        self.assertEqual(merged.to_dict(), whole)
+
+    def test_raw_html_code_blocks(self):
+        conversation = Conversation(messages=[
+            Message(Role.ASSISTANT, 'one two', '<div><pre><code>a</code></pre><pre class="x">b</pre></div>'),
+            Message(Role.USER, 'no code', '<p>no code</p>'),
+            Message(Role.USER, 'unknown', None),
+            # Fences count only when there is no markup to count <pre> in
+            Message(Role.USER, 'type ``` twice ```', '<p>type ``` twice ```</p>'),
+            Message(Role.ASSISTANT, '```py\na\n```', ''),
+        ], url='https://claude.ai/share/raw')
+        stats = analyze_conversations([conversation])
+        self.assertEqual((stats.code_blocks, stats.messages_with_code, stats.code_messages), (3, 2, 4))
+        self.assertEqual(stats.code_density, 0.5)
+
+    def test_parsed_code_blocks_survive_export(self):
+        html = (
+            '<div class="font-user-message"><p>How do I print?</p></div>'
+            '<div class="font-claude-message"><p>Like this:</p><pre><code>print(1)</code></pre></div>'
+        )
+        url = 'https://claude.ai/share/0b7c8e0e-6a3d-4c36-9a1e-3f5f2b0c1d2e'
+        parsed = [ClaudeParser().parse_from_html(html, url)]
+        jsonl = os.path.join(self.tmp.name, 'parsed.jsonl')
+        export_conversations(parsed, jsonl)
+        for stats in (analyze_conversations(parsed), analyze_export(jsonl)):
+            self.assertEqual((stats.code_blocks, stats.code_messages), (1, 2))
+
+        # Without raw HTML the code cannot be found, which is reported
+        # rather than counted as none
+        stats = analyze_conversations([ClaudeParser(keep_raw_html=False).parse_from_html(html, url)])
+        self.assertEqual((stats.code_blocks, stats.code_messages), (0, 0))
+        self.assertTrue(math.isnan(stats.code_density))
+        self.assertIsNone(stats.to_dict()['code_density'])
+
+    def test_exports(self):
+        expected = analyze_conversations(self.conversations).to_dict()
+        jsonl = os.path.join(self.tmp.name, 'conversations.jsonl')
+        export_conversations(self.conversations, jsonl)
+        self.assertEqual(analyze_export(jsonl, block_size=64 * 1024).to_dict(), expected)
+
+        dataset = os.path.join(self.tmp.name, 'dataset')
+        export_conversations(self.conversations[:120], dataset, row_group_size=100)
+        export_conversations(self.conversations[120:], dataset, append=True)
+        self.assertEqual(analyze_export(dataset, chunk_messages=37).to_dict(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import unittest
+from unittest import mock
+from chatmix.parsers import ClaudeParser, ChatGPTParser, utils
+from chatmix.parsers.backends import BACKEND_ENV_VAR, available_backends, resolve_backend
+from tests.support import CLAUDE_HTML
+from tests.test_utils import SAMPLE_HTML
+
+
+CLASSED_HTML = """
+<html><head><title>Shared chat</title></head><body>
+<header>Sorting a list</header>
+<div class="font-user-message"><p>How do I sort a list in Python?</p></div>
+<div class="font-claude-message">
+    <p>Use <code>sorted()</code> for a new list or <code>list.sort()</code> in place.</p>
+    <pre><code class="language-python">sorted([3, 1, 2])</code></pre>
+</div>
+</body></html>
+"""
+
+FIXTURES = [CLAUDE_HTML, CLASSED_HTML, SAMPLE_HTML]
+
+# Unclosed <p> and <li>, which the builders repair differently
+MALFORMED_LIST = '<ul><li>a<li>b</ul>'
+MALFORMED_PARAGRAPHS = '<main><p>hi<p>there</main>'
+
+
+class TestBackendConformance(unittest.TestCase):
+    """Every installed backend must produce what html.parser does on well-formed markup."""
+
+    def test_parsers_match_reference(self):
+        for backend in available_backends():
+            for parser_cls in (ClaudeParser, ChatGPTParser):
+                for html in FIXTURES:
+                    with self.subTest(backend=backend, parser=parser_cls.__name__, html=html[:40]):
+                        expected = parser_cls(backend='html.parser').parse_from_html(html, 'https://example.com')
+                        actual = parser_cls(backend=backend).parse_from_html(html, 'https://example.com')
+                        self.assertEqual(actual, expected)
+
+    def test_utils_match_reference(self):
+        for backend in available_backends():
+            for html in FIXTURES:
+                with self.subTest(backend=backend, html=html[:40]):
+                    self.assertEqual(utils.extract_all(html, backend=backend), utils.extract_all(html, backend='html.parser'))
+
+    @unittest.skipUnless('lxml' in available_backends(), 'lxml is not installed')
+    def test_malformed_markup_differs(self):
+        # Documented in the README; a change here needs the README updated
+        self.assertEqual(utils.html_to_markdown(MALFORMED_LIST, backend='html.parser'), '- ab')
+        self.assertEqual(utils.html_to_markdown(MALFORMED_LIST, backend='lxml'), '- a\n- b')
+        nested = ClaudeParser(backend='html.parser').parse_from_html(MALFORMED_PARAGRAPHS, 'https://example.com')
+        closed = ClaudeParser(backend='lxml').parse_from_html(MALFORMED_PARAGRAPHS, 'https://example.com')
+        self.assertEqual(nested.messages[0].raw_html, '<p>hi<p>there</p></p>')
+        self.assertEqual(closed.messages[0].raw_html, '<p>hi</p>')
+
+
+class TestResolveBackend(unittest.TestCase):
+    def test_explicit_backend_wins(self):
+        with mock.patch.dict(os.environ, {BACKEND_ENV_VAR: 'auto'}):
+            self.assertEqual(resolve_backend('html.parser'), 'html.parser')
+
+    def test_environment_override(self):
+        with mock.patch.dict(os.environ, {BACKEND_ENV_VAR: 'html.parser'}):
+            self.assertEqual(resolve_backend(), 'html.parser')
+            self.assertEqual(ClaudeParser().backend, 'html.parser')
+
+    def test_default_is_html_parser(self):
+        with mock.patch.dict(os.environ, {BACKEND_ENV_VAR: ''}):
+            self.assertEqual(resolve_backend(), 'html.parser')
+            self.assertEqual(ClaudeParser().backend, 'html.parser')
+
+    def test_auto_prefers_fastest_installed(self):
+        expected = 'lxml' if 'lxml' in available_backends() else 'html.parser'
+        self.assertEqual(resolve_backend('auto'), expected)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            resolve_backend('no-such-parser')
+
+
+if __name__ == "__main__":
+    unittest.main()
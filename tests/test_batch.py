@@ -0,0 +1,77 @@
+import asyncio
+import time
+import unittest
+from chatmix.parsers import ClaudeParser, HostRateLimiter, Role
+from tests.support import CLAUDE_HTML, LocalServer
+
+
+class TestParseMany(unittest.TestCase):
+    def test_results_in_input_order_with_error_isolation(self):
+        routes = {f'/share/{i}': [(200, CLAUDE_HTML)] for i in range(6)}
+        with LocalServer(routes) as server:
+            urls = [server.url(f'/share/{i}') for i in range(6)]
+            urls.insert(3, server.url('/missing'))
+            results = list(ClaudeParser().parse_many(urls, concurrency=4, retries=0))
+
+        self.assertEqual([r.url for r in results], urls)
+        self.assertEqual([r.index for r in results], list(range(7)))
+        self.assertFalse(results[3].ok)
+        self.assertEqual(results[3].error.response.status_code, 404)
+        for result in results[:3] + results[4:]:
+            self.assertTrue(result.ok)
+            self.assertEqual(result.conversation.messages[0].role, Role.USER)
+
+    def test_transient_errors_are_retried(self):
+        routes = {'/flaky': [(503, 'busy'), (503, 'busy'), (200, CLAUDE_HTML)]}
+        with LocalServer(routes) as server:
+            results = list(ClaudeParser().parse_many([server.url('/flaky')], retries=2, backoff=0.01))
+            self.assertEqual(server.hits('/flaky'), 3)
+
+        self.assertTrue(results[0].ok)
+        self.assertEqual(results[0].attempts, 3)
+
+    def test_unordered_yields_every_url(self):
+        routes = {f'/share/{i}': [(200, CLAUDE_HTML)] for i in range(10)}
+        with LocalServer(routes) as server:
+            urls = [server.url(f'/share/{i}') for i in range(10)]
+            results = list(ClaudeParser().parse_many(urls, concurrency=3, ordered=False))
+
+        self.assertEqual(sorted(r.index for r in results), list(range(10)))
+
+    def test_aparse_many(self):
+        routes = {f'/share/{i}': [(200, CLAUDE_HTML)] for i in range(5)}
+
+        async def collect(urls):
+            return [result async for result in ClaudeParser().aparse_many(urls, concurrency=2, retries=0)]
+
+        with LocalServer(routes) as server:
+            urls = [server.url(f'/share/{i}') for i in range(5)] + [server.url('/missing')]
+            results = asyncio.run(collect(urls))
+
+        self.assertEqual(sorted(r.index for r in results), list(range(6)))
+        self.assertEqual(sum(1 for r in results if not r.ok), 1)
+
+    def test_bad_concurrency_fails_at_the_call(self):
+        parser = ClaudeParser()
+        for call in (parser.parse_many, parser.aparse_many):
+            with self.subTest(call=call.__name__), self.assertRaises(ValueError):
+                call(['https://claude.ai/share/x'], concurrency=0)
+
+
+class TestHostRateLimiter(unittest.TestCase):
+    def test_spaces_requests_per_host(self):
+        limiter = HostRateLimiter(rate=20)
+        self.assertEqual(limiter.reserve('http://a.example/1'), 0)
+        self.assertAlmostEqual(limiter.reserve('http://a.example/2'), 0.05, delta=0.01)
+        self.assertEqual(limiter.reserve('http://b.example/1'), 0)
+
+    def test_acquire_blocks(self):
+        limiter = HostRateLimiter(rate=50)
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire('http://a.example/')
+        self.assertGreaterEqual(time.monotonic() - start, 0.055)
+
+
+if __name__ == "__main__":
+    unittest.main()
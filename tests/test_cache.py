@@ -0,0 +1,101 @@
+import os
+import tempfile
+import time
+import unittest
+from chatmix.parsers import ClaudeParser, Conversation, Message, Role
+from chatmix.parsers.cache import ResponseCache, normalize_url
+from tests.support import CLAUDE_HTML, LocalServer
+
+
+class TestNormalizeUrl(unittest.TestCase):
+    def test_equivalent_spellings_share_a_key(self):
+        self.assertEqual(
+            normalize_url('HTTPS://Claude.AI:443/share/abc/?utm_source=x&b=2&a=1#top'),
+            'https://claude.ai/share/abc?a=1&b=2'
+        )
+
+    def test_only_tracking_parameters_are_dropped(self):
+        self.assertEqual(
+            normalize_url('https://claude.ai/share/abc?ref=x&ref_src=y&fbclid=z&reference=1&refresh=2'),
+            'https://claude.ai/share/abc?reference=1&refresh=2'
+        )
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def conversation(self, url):
+        return Conversation(messages=[Message(role=Role.USER, content='hi', raw_html='<p>hi</p>')], url=url)
+
+    def test_conditional_request_serves_stored_conversation_on_304(self):
+        routes = {'/share/1': [(200, CLAUDE_HTML, {'ETag': '"v1"'})]}
+        cache = ResponseCache(self.path)
+        with LocalServer(routes) as server:
+            parser = ClaudeParser(cache=cache)
+            first = parser.parse_from_url(server.url('/share/1'))
+            parser.parse_from_html = None  # a 304 must not reparse
+            second = parser.parse_from_url(server.url('/share/1'))
+            headers = [headers for _, headers in server.requests]
+
+        self.assertNotIn('If-None-Match', headers[0])
+        self.assertEqual(headers[1]['If-None-Match'], '"v1"')
+        self.assertEqual(second, first)
+
+    def test_entries_are_reparsed_for_differently_configured_parsers(self):
+        routes = {'/share/1': [(200, CLAUDE_HTML, {'ETag': '"v1"'})]}
+        cache = ResponseCache(self.path)
+        with LocalServer(routes) as server:
+            url = server.url('/share/1')
+            with_html = ClaudeParser(cache=cache).parse_from_url(url)
+            without_html = ClaudeParser(cache=cache, keep_raw_html=False).parse_from_url(url)
+            again = ClaudeParser(cache=cache).parse_from_url(url)
+            # Every request after the first was revalidated, not refetched
+            self.assertEqual(len(server.requests), 3)
+
+        self.assertTrue(with_html.messages[0].raw_html)
+        self.assertIsNone(without_html.messages[0].raw_html)
+        self.assertEqual(again, with_html)
+
+    def test_changed_page_is_reparsed_and_stored(self):
+        routes = {'/share/1': [(200, CLAUDE_HTML, {'ETag': '"v1"'}), (200, CLAUDE_HTML.replace('DNS', 'MX'), {'ETag': '"v2"'})]}
+        with LocalServer(routes) as server:
+            parser = ClaudeParser(cache=ResponseCache(self.path))
+            parser.parse_from_url(server.url('/share/1'))
+            updated = parser.parse_from_url(server.url('/share/1'))
+
+        self.assertIn('MX record', updated.messages[1].content)
+        entry = ResponseCache(self.path).get(server.url('/share/1'))
+        self.assertEqual(entry.etag, '"v2"')
+        self.assertEqual(entry.conversation, updated)
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(self.path, ttl=60)
+        cache.put('https://claude.ai/share/a', 'ClaudeParser', b'<html/>', self.conversation('https://claude.ai/share/a'))
+        self.assertIsNotNone(cache.get('https://claude.ai/share/a'))
+
+        cache.ttl = 0.01
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('https://claude.ai/share/a'))
+
+    def test_size_eviction_drops_least_recently_used(self):
+        cache = ResponseCache(self.path, max_bytes=3500)
+        for name in 'abc':
+            url = f'https://claude.ai/share/{name}'
+            cache.put(url, 'ClaudeParser', b'x' * 900, self.conversation(url))
+        cache.get('https://claude.ai/share/a')
+        cache.put('https://claude.ai/share/d', 'ClaudeParser', b'x' * 900, self.conversation('https://claude.ai/share/d'))
+
+        self.assertIsNotNone(cache.get('https://claude.ai/share/a'))
+        self.assertIsNone(cache.get('https://claude.ai/share/b'))
+        count, size = cache.stats()
+        self.assertEqual(count, 3)
+        self.assertLessEqual(size, 3500)
+
+
+if __name__ == "__main__":
+    unittest.main()
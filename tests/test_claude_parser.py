@@ -1,5 +1,7 @@
 import unittest
+from unittest import mock
 from chatmix.parsers import ClaudeParser, Message, Conversation, Role
+from chatmix.parsers.claude.parser import has_marker_class
 from bs4 import BeautifulSoup
 
 
@@ -41,6 +43,64 @@ class TestClaudeParser(unittest.TestCase):
         self.assertEqual(conversation.messages[1].role, Role.ASSISTANT)
         self.assertIn("DNS record", conversation.messages[1].content)
 
+    def test_classified_messages_keep_document_order(self):
+        html = """
+        <div class="chat">
+            <div class="font-user-message"><p>First question?</p></div>
+            <div class="font-claude-message"><p>First answer.</p></div>
+            <div class="font-user-message"><p>Second question?</p></div>
+            <div class="font-claude-message">
+                <div class="claude-message-body"><p>Second answer.</p></div>
+            </div>
+        </div>
+        """
+
+        parser = ClaudeParser()
+        conversation = parser.parse_from_html(html, "https://claude.ai/example")
+
+        self.assertEqual(
+            [(m.role, m.content) for m in conversation.messages],
+            [
+                (Role.USER, "First question?"),
+                (Role.ASSISTANT, "First answer."),
+                (Role.USER, "Second question?"),
+                (Role.ASSISTANT, "Second answer."),
+            ]
+        )
+        self.assertTrue(conversation.messages[3].raw_html.startswith('<div class="font-claude-message">'))
+
+    def test_specific_markers_take_precedence(self):
+        html = """
+        <div class="user-avatar">U</div>
+        <div class="human-message">Hello there?</div>
+        <div class="assistant">Hi! How can I help?</div>
+        """
+
+        parser = ClaudeParser()
+        conversation = parser.parse_from_html(html, "https://claude.ai/example")
+
+        # The broad 'user' match is ignored because a specific marker exists,
+        # while the assistant falls back to the broad marker.
+        self.assertEqual(
+            [(m.role, m.content) for m in conversation.messages],
+            [(Role.USER, "Hello there?"), (Role.ASSISTANT, "Hi! How can I help?")]
+        )
+
+    def test_marker_classes(self):
+        self.assertTrue(has_marker_class('<div class="font-user-message">'))
+        self.assertTrue(has_marker_class("<div CLASS='x assistant'>"))
+        self.assertTrue(has_marker_class('<div class=claude>'))
+        self.assertFalse(has_marker_class('<div class="prose"><p>the user asks the assistant</p></div>'))
+        self.assertFalse(has_marker_class('<div data-class="user">'))
+
+    def test_class_selectors_are_skipped_without_marker_classes(self):
+        html = '<main><div class="prose"><p>the user asks</p><p>the assistant answers</p></div></main>'
+        with mock.patch.object(ClaudeParser, '_strategy', autospec=True, side_effect=ClaudeParser._strategy) as strategy:
+            conversation = ClaudeParser().parse_from_html(html, "https://claude.ai/example")
+
+        self.assertEqual([call.args[1] for call in strategy.call_args_list], ['main-paragraphs'])
+        self.assertEqual([m.content for m in conversation.messages], ['the user asks', 'the assistant answers'])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,133 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from chatmix import cli
+from chatmix.export import conversation_id
+from chatmix.parsers.models import Conversation
+from tests.support import CLAUDE_HTML, LocalServer
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def interrupt_after(count):
+    """Wrap cli._results so the run is interrupted after ``count`` results."""
+    results = cli._results
+
+    def wrapped(args, skip):
+        for seen, result in enumerate(results(args, skip)):
+            if seen == count:
+                raise KeyboardInterrupt
+            yield result
+    return wrapped
+
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.server = LocalServer({f'/share/{i}': [(200, CLAUDE_HTML)] for i in range(20) if i != 3})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.links = self.path('links.txt')
+        with open(self.links, 'w') as f:
+            f.write('# one link per line\n')
+            f.writelines(self.server.url(f'/share/{i}') + '\n' for i in range(20))
+
+    def conversation_ids(self, indexes):
+        return [conversation_id(Conversation(messages=[], url=self.server.url(f'/share/{i}'))) for i in indexes]
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def ingest(self, *argv):
+        stderr = io.StringIO()
+        with mock.patch('sys.stderr', stderr):
+            code = cli.main(['ingest', self.links, '--parser', 'claude', '--retries', '0', '--progress', '0', *argv])
+        return code, stderr.getvalue()
+
+    def test_jsonl_with_error_log(self):
+        output = self.path('out.jsonl')
+        code, log = self.ingest('-o', output)
+        self.assertEqual(code, 0)
+        self.assertIn('20 done, 19 ok, 1 errors', log)
+
+        with open(output) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 19 * 2)
+        self.assertEqual([row['conversation_id'] for row in rows[:4]], self.conversation_ids([0, 0, 1, 1]))
+        with open(output + '.errors.jsonl') as f:
+            errors = [json.loads(line) for line in f]
+        self.assertEqual([(e['index'], e['url']) for e in errors], [(3, self.server.url('/share/3'))])
+
+        # A finished run is not repeated
+        requests = len(self.server.requests)
+        self.assertEqual(self.ingest('-o', output)[0], 0)
+        self.assertEqual(len(self.server.requests), requests)
+
+    def test_resume_after_interrupt(self):
+        output = self.path('out.jsonl')
+        with mock.patch.object(cli, '_results', interrupt_after(12)):
+            code, log = self.ingest('-o', output, '--checkpoint-every', '5')
+        self.assertEqual(code, 130)
+        with open(output + '.checkpoint') as f:
+            self.assertEqual(json.load(f)['stats']['done'], 12)
+
+        self.server.requests.clear()
+        code, log = self.ingest('-o', output)
+        self.assertEqual(code, 0)
+        self.assertIn('Resuming after 12 inputs', log)
+        # Links before the checkpoint are not fetched again
+        self.assertEqual(sorted(path for path, _ in self.server.requests), sorted(f'/share/{i}' for i in range(12, 20)))
+
+        with open(output) as f:
+            ids = [json.loads(line)['conversation_id'] for line in f][::2]
+        self.assertEqual(ids, self.conversation_ids(i for i in range(20) if i != 3))
+        with open(output + '.errors.jsonl') as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+    def test_checkpoint_from_other_run(self):
+        output = self.path('out.jsonl')
+        with mock.patch.object(cli, '_results', interrupt_after(5)):
+            self.ingest('-o', output, '--checkpoint-every', '2')
+        code, log = self.ingest('-o', output, '--format', 'parquet')
+        self.assertEqual(code, 2)
+        self.assertIn('--restart', log)
+
+    def test_offline_directory(self):
+        pages = self.path('pages')
+        os.makedirs(os.path.join(pages, 'nested'))
+        for name in ('b.html', 'nested/a.html'):
+            with open(os.path.join(pages, name), 'w') as f:
+                f.write(CLAUDE_HTML)
+        with open(os.path.join(pages, 'notes.txt'), 'w') as f:
+            f.write('not a page')
+        output = self.path('out.jsonl')
+
+        with mock.patch('sys.stderr', io.StringIO()):
+            self.assertEqual(cli.main(['ingest', pages, '-o', output, '--parser', 'claude', '--progress', '0']), 0)
+        with open(output) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['role'], 'user')
+        self.assertEqual(self.server.requests, [])
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_parquet_resume(self):
+        output = self.path('dataset')
+        with mock.patch.object(cli, '_results', interrupt_after(12)):
+            self.assertEqual(self.ingest('-o', output, '--checkpoint-every', '5')[0], 130)
+        self.assertEqual(self.ingest('-o', output)[0], 0)
+
+        table = pq.read_table(output)
+        self.assertEqual(table.num_rows, 19 * 2)
+        self.assertEqual(len(set(table.column('conversation_id').to_pylist())), 19)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from chatmix.dedup import DedupStore, simhash
+from chatmix.parsers.models import Conversation, Message, Role
+
+ANSWER = (
+    'To redirect one domain to another, add a CNAME record for the www host '
+    'and configure an HTTP redirect at your registrar or web server, because '
+    'DNS alone cannot redirect the apex domain to a different site.'
+)
+
+
+def conversation(url, *turns):
+    messages = [
+        Message(role=Role.USER if i % 2 == 0 else Role.ASSISTANT, content=text, raw_html=f'<p>{text}</p>')
+        for i, text in enumerate(turns)
+    ]
+    return Conversation(messages=messages, url=url, title='Title')
+
+
+class TestDedupStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'dedup.sqlite')
+
+    def open(self, **kwargs):
+        store = DedupStore(self.path, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_identical_bodies_are_stored_once(self):
+        store = self.open()
+        first = conversation('https://claude.ai/share/1', 'hello', ANSWER)
+        store.add_many([first, conversation('https://claude.ai/share/2', 'hello', ANSWER, 'thanks')])
+
+        stats = store.stats()
+        self.assertEqual((stats.conversations, stats.messages), (2, 5))
+        # hello, ANSWER and thanks, each as content and as raw HTML
+        self.assertEqual(stats.bodies, 6)
+        self.assertGreater(stats.ratio, 1.5)
+
+        one, two = store.references(first.url), store.references('https://claude.ai/share/2')
+        self.assertEqual(one, two[:2])
+        self.assertEqual(store.body(one[1].content), ANSWER)
+        self.assertEqual(store.get(first.url), first)
+        self.assertIsNone(store.get('https://claude.ai/share/missing'))
+
+    def test_whitespace_variants_are_clustered_and_kept_exactly(self):
+        store = self.open()
+        first = conversation('https://claude.ai/share/1', 'def f():\n    return 1')
+        second = conversation('https://claude.ai/share/2', 'def f(): return 1')
+        third = conversation('https://claude.ai/share/3', 'def f():  return 1')
+        store.add_many([first, second, third])
+        store.add(conversation('https://claude.ai/share/4', 'def f(): return 1'))
+        refs = [store.references(url)[0] for url in store.urls()]
+        self.assertIsNone(refs[0].cluster)
+        self.assertEqual([ref.cluster for ref in refs[1:]], [refs[0].content] * 3)
+        self.assertEqual(refs[3].content, refs[1].content)
+        for original in (first, second, third):
+            self.assertEqual(store.get(original.url), original)
+
+        exact = DedupStore(os.path.join(self.tmp.name, 'exact.sqlite'), normalize=False)
+        self.addCleanup(exact.close)
+        exact.add(conversation('https://claude.ai/share/1', 'hello  world'))
+        exact.add(conversation('https://claude.ai/share/2', ' hello\nworld '))
+        self.assertEqual(exact.stats().bodies, 4)
+
+    def test_replacing_and_vacuum(self):
+        store = self.open()
+        store.add(conversation('https://claude.ai/share/1', 'old question'))
+        store.add(conversation('https://claude.ai/share/1', 'new question'))
+        self.assertEqual(store.stats().conversations, 1)
+        self.assertEqual(store.get('https://claude.ai/share/1').messages[0].content, 'new question')
+        self.assertEqual(store.vacuum(), 2)
+        self.assertEqual(store.stats().bodies, 2)
+
+    def test_vacuum_keeps_clusters_whose_first_body_was_removed(self):
+        store = self.open()
+        for index, text in enumerate(['hello world', 'hello  world', ' hello\nworld']):
+            store.add(conversation(f'https://claude.ai/share/{index}', text))
+        store.add(conversation('https://claude.ai/share/0', 'something else'))
+        store.vacuum()
+
+        first, second = (store.references(f'https://claude.ai/share/{index}')[0] for index in (1, 2))
+        self.assertIsNone(first.cluster)
+        self.assertEqual(second.cluster, first.content)
+        # Variants added later still find the cluster
+        store.add(conversation('https://claude.ai/share/3', 'hello\tworld'))
+        self.assertEqual(store.references('https://claude.ai/share/3')[0].cluster, first.content)
+
+    def test_near_duplicates(self):
+        self.assertLessEqual(bin(simhash(ANSWER) ^ simhash(ANSWER + ' Hope this helps.')).count('1'), 3)
+        self.assertIsNone(simhash('too short'))
+
+        store = self.open(near_duplicates=True)
+        store.add(conversation('https://claude.ai/share/1', 'q', ANSWER))
+        store.add(conversation('https://claude.ai/share/2', 'q', ANSWER.replace('.', '!')))
+        store.add(conversation('https://claude.ai/share/3', 'q', ANSWER.upper() + ' Really.'))
+        store.add(conversation('https://claude.ai/share/4', 'q', 'An unrelated answer about something else entirely, with many words.'))
+
+        original = store.references('https://claude.ai/share/1')[1]
+        self.assertIsNone(original.cluster)
+        for url in ('https://claude.ai/share/2', 'https://claude.ai/share/3'):
+            ref = store.references(url)[1]
+            self.assertNotEqual(ref.content, original.content)
+            self.assertEqual(ref.cluster, original.content)
+        self.assertIsNone(store.references('https://claude.ai/share/4')[1].cluster)
+
+    def test_rejects_distances_bands_cannot_find(self):
+        with self.assertRaises(ValueError):
+            DedupStore(self.path, near_duplicates=True, max_distance=8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import json
+import unittest
+from chatmix.parsers import ChatGPTParser, ClaudeParser, Role
+from chatmix.parsers.embedded import iter_json_payloads
+
+
+def next_data_page(data):
+    payload = json.dumps(data).replace('</', '<\\/')
+    return f"""
+    <html><head><title>Shared chat</title></head><body>
+    <div class="font-user-message">rendered copy that should be ignored</div>
+    <script id="__NEXT_DATA__" type="application/json">{payload}</script>
+    </body></html>
+    """
+
+
+CLAUDE_DATA = {
+    'props': {'pageProps': {'snapshot': {
+        'name': 'Redirecting Domains',
+        'chat_messages': [
+            {'sender': 'human', 'text': 'what domain record to redirect to a different domain?'},
+            {'sender': 'assistant', 'content': [
+                {'type': 'text', 'text': 'Use a CNAME record.'},
+                {'type': 'tool_use', 'name': 'search'},
+                {'type': 'text', 'text': 'Then wait for DNS to propagate </script> safely.'},
+            ]},
+        ],
+    }}},
+}
+
+CHATGPT_DATA = {
+    'props': {'pageProps': {'serverResponse': {'data': {
+        'title': 'Coconut and DeepSeek R1',
+        'current_node': 'c',
+        'mapping': {
+            'root': {'parent': None, 'children': ['sys'], 'message': None},
+            'sys': {'parent': 'root', 'children': ['a'], 'message': {
+                'author': {'role': 'system'}, 'content': {'content_type': 'text', 'parts': ['hidden']}}},
+            'a': {'parent': 'sys', 'children': ['b', 'b2'], 'message': {
+                'author': {'role': 'user'}, 'content': {'content_type': 'text', 'parts': ['Does Coconut work on R1?']}}},
+            'b2': {'parent': 'a', 'children': [], 'message': {
+                'author': {'role': 'assistant'}, 'content': {'content_type': 'text', 'parts': ['An abandoned branch']}}},
+            'b': {'parent': 'a', 'children': ['c'], 'message': {
+                'author': {'role': 'assistant'}, 'content': {'content_type': 'text', 'parts': ['Yes, it does.']}}},
+            'c': {'parent': 'b', 'children': [], 'message': {
+                'author': {'role': 'user'}, 'content': {'content_type': 'text', 'parts': ['Thanks!']}}},
+        },
+    }}}},
+}
+
+
+class TestEmbeddedJson(unittest.TestCase):
+    def test_claude_chat_messages(self):
+        conversation = ClaudeParser().parse_from_html(next_data_page(CLAUDE_DATA), 'https://claude.ai/share/x')
+
+        self.assertEqual(conversation.title, 'Redirecting Domains')
+        self.assertEqual(
+            [(m.role, m.content) for m in conversation.messages],
+            [
+                (Role.USER, 'what domain record to redirect to a different domain?'),
+                (Role.ASSISTANT, 'Use a CNAME record.\n\nThen wait for DNS to propagate </script> safely.'),
+            ]
+        )
+
+    def test_chatgpt_follows_current_branch(self):
+        conversation = ChatGPTParser().parse_from_html(next_data_page(CHATGPT_DATA), 'https://chatgpt.com/share/x')
+
+        self.assertEqual(conversation.title, 'Coconut and DeepSeek R1')
+        self.assertEqual(
+            [(m.role, m.content) for m in conversation.messages],
+            [(Role.USER, 'Does Coconut work on R1?'), (Role.ASSISTANT, 'Yes, it does.'), (Role.USER, 'Thanks!')]
+        )
+
+    def test_searches_raw_bytes(self):
+        page = next_data_page(CHATGPT_DATA).encode('utf-8')
+        self.assertEqual(list(iter_json_payloads(page)), [CHATGPT_DATA])
+        self.assertEqual(len(ChatGPTParser().parse_embedded(page, 'u').messages), 3)
+
+    def test_inline_assignment(self):
+        page = f'<script>window.__remixContext = {json.dumps(CHATGPT_DATA)};</script>'
+        self.assertEqual(list(iter_json_payloads(page)), [CHATGPT_DATA])
+
+    def test_falls_back_to_dom(self):
+        page = """
+        <script id="__NEXT_DATA__" type="application/json">{"props": {}}</script>
+        <div data-message-author-role="user"><p>What is 2 + 2?</p></div>
+        <div data-message-author-role="assistant"><p>4</p></div>
+        """
+        conversation = ChatGPTParser().parse_from_html(page, 'u')
+
+        self.assertEqual(
+            [(m.role, m.content) for m in conversation.messages],
+            [(Role.USER, 'What is 2 + 2?'), (Role.ASSISTANT, '4')]
+        )
+
+    def test_malformed_payload_falls_back_to_dom(self):
+        def node(**message):
+            return {'parent': None, 'children': [], 'message': message}
+
+        payloads = [
+            {'config': {'mapping': {'a': 1}}},
+            {'mapping': {'a': node(author='user', content={'parts': ['hi']})}},
+            {'mapping': {'a': node(author={'role': 'user'}, content='hi')}},
+            {'mapping': {'a': node(author={'role': 'user'}, content={'parts': 'hi'})}},
+            {'mapping': {'a': {'parent': None, 'children': 'b', 'message': None}}},
+            {'current_node': ['a'], 'mapping': {}},
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                page = f"""<html><script type="application/json">{json.dumps(payload)}</script>
+                <body><div data-message-author-role="user">hi</div></body></html>"""
+                conversation = ChatGPTParser().parse_from_html(page, 'u')
+                self.assertEqual([(m.role, m.content) for m in conversation.messages], [(Role.USER, 'hi')])
+                self.assertEqual(conversation.messages[0].raw_html, '<div data-message-author-role="user">hi</div>')
+
+    def test_malformed_claude_payload_falls_back_to_dom(self):
+        payloads = [
+            {'chat_messages': [{'sender': ['human'], 'text': 'hi'}]},
+            {'chat_messages': [{'sender': {'role': 'human'}, 'text': 'hi'}]},
+            {'chat_messages': [{'sender': 'human', 'text': ['hi']}]},
+            {'chat_messages': [{'sender': 'human', 'content': 'hi'}]},
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                page = f"""<html><script type="application/json">{json.dumps(payload)}</script>
+                <body><div class="font-user-message">from the page</div></body></html>"""
+                conversation = ClaudeParser().parse_from_html(page, 'u')
+                self.assertEqual([(m.role, m.content) for m in conversation.messages], [(Role.USER, 'from the page')])
+                self.assertEqual(conversation.messages[0].raw_html, '<div class="font-user-message">from the page</div>')
+
+    def test_claude_title_must_be_a_string(self):
+        data = {'name': 5, 'chat_messages': [{'sender': 'human', 'text': 'hi'}]}
+        conversation = ClaudeParser().parse_from_html(next_data_page(data), 'u')
+        self.assertEqual([m.content for m in conversation.messages], ['hi'])
+        self.assertIsNone(conversation.title)
+
+
+if __name__ == "__main__":
+    unittest.main()
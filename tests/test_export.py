@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+from chatmix.export import JSONLWriter, conversation_id, count_code_blocks, export_conversations
+from chatmix.parsers.models import Conversation, Message, Role
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def make_conversation(url, turns):
+    messages = [
+        Message(role=Role.USER if i % 2 == 0 else Role.ASSISTANT, content=f'turn {i}')
+        for i in range(turns)
+    ]
+    return Conversation(messages=messages, url=url)
+
+
+SHARE_URL = 'https://claude.ai/share/0b7c8e0e-6a3d-4c36-9a1e-3f5f2b0c1d2e'
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_conversation_id(self):
+        self.assertEqual(
+            conversation_id(make_conversation(SHARE_URL, 0)),
+            '0b7c8e0e-6a3d-4c36-9a1e-3f5f2b0c1d2e'
+        )
+        # URLs without an ID segment get a stable hash
+        first = conversation_id(make_conversation('https://example.com/', 0))
+        self.assertEqual(first, conversation_id(make_conversation('https://example.com/', 0)))
+        self.assertEqual(len(first), 32)
+
+    def test_count_code_blocks(self):
+        html = '<div><pre><code>a</code></pre><pre class="x">b</pre><p>preamble</p></div>'
+        self.assertEqual(count_code_blocks(Message(Role.ASSISTANT, 'a b preamble', html)), 2)
+        self.assertEqual(count_code_blocks(Message(Role.ASSISTANT, 'x\n```py\na\n```', '')), 1)
+        self.assertEqual(count_code_blocks(Message(Role.ASSISTANT, 'no code', '')), 0)
+        # With markup, fences in the text are prose, not code blocks
+        self.assertEqual(count_code_blocks(Message(Role.ASSISTANT, 'use ``` then ```', '<p>use ``` then ```</p>')), 0)
+        # Without the markup, text from a <pre> looks like any other text
+        self.assertIsNone(count_code_blocks(Message(Role.ASSISTANT, 'a b preamble', None)))
+
+    def test_jsonl_rows_and_append(self):
+        path = os.path.join(self.tmp.name, 'out.jsonl')
+        with JSONLWriter(path) as writer:
+            writer.write(make_conversation(SHARE_URL, 3))
+        self.assertEqual(writer.rows_written, 3)
+        export_conversations([make_conversation(SHARE_URL + 'f', 2)], path, append=True)
+
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0], {
+            'conversation_id': '0b7c8e0e-6a3d-4c36-9a1e-3f5f2b0c1d2e',
+            'turn_index': 0,
+            'role': 'user',
+            'content': 'turn 0',
+            'code_blocks': None,
+        })
+        self.assertEqual([r['turn_index'] for r in rows], [0, 1, 2, 0, 1])
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_parquet_row_groups_and_append(self):
+        path = os.path.join(self.tmp.name, 'dataset')
+        conversations = [make_conversation(f'{SHARE_URL[:-2]}{i:02d}', 4) for i in range(5)]
+        self.assertEqual(export_conversations(conversations, path, row_group_size=8), 20)
+        self.assertEqual(export_conversations(conversations[:1], path, append=True), 4)
+
+        parts = sorted(os.listdir(path))
+        self.assertEqual(parts, ['part-00000.parquet', 'part-00001.parquet'])
+        first = pq.ParquetFile(os.path.join(path, parts[0]))
+        self.assertEqual(first.metadata.num_row_groups, 3)
+
+        table = pq.read_table(path)
+        self.assertEqual(table.column_names, ['conversation_id', 'turn_index', 'role', 'content', 'code_blocks'])
+        self.assertEqual(table.num_rows, 24)
+        self.assertEqual(table.column('role').to_pylist()[:2], ['user', 'assistant'])
+
+        # Without append the dataset is replaced
+        export_conversations(conversations[:1], path)
+        self.assertEqual(pq.read_table(path).num_rows, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
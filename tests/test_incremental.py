@@ -0,0 +1,70 @@
+import unittest
+from chatmix.parsers import ClaudeParser, Conversation, Message, Role
+from chatmix.parsers.incremental import message_key, update_conversation
+from tests.support import LocalServer
+
+
+def claude_page(texts):
+    turns = ''.join(
+        f'<div class="font-{"user" if i % 2 == 0 else "claude"}-message"><p>{text}</p></div>'
+        for i, text in enumerate(texts)
+    )
+    return f'<main><header>Title</header>{turns}</main>'
+
+
+class TestIncrementalUpdate(unittest.TestCase):
+    def setUp(self):
+        self.parser = ClaudeParser(backend='html.parser')
+        self.url = 'https://claude.ai/share/abc'
+        self.texts = ['first question?', 'first answer', 'second question?', 'second answer']
+        self.previous = self.parser.parse_from_html(claude_page(self.texts), self.url)
+
+    def test_appended_turns(self):
+        update = self.parser.update_from_html(self.previous, claude_page(self.texts + ['third?', 'third answer']))
+
+        self.assertTrue(update.modified)
+        self.assertEqual(update.prefix, 4)
+        self.assertEqual(update.added, [4, 5])
+        self.assertEqual((update.changed, update.removed), ([], []))
+        self.assertEqual([m.content for m in update.new_messages], ['third?', 'third answer'])
+        # Unchanged turns are the previous objects
+        for old, new in zip(self.previous.messages, update.conversation.messages):
+            self.assertIs(old, new)
+
+    def test_changed_and_removed_turns(self):
+        texts = ['first question?', 'a better answer', 'second question?']
+        update = self.parser.update_from_html(self.previous, claude_page(texts))
+
+        self.assertEqual(update.prefix, 1)
+        self.assertEqual(update.changed, [1])
+        self.assertEqual(update.removed, [3])
+        self.assertEqual(update.added, [])
+        self.assertIs(update.conversation.messages[2], self.previous.messages[2])
+        self.assertEqual([m.content for m in update.conversation.messages], texts)
+
+    def test_unchanged_page(self):
+        update = self.parser.update_from_html(self.previous, claude_page(self.texts))
+        self.assertFalse(update.modified)
+        self.assertEqual(update.prefix, 4)
+
+    def test_message_key_ignores_markup(self):
+        plain = Message(role=Role.USER, content='hi', raw_html='<p>hi</p>')
+        self.assertEqual(message_key(plain), message_key(Message(role=Role.USER, content='hi')))
+        self.assertNotEqual(message_key(plain), message_key(Message(role=Role.ASSISTANT, content='hi')))
+
+    def test_title_change_is_a_modification(self):
+        renamed = Conversation(messages=list(self.previous.messages), url=self.url, title='Renamed')
+        update = update_conversation(self.previous, renamed)
+        self.assertTrue(update.modified)
+        self.assertEqual(update.prefix, 4)
+
+    def test_update_from_url(self):
+        with LocalServer({'/share/abc': [(200, claude_page(self.texts + ['more?']))]}) as server:
+            previous = self.parser.parse_from_html(claude_page(self.texts), server.url('/share/abc'))
+            update = self.parser.update_from_url(previous)
+        self.assertEqual(update.added, [4])
+        self.assertEqual(update.conversation.url, previous.url)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from chatmix.index import InvertedIndex, parse_query
+from chatmix.parsers.models import Conversation, Message, Role
+
+
+def conversation(share_id, *turns):
+    messages = [
+        Message(role=Role.USER if i % 2 == 0 else Role.ASSISTANT, content=text)
+        for i, text in enumerate(turns)
+    ]
+    return Conversation(messages=messages, url=f'https://claude.ai/share/{share_id}')
+
+
+DNS = conversation(
+    'dns-0000-0000-0000-000000000001',
+    'What DNS record redirects my domain?',
+    'Use a CNAME record for www, and an HTTP redirect for the apex. A DNS record alone cannot redirect.',
+)
+PYTHON = conversation(
+    'py-00000-0000-0000-000000000002',
+    'How do I read a file in Python?',
+    'Open it with a with statement: the record of every line is then in memory.',
+)
+
+
+class TestInvertedIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'index')
+
+    def open(self, **kwargs):
+        index = InvertedIndex(self.path, **kwargs)
+        self.addCleanup(index.close)
+        return index
+
+    def hits(self, index, query, **kwargs):
+        return [(hit.conversation_id[:3], hit.turn_index) for hit in index.search(query, **kwargs)]
+
+    def test_terms_roles_and_phrases(self):
+        index = self.open()
+        self.assertEqual(index.add([DNS, PYTHON]), 4)
+        self.assertEqual(len(index), 4)
+
+        self.assertEqual(self.hits(index, 'record'), [('dns', 0), ('dns', 1), ('py-', 1)])
+        self.assertEqual(self.hits(index, 'RECORD dns'), [('dns', 0), ('dns', 1)])
+        self.assertEqual(self.hits(index, 'record', role=Role.USER), [('dns', 0)])
+        self.assertEqual(self.hits(index, '"dns record"'), [('dns', 0), ('dns', 1)])
+        self.assertEqual(self.hits(index, '"record dns"'), [])
+        self.assertEqual(self.hits(index, '"cname record" apex'), [('dns', 1)])
+        self.assertEqual(self.hits(index, 'missing'), [])
+        self.assertEqual(self.hits(index, ''), [])
+        self.assertEqual(len(index.search('record', limit=2)), 2)
+
+        hit = index.search('python')[0]
+        self.assertEqual(hit.url, PYTHON.url)
+        self.assertEqual(hit.role, Role.USER)
+
+    def test_incremental_adds_and_replacement(self):
+        index = self.open(segment_messages=1)
+        index.add([DNS])
+        index.add([PYTHON])
+        self.assertEqual(self.hits(index, 'record'), [('dns', 0), ('dns', 1), ('py-', 1)])
+
+        # Re-adding a conversation replaces the earlier copy
+        updated = conversation('dns-0000-0000-0000-000000000001', 'What record points mail at my server?', 'An MX record.')
+        index.add([updated])
+        self.assertEqual(self.hits(index, 'record'), [('py-', 1), ('dns', 0), ('dns', 1)])
+        self.assertEqual(self.hits(index, 'cname'), [])
+        self.assertEqual(len(index), 4)
+
+        # Another reader sees the same index, including after compaction
+        reader = InvertedIndex(self.path)
+        self.addCleanup(reader.close)
+        self.assertEqual(self.hits(reader, 'mx'), [('dns', 1)])
+        segments = len(os.listdir(self.path))
+        replaced = [segment for segment, _ in index._snapshot]
+        index.compact()
+        self.assertLess(len(os.listdir(self.path)), segments)
+        self.assertTrue(all(segment._mmap.closed for segment in replaced))
+        self.assertEqual(self.hits(index, 'record'), [('py-', 1), ('dns', 0), ('dns', 1)])
+        self.assertEqual(self.hits(index, '"mx record"'), [('dns', 1)])
+        dropped = [segment for segment, _ in reader._snapshot]
+        reader.refresh()
+        self.assertTrue(all(segment._mmap.closed for segment in dropped))
+        self.assertEqual(self.hits(reader, 'cname'), [])
+
+    def test_reopen(self):
+        index = self.open()
+        index.add([DNS, PYTHON])
+        index.close()
+        reopened = self.open()
+        self.assertEqual(self.hits(reopened, '"with statement"'), [('py-', 1)])
+
+    def test_parse_query(self):
+        query = parse_query('Redirect "DNS record" "apex" don\'t')
+        self.assertEqual(query.terms, ('redirect', 'apex'))
+        self.assertEqual(query.phrases, (('dns', 'record'), ('don', 't')))
+
+
+if __name__ == '__main__':
+    unittest.main()
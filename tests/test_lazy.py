@@ -0,0 +1,107 @@
+import pickle
+import unittest
+from unittest import mock
+from bs4 import Tag
+from chatmix.parsers import ChatGPTParser, ClaudeParser, LazyMessage, MemoCache, Message, Role
+from chatmix.parsers import utils
+from tests.support import CLAUDE_HTML
+
+
+CLASSIFIED_HTML = """
+<header>Tables and code</header>
+<div class="font-user-message"><p>Show me a <code>dict</code> and a table.</p></div>
+<div class="font-claude-message">
+    <p>Here you go:</p>
+    <pre><code class="language-python">counts = {"a": 1}
+</code></pre>
+    <table>
+        <thead><tr><th>Key</th><th>Value</th></tr></thead>
+        <tbody><tr><td>a</td><td>1</td></tr></tbody>
+    </table>
+</div>
+<div class="font-user-message"><p>   </p></div>
+"""
+
+CHATGPT_HTML = """
+<title>Arithmetic</title>
+<main>
+<article><div data-message-author-role="user"><div>What is 2 + 2?</div></div></article>
+<article><div data-message-author-role="assistant"><div><p>It is <strong>4</strong>.</p></div></div></article>
+</main>
+"""
+
+MAIN_PARAGRAPHS_HTML = """
+<main>
+    <p>First question?</p>
+    <p>An answer.</p>
+    <p>More of it.</p>
+</main>
+"""
+
+
+class TestLazyMessages(unittest.TestCase):
+    def assertSameConversation(self, parser_cls, html, **kwargs):
+        url = 'https://example.com/share/abc'
+        eager = parser_cls(**kwargs).parse_from_html(html, url)
+        lazy = parser_cls(lazy=True, **kwargs).parse_from_html(html, url)
+        self.assertTrue(all(isinstance(message, LazyMessage) for message in lazy.messages))
+        self.assertEqual(lazy.title, eager.title)
+        self.assertEqual(lazy.messages, eager.messages)
+        self.assertEqual(lazy.to_dict(), eager.to_dict())
+        return lazy
+
+    def test_matches_eager_parsing(self):
+        lazy = self.assertSameConversation(ClaudeParser, CLASSIFIED_HTML)
+        # The whitespace-only message is dropped without building its text
+        self.assertEqual([m.role for m in lazy.messages], [Role.USER, Role.ASSISTANT])
+        self.assertSameConversation(ClaudeParser, CLAUDE_HTML)
+        self.assertSameConversation(ClaudeParser, MAIN_PARAGRAPHS_HTML)
+        self.assertSameConversation(ChatGPTParser, CHATGPT_HTML)
+        lazy = self.assertSameConversation(ClaudeParser, CLASSIFIED_HTML, keep_raw_html=False)
+        self.assertIsNone(lazy.messages[1].raw_html)
+
+    def test_text_is_built_on_first_access_only(self):
+        with mock.patch.object(Tag, 'get_text', autospec=True, side_effect=Tag.get_text) as get_text:
+            conversation = ClaudeParser(lazy=True).parse_from_html(CLASSIFIED_HTML, 'https://example.com')
+            self.assertEqual(conversation.title, 'Tables and code')
+            self.assertEqual(len(conversation.messages), 2)
+            # Only the title's text was built
+            self.assertEqual(get_text.call_count, 1)
+
+            message = conversation.messages[1]
+            self.assertIn('Here you go:', message.content)
+            self.assertEqual(message.content, message.content)
+            self.assertEqual(get_text.call_count, 2)
+        self.assertIs(message.raw_html, message.raw_html)
+
+    def test_extractors_match_reparsing_raw_html(self):
+        conversation = ClaudeParser(lazy=True).parse_from_html(CLASSIFIED_HTML, 'https://example.com')
+        message = conversation.messages[1]
+        self.assertEqual(message.markdown, utils.html_to_markdown(message.raw_html))
+        self.assertEqual(message.code_blocks, [{'language': 'python', 'content': 'counts = {"a": 1}\n'}])
+        self.assertEqual(message.tables, utils.extract_tables(message.raw_html))
+        self.assertIs(message.code_blocks, message.code_blocks)
+
+        conversation = ClaudeParser(lazy=True).parse_from_html(MAIN_PARAGRAPHS_HTML, 'https://example.com')
+        message = conversation.messages[1]
+        self.assertEqual(message.markdown, utils.html_to_markdown(message.raw_html))
+
+    def test_pickles_and_materializes_as_plain_messages(self):
+        conversation = ClaudeParser(lazy=True).parse_from_html(CLASSIFIED_HTML, 'https://example.com')
+        message = conversation.messages[0]
+        for plain in (pickle.loads(pickle.dumps(message)), message.materialize()):
+            self.assertIs(type(plain), Message)
+            self.assertEqual(plain, message)
+            self.assertEqual(hash(plain), hash(message))
+        self.assertEqual(pickle.loads(pickle.dumps(conversation)), conversation)
+
+    def test_lazy_parses_bypass_the_memo(self):
+        memo = MemoCache()
+        parser = ClaudeParser(lazy=True, memo=memo)
+        parser.parse_from_html(CLAUDE_HTML, 'https://example.com')
+        parser.parse_from_html(CLAUDE_HTML, 'https://example.com')
+        self.assertEqual(memo.stats().entries, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import dataclasses
+import threading
+import unittest
+from chatmix.parsers import ClaudeParser, utils
+from chatmix.parsers.backends import available_backends
+from chatmix.parsers.memo import MemoCache, content_key
+from tests.support import CLAUDE_HTML
+
+
+class TestParseMemo(unittest.TestCase):
+    def test_repeated_html_is_parsed_once(self):
+        memo = MemoCache()
+        parser = ClaudeParser(memo=memo)
+        first = parser.parse_from_html(CLAUDE_HTML, 'https://claude.ai/share/a')
+        second = parser.parse_from_html(CLAUDE_HTML, 'https://claude.ai/share/a')
+        other_url = parser.parse_from_html(CLAUDE_HTML, 'https://claude.ai/share/b')
+
+        self.assertEqual(first, second)
+        self.assertEqual(other_url.url, 'https://claude.ai/share/b')
+        stats = memo.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 2, 2))
+
+    def test_results_do_not_share_state(self):
+        parser = ClaudeParser(memo=MemoCache())
+        first = parser.parse_from_html(CLAUDE_HTML, 'u')
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            first.messages[0].content = 'changed'
+        first.messages.pop()
+
+        second = parser.parse_from_html(CLAUDE_HTML, 'u')
+        self.assertEqual(len(second.messages), 2)
+        self.assertIn('domain record', second.messages[0].content)
+
+    def test_markdown_memo(self):
+        memo = MemoCache()
+        html = '<h1>Title</h1><p>Body</p>'
+        self.assertEqual(utils.html_to_markdown(html, memo=memo), utils.html_to_markdown(html))
+        self.assertEqual(utils.html_to_markdown(html, memo=memo), '# Title\n\nBody')
+        self.assertEqual(memo.stats().hits, 1)
+
+    def test_backends_do_not_share_entries(self):
+        memo = MemoCache()
+        html = '<main><p>hi<p>there</main>'
+        for backend in available_backends():
+            with self.subTest(backend=backend):
+                expected = ClaudeParser(backend=backend).parse_from_html(html, 'u')
+                self.assertEqual(ClaudeParser(backend=backend, memo=memo).parse_from_html(html, 'u'), expected)
+                markdown = utils.html_to_markdown('<ul><li>a<li>b</ul>', backend=backend)
+                self.assertEqual(utils.html_to_markdown('<ul><li>a<li>b</ul>', backend=backend, memo=memo), markdown)
+        self.assertEqual(memo.stats().hits, 0)
+
+
+class TestMemoCache(unittest.TestCase):
+    def test_evicts_least_recently_used_over_max_bytes(self):
+        memo = MemoCache(max_bytes=10)
+        memo.put(b'a', 'a', 4)
+        memo.put(b'b', 'b', 4)
+        memo.get(b'a')
+        memo.put(b'c', 'c', 4)
+
+        self.assertEqual(memo.get(b'a'), 'a')
+        self.assertIsNone(memo.get(b'b'))
+        stats = memo.stats()
+        self.assertEqual((stats.evictions, stats.entries, stats.size), (1, 2, 8))
+
+    def test_evicts_over_max_entries(self):
+        memo = MemoCache(max_entries=2)
+        for key in (b'a', b'b', b'c'):
+            memo.put(key, key, 1)
+        self.assertIsNone(memo.get(b'a'))
+        self.assertEqual(memo.stats().evictions, 1)
+
+    def test_concurrent_access(self):
+        memo = MemoCache(max_entries=50)
+
+        def work(offset):
+            for i in range(500):
+                key = content_key(str((offset + i) % 80))
+                memo.get_or_compute(key, lambda: i, lambda value: 1)
+
+        threads = [threading.Thread(target=work, args=(n * 7,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = memo.stats()
+        self.assertEqual(stats.hits + stats.misses, 4000)
+        self.assertEqual(stats.entries, 50)
+        self.assertEqual(stats.size, 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
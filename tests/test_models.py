@@ -0,0 +1,41 @@
+import dataclasses
+import pickle
+import unittest
+from chatmix.parsers import ClaudeParser, Conversation, Message, Role
+from tests.test_streaming import CLAUDE_PAGE
+
+
+class TestModels(unittest.TestCase):
+    def test_messages_are_frozen_and_slotted(self):
+        message = Message(role=Role.USER, content='hi')
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            message.content = 'changed'
+        self.assertFalse(hasattr(message, '__dict__'))
+
+    def test_role_strings_become_shared_members(self):
+        message = Message(role='assistant', content='hi')
+        self.assertIs(message.role, Role.ASSISTANT)
+
+    def test_round_trips(self):
+        conversation = Conversation(
+            messages=[Message(role=Role.USER, content='hi', raw_html='<p>hi</p>')],
+            url='https://claude.ai/share/x',
+            title='Greeting',
+        )
+        self.assertEqual(Conversation.from_dict(conversation.to_dict()), conversation)
+        self.assertEqual(pickle.loads(pickle.dumps(conversation)), conversation)
+
+
+class TestKeepRawHtml(unittest.TestCase):
+    def test_raw_html_can_be_dropped(self):
+        parser = ClaudeParser(keep_raw_html=False)
+        parsed = parser.parse_from_html(CLAUDE_PAGE, 'u')
+        streamed = list(parser.iter_messages_from_html(CLAUDE_PAGE))
+
+        self.assertEqual(len(parsed.messages), 3)
+        self.assertTrue(all(m.raw_html is None for m in parsed.messages + streamed))
+        self.assertEqual([m.content for m in streamed], [m.content for m in parsed.messages])
+
+
+if __name__ == "__main__":
+    unittest.main()
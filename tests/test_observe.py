@@ -0,0 +1,119 @@
+import unittest
+import requests
+from chatmix.parsers import ChatGPTParser, ClaudeParser, MemoCache, MetricsObserver, ParseObserver
+from chatmix.parsers.observe import OpenTelemetryObserver
+from tests.support import CLAUDE_HTML, LocalServer
+from tests.test_embedded import CLAUDE_DATA, next_data_page
+from tests.test_streaming import CHATGPT_PAGE
+
+
+class RecordingObserver(ParseObserver):
+    def __init__(self):
+        self.fetches = []
+        self.parses = []
+
+    def on_fetch(self, event):
+        self.fetches.append(event)
+
+    def on_parse(self, event):
+        self.parses.append(event)
+
+
+class TestObserver(unittest.TestCase):
+    def test_reports_fetch_and_parse(self):
+        observer = RecordingObserver()
+        parser = ClaudeParser(observer=observer)
+        routes = {'/share/1': [(200, CLAUDE_HTML)], '/missing': [(404, 'gone')]}
+        with LocalServer(routes) as server:
+            conversation = parser.parse_from_url(server.url('/share/1'))
+            with self.assertRaises(requests.HTTPError):
+                parser.parse_from_url(server.url('/missing'))
+
+        ok, missing = observer.fetches
+        self.assertEqual((ok.status, ok.size), (200, len(CLAUDE_HTML.encode('utf-8'))))
+        self.assertEqual(missing.status, 404)
+        self.assertGreater(ok.seconds, 0)
+
+        [parse] = observer.parses
+        self.assertEqual(parse.strategy, 'main-paragraphs')
+        self.assertEqual(parse.messages, len(conversation.messages))
+        self.assertGreater(parse.soup_seconds, 0)
+        self.assertLessEqual(parse.soup_seconds, parse.seconds)
+
+    def test_strategy_names(self):
+        observer = RecordingObserver()
+        claude = ClaudeParser(observer=observer, memo=MemoCache())
+        claude.parse_from_html(next_data_page(CLAUDE_DATA), 'u')
+        claude.parse_from_html('<main><p>Question</p><p>Answer</p></main>', 'u')
+        claude.parse_from_html('<main><p>Question</p><p>Answer</p></main>', 'u')
+        ChatGPTParser(observer=observer).parse_from_html(CHATGPT_PAGE, 'u')
+
+        self.assertEqual(
+            [event.strategy for event in observer.parses],
+            ['embedded-json', 'main-paragraphs', 'memo', 'author-role']
+        )
+        # Embedded JSON and memo hits never build the DOM
+        self.assertEqual(observer.parses[0].soup_seconds, 0)
+        self.assertEqual(observer.parses[2].soup_seconds, 0)
+
+    def test_metrics_observer(self):
+        metrics = MetricsObserver()
+        parser = ClaudeParser(observer=metrics)
+        with LocalServer({'/share/1': [(200, CLAUDE_HTML)]}) as server:
+            for _ in range(3):
+                parser.parse_from_url(server.url('/share/1'))
+
+        totals = metrics.snapshot()
+        self.assertEqual((totals.fetches, totals.parses, totals.fetch_errors), (3, 3, 0))
+        self.assertEqual(totals.bytes_received, 3 * len(CLAUDE_HTML.encode('utf-8')))
+        self.assertEqual(totals.strategies, {'main-paragraphs': 3})
+        self.assertEqual(totals.messages, 6)
+
+
+class FakeSpan:
+    def __init__(self, name, start_time, attributes):
+        self.name = name
+        self.start_time = start_time
+        self.attributes = attributes
+        self.end_time = None
+        self.exceptions = []
+
+    def record_exception(self, error):
+        self.exceptions.append(error)
+
+    def set_status(self, status):
+        pass
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class FakeTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time=None, attributes=None):
+        span = FakeSpan(name, start_time, attributes)
+        self.spans.append(span)
+        return span
+
+
+class TestOpenTelemetryObserver(unittest.TestCase):
+    def test_spans_have_explicit_times_and_attributes(self):
+        tracer = FakeTracer()
+        parser = ClaudeParser(observer=OpenTelemetryObserver(tracer))
+        with LocalServer({'/share/1': [(200, CLAUDE_HTML)]}) as server:
+            parser.parse_from_url(server.url('/share/1'))
+
+        fetch, parse = tracer.spans
+        self.assertEqual(fetch.name, 'chatmix.fetch')
+        self.assertEqual(fetch.attributes['http.response.status_code'], 200)
+        self.assertEqual(parse.name, 'chatmix.parse')
+        self.assertEqual(parse.attributes['chatmix.strategy'], 'main-paragraphs')
+        self.assertEqual(parse.attributes['chatmix.messages'], 2)
+        for span in tracer.spans:
+            self.assertGreaterEqual(span.end_time, span.start_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
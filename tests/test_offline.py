@@ -0,0 +1,145 @@
+import gzip
+import os
+import tempfile
+import unittest
+from chatmix.parsers import ClaudeParser, Role
+from chatmix.parsers.offline import canonical_url, iter_saved_pages, iter_warc, parse_saved_pages
+from tests.support import CLAUDE_HTML
+
+CANONICAL = 'https://claude.ai/share/0b7c8e0e-6a3d-4c36-9a1e-3f5f2b0c1d2e'
+
+
+def warc_record(kind, uri, block, content_type):
+    head = (
+        f'WARC/1.0\r\nWARC-Type: {kind}\r\nWARC-Target-URI: {uri}\r\n'
+        f'Content-Type: {content_type}\r\nContent-Length: {len(block)}\r\n\r\n'
+    ).encode()
+    return head + block + b'\r\n\r\n'
+
+
+def http_response(status, body, headers=''):
+    return f'HTTP/1.1 {status} X\r\nContent-Type: text/html; charset=utf-8\r\n{headers}\r\n'.encode() + body
+
+
+def chunked(body):
+    return b'%x\r\n%s\r\n0\r\n\r\n' % (len(body), body)
+
+
+class TestOffline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        page = CLAUDE_HTML.encode()
+        os.makedirs(os.path.join(self.root, 'pages', 'nested'))
+        with open(os.path.join(self.root, 'pages', 'b.html'), 'wb') as f:
+            f.write(page.replace(b'<main>', f'<head><link href="{CANONICAL}" rel="canonical"></head><main>'.encode()))
+        with gzip.open(os.path.join(self.root, 'pages', 'nested', 'a.html.gz'), 'wb') as f:
+            f.write(page)
+        with open(os.path.join(self.root, 'pages', 'notes.txt'), 'w') as f:
+            f.write('not a page')
+
+        self.warc = os.path.join(self.root, 'crawl.warc.gz')
+        records = [
+            warc_record('warcinfo', '', b'software: test', 'application/warc-fields'),
+            warc_record('response', 'https://claude.ai/share/one', http_response(200, page), 'application/http; msgtype=response'),
+            warc_record('response', 'https://claude.ai/share/gone', http_response(404, b'gone'), 'application/http; msgtype=response'),
+            warc_record('response', 'https://claude.ai/share/two', http_response(
+                200, chunked(gzip.compress(page)), 'Transfer-Encoding: chunked\r\nContent-Encoding: gzip\r\n'
+            ), 'application/http; msgtype=response'),
+            warc_record('request', 'https://claude.ai/share/one', b'GET / HTTP/1.1\r\n\r\n', 'application/http; msgtype=request'),
+            warc_record('resource', 'https://claude.ai/share/three', page, 'text/html'),
+        ]
+        with gzip.open(self.warc, 'wb') as f:
+            # One gzip member per record, as crawlers write them
+            for record in records:
+                f.write(record)
+
+    def test_canonical_url(self):
+        self.assertEqual(canonical_url(f'<link rel=canonical href="{CANONICAL}">'.encode()), CANONICAL)
+        og = b'<meta content="https://chatgpt.com/share/x?a=1&amp;b=2" property="og:url">'
+        self.assertEqual(canonical_url(og), 'https://chatgpt.com/share/x?a=1&b=2')
+        self.assertIsNone(canonical_url(b'<link rel="canonical" href="/relative">'))
+
+    def test_warc_records(self):
+        pages = list(iter_warc(self.warc))
+        self.assertEqual(
+            [page.url for page in pages],
+            ['https://claude.ai/share/one', 'https://claude.ai/share/two', 'https://claude.ai/share/three'],
+        )
+        self.assertEqual({page.load()[1] for page in pages}, {CLAUDE_HTML.encode()})
+        self.assertEqual(pages[0].encoding, 'utf-8')
+
+    def test_truncated_archive_ends_with_an_error(self):
+        with gzip.open(self.warc, 'rb') as f:
+            data = f.read()
+        cut = data.index(b'share/three') + 200
+        plain = os.path.join(self.root, 'cut.warc')
+        with open(plain, 'wb') as f:
+            f.write(data[:cut])
+        compressed = os.path.join(self.root, 'cut.warc.gz')
+        with open(self.warc, 'rb') as f:
+            raw = f.read()
+        with open(compressed, 'wb') as f:
+            f.write(raw[:-100])
+
+        for path in (plain, compressed):
+            with self.subTest(path=path):
+                pages = list(iter_warc(path))
+                self.assertEqual(pages[0].load()[1], CLAUDE_HTML.encode())
+                with self.assertRaises(EOFError):
+                    pages[-1].load()
+                results = list(parse_saved_pages([path], 'claude', parse_workers=1))
+                self.assertEqual([r.ok for r in results], [True] * (len(results) - 1) + [False])
+                self.assertIsInstance(results[-1].error, EOFError)
+        # Only the record the plain archive ends inside is lost
+        self.assertEqual(len(list(iter_warc(plain))), 3)
+
+    def test_charset_falls_back_to_meta_tag(self):
+        page = os.path.join(self.root, 'cp1251.html')
+        with open(page, 'wb') as f:
+            f.write('<meta charset="windows-1251"><p>Привет</p>'.encode('cp1251'))
+        bare = os.path.join(self.root, 'bare.html')
+        with open(bare, 'wb') as f:
+            f.write(b'<p>caf\xe9</p>')
+
+        (loaded,), (unknown,) = iter_saved_pages([page]), iter_saved_pages([bare])
+        _, body, encoding = loaded.load()
+        self.assertEqual(encoding, 'cp1251')
+        self.assertIn('Привет', body.decode(encoding))
+        self.assertIsNone(unknown.load()[2])
+
+    def test_walk_order_is_stable(self):
+        locations = [str(page) for page in iter_saved_pages([os.path.join(self.root, 'pages'), self.warc])]
+        self.assertEqual(len(locations), 5)
+        self.assertTrue(locations[0].endswith('b.html'))
+        self.assertTrue(locations[1].endswith('a.html.gz'))
+
+    def test_parse_in_worker_processes(self):
+        inputs = [os.path.join(self.root, 'pages'), self.warc]
+        results = list(parse_saved_pages(inputs, 'claude', parse_workers=2, max_pending=2))
+
+        self.assertEqual([r.index for r in results], list(range(5)))
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(results[0].url, CANONICAL)
+        self.assertTrue(results[1].url.startswith('file://'))
+        self.assertEqual(results[4].url, 'https://claude.ai/share/three')
+        for result in results:
+            self.assertEqual(result.conversation.url, result.url)
+            self.assertEqual(result.conversation.messages[1].role, Role.ASSISTANT)
+
+        # Resuming skips pages without parsing them
+        resumed = list(parse_saved_pages(inputs, ClaudeParser, parse_workers=1, start=3))
+        self.assertEqual([(r.index, r.url) for r in resumed], [(r.index, r.url) for r in results[3:]])
+
+    def test_routes_by_content(self):
+        # Archive records are routed by their claude.ai URLs
+        results = list(parse_saved_pages([self.warc], parse_workers=1))
+        self.assertEqual([r.ok for r in results], [True, True, True])
+        # The fixture page has no platform markers, so a bare file fails on its own
+        results = list(parse_saved_pages([os.path.join(self.root, 'pages', 'nested')], parse_workers=1))
+        self.assertIsInstance(results[0].error, ValueError)
+
+
+if __name__ == '__main__':
+    unittest.main()
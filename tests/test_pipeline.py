@@ -0,0 +1,58 @@
+import unittest
+from chatmix.parsers import ClaudeParser, Role
+from chatmix.parsers.pipeline import parse_pipeline, run_pipeline
+from tests.support import CLAUDE_HTML, LocalServer
+
+
+class TestParsePipeline(unittest.TestCase):
+    def test_parses_in_worker_processes_in_input_order(self):
+        routes = {f'/share/{i}': [(200, CLAUDE_HTML)] for i in range(8)}
+        with LocalServer(routes) as server:
+            urls = [server.url(f'/share/{i}') for i in range(8)] + [server.url('/missing')]
+            results = list(parse_pipeline(
+                ClaudeParser(), urls,
+                fetch_workers=3, parse_workers=2, max_pending=2, retries=0,
+            ))
+
+        self.assertEqual([r.url for r in results], urls)
+        self.assertFalse(results[-1].ok)
+        for result in results[:-1]:
+            self.assertTrue(result.ok)
+            self.assertEqual(result.conversation.messages[1].role, Role.ASSISTANT)
+
+    def test_backpressure_bounds_loaded_pages(self):
+        loaded = []
+        consumed = []
+
+        def produce(result, item):
+            loaded.append(item)
+            # Items are only loaded once a slot frees up.
+            self.assertLessEqual(len(loaded) - len(consumed), 3)
+            return result.url, CLAUDE_HTML.encode('utf-8'), 'utf-8'
+
+        for result in run_pipeline(ClaudeParser, range(20), produce, io_workers=4, parse_workers=2, max_pending=3, ordered=False):
+            consumed.append(result.index)
+            self.assertTrue(result.ok)
+
+        self.assertEqual(sorted(consumed), list(range(20)))
+
+    def test_input_errors_reach_the_caller(self):
+        def items():
+            yield from range(5)
+            raise EOFError('truncated input')
+
+        def produce(result, item):
+            return result.url, CLAUDE_HTML.encode('utf-8'), 'utf-8'
+
+        for ordered in (True, False):
+            with self.subTest(ordered=ordered):
+                results = []
+                with self.assertRaises(EOFError):
+                    for result in run_pipeline(ClaudeParser, items(), produce, parse_workers=1, ordered=ordered):
+                        results.append(result)
+                # Every item read before the error is still yielded
+                self.assertEqual(sorted(r.index for r in results), list(range(5)))
+
+
+if __name__ == "__main__":
+    unittest.main()
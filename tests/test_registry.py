@@ -0,0 +1,61 @@
+import subprocess
+import sys
+import unittest
+import chatmix
+from chatmix.parsers import ChatGPTParser, ClaudeParser, Role
+from chatmix.parsers import registry
+from tests.support import CLAUDE_HTML, LocalServer
+from tests.test_streaming import CHATGPT_PAGE
+
+
+class TestRouting(unittest.TestCase):
+    def test_routes_by_url(self):
+        self.assertEqual(registry.parser_for_url('https://claude.ai/share/abc'), 'claude')
+        self.assertEqual(registry.parser_for_url('https://chatgpt.com/share/abc'), 'chatgpt')
+        self.assertEqual(registry.parser_for_url('https://chat.openai.com/share/abc'), 'chatgpt')
+        self.assertIsNone(registry.parser_for_url('https://example.com/share/abc'))
+        self.assertIs(registry.parser_class('claude'), ClaudeParser)
+
+    def test_routes_by_fingerprint(self):
+        self.assertEqual(registry.parser_for_html(CHATGPT_PAGE), 'chatgpt')
+        self.assertEqual(registry.parser_for_html('<div class="font-claude-message">hi</div>'), 'claude')
+        self.assertIsNone(registry.parser_for_html('<p>nothing to go on</p>'))
+
+    def test_parse_html(self):
+        conversation = chatmix.parse(CHATGPT_PAGE, url='https://chatgpt.com/share/x')
+        self.assertEqual([m.role for m in conversation.messages], [Role.USER, Role.ASSISTANT])
+        self.assertEqual(conversation.url, 'https://chatgpt.com/share/x')
+        # The URL routes even when the page has no fingerprints
+        html = '<main><p>Question</p><p>Answer</p></main>'
+        self.assertEqual(len(chatmix.parse(html, url='https://claude.ai/share/x').messages), 2)
+        with self.assertRaises(ValueError):
+            chatmix.parse(html)
+
+    def test_parse_unrecognized_link_by_fingerprint(self):
+        page = CLAUDE_HTML.replace('<div', '<div class="font-claude-message"', 1)
+        with LocalServer({'/share/1': [(200, page)]}) as server:
+            conversation = chatmix.parse(server.url('/share/1'), backend='html.parser')
+        self.assertEqual(conversation.url, server.url('/share/1'))
+        self.assertTrue(conversation.messages)
+
+    def test_router_keeps_one_parser_per_platform(self):
+        router = registry.ParserRouter(backend='html.parser')
+        self.assertIs(router.parser('chatgpt'), router.parser('chatgpt'))
+        self.assertIsInstance(router.parser('chatgpt'), ChatGPTParser)
+        self.assertEqual(router.parser('claude').backend, 'html.parser')
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_heavy_dependencies_load_on_first_use(self):
+        code = (
+            'import sys, chatmix\n'
+            'from chatmix.parsers import Role\n'
+            'assert "bs4" not in sys.modules and "requests" not in sys.modules, "eager"\n'
+            'from chatmix.parsers import ClaudeParser\n'
+            'assert "bs4" in sys.modules and "requests" in sys.modules, "lazy"\n'
+        )
+        subprocess.run([sys.executable, '-c', code], check=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
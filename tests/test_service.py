@@ -0,0 +1,119 @@
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from chatmix.client import ServiceClient, ServiceError
+from chatmix.parsers import Role
+from chatmix.service import ParseService
+from tests.support import CLAUDE_HTML, LocalServer
+
+
+class RunningService:
+    """A ParseService listening on a background event loop."""
+
+    def __init__(self, address, **kwargs):
+        self.service = ParseService(**kwargs)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.server = asyncio.run_coroutine_threadsafe(self.service.start(address), self.loop).result()
+
+    def stop(self):
+        async def shutdown():
+            self.server.close()
+            await self.server.wait_closed()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.service.close()
+
+
+class TestParseService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.origin = LocalServer({'/share/1': [(200, CLAUDE_HTML)]}, delay=0.2)
+        self.origin.__enter__()
+        self.addCleanup(self.origin.__exit__, None, None, None)
+
+    def start(self, address=None, **kwargs):
+        address = address or os.path.join(self.tmp.name, 'chatmix.sock')
+        running = RunningService(address, backend='html.parser', **kwargs)
+        self.addCleanup(running.stop)
+        client = ServiceClient(address if isinstance(address, str) else running.server.sockets[0].getsockname()[:2])
+        self.addCleanup(client.close)
+        return client
+
+    def test_parse_url_and_html(self):
+        client = self.start(workers=0)
+        conversation = client.parse_from_url(self.origin.url('/share/1'), parser='claude')
+        self.assertEqual([m.role for m in conversation.messages], [Role.USER, Role.ASSISTANT])
+        self.assertEqual(conversation.url, self.origin.url('/share/1'))
+
+        conversation = client.parse_from_html(CLAUDE_HTML, 'https://claude.ai/share/abc')
+        self.assertEqual(len(conversation.messages), 2)
+        self.assertEqual(client.stats()['fetches'], 1)
+
+    def test_only_replaces_stale_sockets(self):
+        path = os.path.join(self.tmp.name, 'not-a-socket')
+        with open(path, 'w') as f:
+            f.write('keep me')
+        service = ParseService(workers=0)
+        self.addCleanup(service.close)
+        with self.assertRaises(FileExistsError):
+            asyncio.run(service.start(path))
+        with open(path) as f:
+            self.assertEqual(f.read(), 'keep me')
+
+        # A socket left behind by an earlier run is replaced
+        address = os.path.join(self.tmp.name, 'chatmix.sock')
+        with socket.socket(socket.AF_UNIX) as stale:
+            stale.bind(address)
+        client = self.start(address, workers=0)
+        self.assertEqual(len(client.parse_from_html(CLAUDE_HTML, 'https://claude.ai/share/abc').messages), 2)
+
+    def test_errors(self):
+        client = self.start(workers=0)
+        with self.assertRaises(ServiceError) as caught:
+            client.parse_from_url(self.origin.url('/missing'), parser='claude')
+        self.assertEqual(caught.exception.kind, 'HTTPError')
+        with self.assertRaises(ServiceError):
+            client.request('bogus')
+        # The connection survives errors
+        self.assertIn('time', client.request('ping'))
+
+    def test_concurrent_requests_share_one_fetch(self):
+        address = os.path.join(self.tmp.name, 'chatmix.sock')
+        self.start(address, workers=0)
+        url = self.origin.url('/share/1')
+        results = []
+
+        def call(spelling):
+            with ServiceClient(address) as client:
+                results.append(client.parse_from_url(spelling, parser='claude'))
+
+        spellings = [url, url + '/', url + '?utm_source=x'] * 3
+        threads = [threading.Thread(target=call, args=(spelling,)) for spelling in spellings]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), len(spellings))
+        self.assertEqual(self.origin.hits('/share/1'), 1)
+        with ServiceClient(address) as client:
+            stats = client.stats()
+        self.assertEqual(stats['coalesced'], len(spellings) - 1)
+        self.assertEqual(stats['parses'], 1)
+
+    def test_process_pool_over_tcp(self):
+        client = self.start(('127.0.0.1', 0), workers=1)
+        conversation = client.parse_from_url(self.origin.url('/share/1'), parser='claude')
+        self.assertEqual(len(conversation.messages), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
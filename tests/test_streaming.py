@@ -0,0 +1,69 @@
+import unittest
+from chatmix.parsers import ChatGPTParser, ClaudeParser, Role
+from tests.support import LocalServer
+
+
+CLAUDE_PAGE = """
+<html><head><title>Shared chat</title><script>var state = "<div class='font-user-message'>";</script></head>
+<body><header>Sorting a list</header>
+<div class="font-user-message"><p>How do I sort a list &amp; keep the original?</p></div>
+<div class="font-claude-message">
+    <p>Use <code>sorted()</code>, which returns a new list:</p>
+    <pre><code class="language-python">ordered = sorted(items)<br>
+</code></pre>
+    <div class="claude-message-footer"><span>Copy</span></div>
+    <!-- rendered by the share page -->
+    <ul><li>Ascending by default</li><li>Pass <code>reverse=True</code></li></ul>
+</div>
+<div class="font-user-message"><p>Thanks!</p>
+</body></html>
+"""
+
+CHATGPT_PAGE = """
+<main>
+<article><div data-message-author-role="user"><div>What is 2 + 2?</div></div></article>
+<article><div data-message-author-role="assistant"><div><p>It is <strong>4</strong>.</p></div></div></article>
+</main>
+"""
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestStreaming(unittest.TestCase):
+    def test_matches_full_parse_for_any_chunk_size(self):
+        parser = ClaudeParser(backend='html.parser')
+        expected = [(m.role, m.content) for m in parser.parse_from_html(CLAUDE_PAGE, 'u').messages]
+        self.assertEqual(len(expected), 3)
+
+        for size in (1, 7, 64, len(CLAUDE_PAGE)):
+            with self.subTest(size=size):
+                messages = list(parser.iter_messages_from_html(chunked(CLAUDE_PAGE, size)))
+                self.assertEqual([(m.role, m.content) for m in messages], expected)
+
+    def test_messages_are_yielded_as_they_close(self):
+        parser = ClaudeParser()
+        stream = parser.iter_messages_from_html(iter(chunked(CLAUDE_PAGE, 16)))
+        first = next(stream)
+        self.assertEqual(first.role, Role.USER)
+        self.assertTrue(first.raw_html.startswith('<div class="font-user-message">'))
+        self.assertIn('&amp;', first.raw_html)
+        self.assertIn('&', first.content)
+
+    def test_chatgpt_author_roles(self):
+        messages = list(ChatGPTParser().iter_messages_from_html(CHATGPT_PAGE))
+        self.assertEqual(
+            [(m.role, m.content) for m in messages],
+            [(Role.USER, 'What is 2 + 2?'), (Role.ASSISTANT, 'It is\n4\n.')]
+        )
+
+    def test_iter_messages_from_url(self):
+        with LocalServer({'/share/1': [(200, CLAUDE_PAGE)]}) as server:
+            messages = list(ClaudeParser().iter_messages_from_url(server.url('/share/1'), chunk_size=32))
+
+        self.assertEqual([m.role for m in messages], [Role.USER, Role.ASSISTANT, Role.USER])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import gzip
+import unittest
+from chatmix.parsers import ChatGPTParser, ClaudeParser
+from chatmix.parsers.transport import Transport, default_transport
+from tests.support import CLAUDE_HTML, LocalServer
+
+
+class TestTransport(unittest.TestCase):
+    def test_parsers_share_the_default_transport(self):
+        self.assertIs(ClaudeParser().transport, default_transport())
+        self.assertIs(ClaudeParser().session, ChatGPTParser().session)
+
+    def test_connections_are_reused_across_parsers(self):
+        with LocalServer({'/share/1': [(200, CLAUDE_HTML)]}) as server:
+            with Transport() as transport:
+                for _ in range(3):
+                    ClaudeParser(transport=transport).parse_from_url(server.url('/share/1'))
+            self.assertEqual(len(server.connections), 1)
+
+            # Separate transports cannot share connections
+            with Transport() as first, Transport() as second:
+                ClaudeParser(transport=first).parse_from_url(server.url('/share/1'))
+                ClaudeParser(transport=second).parse_from_url(server.url('/share/1'))
+            self.assertEqual(len(server.connections), 3)
+
+    def test_keep_alive_off(self):
+        with LocalServer({'/share/1': [(200, CLAUDE_HTML)]}) as server:
+            with Transport(keep_alive=False) as transport:
+                for _ in range(2):
+                    ClaudeParser(transport=transport).parse_from_url(server.url('/share/1'))
+            self.assertEqual(len(server.connections), 2)
+
+    def test_retries_retryable_statuses(self):
+        routes = {'/share/1': [(503, 'busy', {'Retry-After': '0'}), (200, CLAUDE_HTML)]}
+        with LocalServer(routes) as server, Transport(retries=2, backoff=0) as transport:
+            conversation = ClaudeParser(transport=transport).parse_from_url(server.url('/share/1'))
+            self.assertEqual(server.hits('/share/1'), 2)
+        self.assertEqual(len(conversation.messages), 2)
+
+    def test_decodes_compressed_responses(self):
+        body = gzip.compress(CLAUDE_HTML.encode('utf-8'))
+        routes = {'/share/1': [(200, body, {'Content-Encoding': 'gzip'})]}
+        with LocalServer(routes) as server, Transport() as transport:
+            conversation = ClaudeParser(transport=transport).parse_from_url(server.url('/share/1'))
+            _, headers = server.requests[0]
+        self.assertIn('gzip', headers['Accept-Encoding'])
+        self.assertIn('domain record', conversation.messages[0].content)
+
+    def test_growing_the_pool_keeps_settings(self):
+        with Transport(pool_size=4, retries=3, timeout=5) as transport:
+            transport.ensure_pool_size(2)
+            self.assertEqual(transport.pool_size, 4)
+            transport.ensure_pool_size(32)
+            adapter = transport.session.get_adapter('https://claude.ai/')
+            self.assertEqual((adapter._pool_maxsize, adapter.max_retries.total, adapter.timeout), (32, 3, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from chatmix.parsers import utils
+
+
+SAMPLE_HTML = """
+<div>
+    <h2>Setting up DNS</h2>
+    <p>Use a <code>CNAME</code> record. See <a href="https://example.com/dns">the docs</a>.</p>
+    <h1>Summary</h1>
+    <ul><li>Pick a record type</li><li>Set the host</li></ul>
+    <ol><li>Open the dashboard</li><li>Save</li></ol>
+    <pre><code class="language-bash">dig example.com CNAME</code></pre>
+    <table>
+        <thead><tr><th>Type</th><th>Value</th></tr></thead>
+        <tbody><tr><td>CNAME</td><td>target.example.com</td></tr></tbody>
+    </table>
+</div>
+"""
+
+
+class TestExtractAll(unittest.TestCase):
+    def test_matches_individual_extractors(self):
+        content = utils.extract_all(SAMPLE_HTML)
+
+        self.assertEqual(content.code_blocks, utils.extract_code_blocks(SAMPLE_HTML))
+        self.assertEqual(content.lists, utils.extract_lists(SAMPLE_HTML))
+        self.assertEqual(content.tables, utils.extract_tables(SAMPLE_HTML))
+        self.assertEqual(content.headings, utils.extract_headings(SAMPLE_HTML))
+        self.assertEqual(content.markdown, utils.html_to_markdown(SAMPLE_HTML))
+
+    def test_extracted_values(self):
+        content = utils.extract_all(SAMPLE_HTML)
+
+        self.assertEqual(content.code_blocks, [{'language': 'bash', 'content': 'dig example.com CNAME'}])
+        self.assertEqual([lst['type'] for lst in content.lists], ['unordered', 'ordered'])
+        self.assertEqual(content.tables[0]['headers'], ['Type', 'Value'])
+        self.assertEqual(content.tables[0]['rows'], [['CNAME', 'target.example.com']])
+        # Headings are grouped by level before document order
+        self.assertEqual([h['text'] for h in content.headings], ['Summary', 'Setting up DNS'])
+        self.assertIn('[the docs](https://example.com/dns)', content.markdown)
+
+
+# Outputs of the original multi-pass converter, which the rewrite must keep.
+MARKDOWN_GOLDEN = [
+    ('<h1>Title</h1><p>Body text</p>', '# Title\n\nBody text'),
+    ('<p>Use <code>dig</code> or see <a href="https://example.com/dns">the docs</a>.</p>',
+     'Use `dig` or see [the docs](https://example.com/dns).'),
+    ('<ul><li>One</li><li>Two</li></ul><ol><li>First</li><li>Second</li></ol>',
+     '- One\n- Two\n\n1. First\n2. Second'),
+    ('<pre><code class="language-python">print("hi")</code></pre>', '```python\nprint("hi")\n```'),
+    ('<p>See <img alt="Diagram" src="diagram.png"></p>', 'See ![Diagram](diagram.png)'),
+    ('<h2>Setup</h2><h3>Details</h3><p>Done.</p>', '## Setup\n\n### Details\n\nDone.'),
+    ('<div><p>One</p><p>Two</p></div>', 'One\n\nTwo'),
+    ('<pre><code>x = 1</code></pre><p>After</p>', '```\nx = 1\n```\n\nAfter'),
+]
+
+
+class TestHtmlToMarkdown(unittest.TestCase):
+    def test_golden_outputs(self):
+        for backend in ('html.parser', None):
+            for html, expected in MARKDOWN_GOLDEN:
+                with self.subTest(html=html, backend=backend):
+                    self.assertEqual(utils.html_to_markdown(html, backend=backend), expected)
+
+    def test_nested_lists_keep_structure(self):
+        html = (
+            '<ul><li>Install<ul><li>pip <code>chatmix</code></li><li>see <a href="u">docs</a></li></ul></li>'
+            '<li>Run<pre><code class="language-sh">chatmix ingest\n</code></pre></li></ul>'
+        )
+        self.assertEqual(utils.html_to_markdown(html), (
+            '- Install\n'
+            '  - pip `chatmix`\n'
+            '  - see [docs](u)\n'
+            '- Run\n'
+            '  ```sh\n'
+            '  chatmix ingest\n'
+            '  ```'
+        ))
+
+    def test_tables(self):
+        html = (
+            '<table><thead><tr><th>Type</th><th>Value</th></tr></thead>'
+            '<tbody><tr><td>A|B</td><td><code>x</code></td></tr><tr><td>only</td></tr></tbody></table>'
+        )
+        self.assertEqual(utils.html_to_markdown(html), (
+            '| Type | Value |\n'
+            '| --- | --- |\n'
+            '| A\\|B | `x` |\n'
+            '| only |  |'
+        ))
+
+    def test_does_not_modify_tree(self):
+        soup = utils.make_soup(SAMPLE_HTML)
+        before = str(soup)
+        utils._soup_to_markdown(soup)
+        self.assertEqual(str(soup), before)
+
+
+if __name__ == "__main__":
+    unittest.main()